@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'simulation.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -123,3 +125,111 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Simulation engine
+# Execution backend for analyze_impact_advanced: 'serial', 'threads' or 'processes'.
+# Chunk size and worker count default to values derived from the dataset size and CPU count.
+# The 'processes' backend keeps a pool of spawned workers holding the dataset between simulations.
+
+SIMULATION_BACKEND = 'serial'
+
+SIMULATION_CHUNK_SIZE = None
+
+SIMULATION_MAX_WORKERS = None
+
+# Byte budgets of the in-process result caches: whole baseline results and single-condition
+# results shared across guidelines and requests. Least recently used entries are evicted first.
+
+SIMULATION_BASELINE_CACHE_BYTES = 64 * 1024 * 1024
+
+SIMULATION_CONDITION_CACHE_BYTES = 64 * 1024 * 1024
+
+# Largest number of candidate guidelines accepted by one batch simulation request.
+
+SIMULATION_MAX_BATCH_SIZE = 100
+
+# Largest number of thresholds evaluated by one threshold sweep request.
+
+SIMULATION_MAX_SWEEP_POINTS = 1000
+
+# Submissions data file, and the binary snapshot compiled from it by ``manage.py build_snapshot``.
+# Workers map the snapshot instead of parsing the file when it was built from the current file,
+# and pick up a rebuilt snapshot on their next request.
+
+SIMULATION_SUBMISSIONS_PATH = BASE_DIR / 'simulation' / 'data' / 'submissions.json'
+
+SIMULATION_SNAPSHOT_PATH = BASE_DIR / 'simulation' / 'data' / 'submissions.snapshot'
+
+# Where single-guideline simulations run: 'memory' evaluates the loaded submissions, 'database'
+# translates the guidelines to SQL over the submissions imported by ``manage.py import_simulation_data``.
+
+SIMULATION_DATA_SOURCE = 'memory'
+
+# Background simulation jobs run on this many threads of each worker process. The last
+# SIMULATION_MAX_JOBS jobs stay queryable, and the reports of the last SIMULATION_JOB_RESULTS
+# distinct simulations are returned at once when the same simulation is submitted again.
+
+SIMULATION_JOB_WORKERS = 2
+
+SIMULATION_MAX_JOBS = 1000
+
+SIMULATION_JOB_RESULTS = 128
+
+# Estimate-mode simulations evaluate a stratified sample of this many submissions, drawn once
+# per dataset version, and report intervals at this confidence level.
+
+SIMULATION_SAMPLE_SIZE = 10_000
+
+SIMULATION_ESTIMATE_CONFIDENCE = 0.95
+
+
+# Report charts not yet cached are rendered in parallel on a pool of this many processes
+# (1 renders them in the request thread), and the last SIMULATION_CHART_CACHE_BYTES of
+# rendered PNGs are kept.
+
+SIMULATION_CHART_WORKERS = 4
+
+SIMULATION_CHART_CACHE_BYTES = 16 * 1024 * 1024
+
+# Pages of the guidelines and submissions listings hold SIMULATION_LIST_PAGE_SIZE rows unless
+# the request sets a ``limit``, and never more than SIMULATION_LIST_MAX_PAGE_SIZE.
+
+SIMULATION_LIST_PAGE_SIZE = 100
+
+SIMULATION_LIST_MAX_PAGE_SIZE = 1000
+
+# When a worker loads the submissions dataset, builds its indexes and draws the estimate
+# sample: 'background' starts at start-up on a separate thread, so the worker serves requests
+# at once; 'eager' finishes before start-up does; 'lazy' waits for the first request that
+# needs the data (or for /ready/). Management commands other than runserver never warm up.
+
+SIMULATION_WARM_UP = 'background'
+
+# The simulation app logs warnings and errors; set SIMULATION_LOG_LEVEL=INFO in the
+# environment to also log how long warm-up and loading stages take.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'simulation': {'handlers': ['console'], 'level': os.environ.get('SIMULATION_LOG_LEVEL', 'WARNING')},
+    },
+}
+
+# Requests are timed per stage (reported in the Server-Timing header and at /api/metrics/).
+# The metrics endpoint answers requests from the addresses or networks in
+# SIMULATION_METRICS_ALLOWED_IPS, and requests with "Authorization: Bearer <token>" matching
+# SIMULATION_METRICS_TOKEN; it answers no one by default. Behind a reverse proxy on the same
+# machine every request comes from the proxy's address, so allowing 127.0.0.1 there makes the
+# metrics public: use a token instead. With SIMULATION_PROFILE_DIR set, a request with
+# ?profile=1 is profiled with cProfile and its stats are written to that directory.
+
+SIMULATION_METRICS_ALLOWED_IPS = []
+
+SIMULATION_METRICS_TOKEN = os.environ.get('SIMULATION_METRICS_TOKEN')
+
+SIMULATION_PROFILE_DIR = None
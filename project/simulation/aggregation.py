@@ -0,0 +1,268 @@
+from datetime import datetime, time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+COMPANY_SIZES = ("small", "medium", "large")
+
+
+def _increment(counter: Dict[Any, int], key: Any, amount: int = 1) -> None:
+    counter[key] = counter.get(key, 0) + amount
+
+
+def _company_size(employees: Any) -> int:
+    try:
+        if employees < 50:
+            return 0
+        if employees < 250:
+            return 1
+        return 2
+    except TypeError:
+        return -1
+
+
+def _date_ordinal(value: Any, parsed: Dict[Any, int]) -> int:
+    try:
+        return parsed[value]
+    except KeyError:
+        pass
+    except TypeError:
+        return -1
+    try:
+        ordinal = datetime.strptime(value, "%Y-%m-%d").toordinal()
+    except Exception:
+        ordinal = -1
+    parsed[value] = ordinal
+    return ordinal
+
+
+def _revenue(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _Encoder:
+    def __init__(self):
+        self.labels: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+
+    def encode(self, value: Any) -> int:
+        key = (value.__class__, value)
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.labels)
+            self.labels.append(value)
+        return code
+
+
+def counts_by_label(codes: np.ndarray, labels: Sequence[Any]) -> Dict[Any, int]:
+    counts = np.bincount(codes, minlength=len(labels))
+    return {labels[code]: int(count) for code, count in enumerate(counts.tolist()) if count}
+
+
+class DimensionKeys:
+    """
+    Breakdown keys for every submission, computed once per dataset.
+
+    Industry and location are dictionary codes, company size is a code into
+    ``COMPANY_SIZES`` (-1 when unknown), submission dates are proleptic ordinals (-1 when
+    unparseable) and risk factors are item codes in offset-encoded rows, which keeps repeated
+    factors countable.
+    """
+
+    def __init__(self, industry_codes: np.ndarray, industry_labels: List[Any],
+                 location_codes: np.ndarray, location_labels: List[Any],
+                 size_codes: np.ndarray, date_ordinals: np.ndarray, revenue: np.ndarray,
+                 risk_offsets: np.ndarray, risk_codes: np.ndarray, risk_labels: List[Any]):
+        self.industry_codes = industry_codes
+        self.industry_labels = industry_labels
+        self.location_codes = location_codes
+        self.location_labels = location_labels
+        self.size_codes = size_codes
+        self.date_ordinals = date_ordinals
+        self.revenue = revenue
+        self.risk_offsets = risk_offsets
+        self.risk_codes = risk_codes
+        self.risk_labels = risk_labels
+        self.risk_rows = np.repeat(np.arange(len(size_codes)), np.diff(risk_offsets))
+
+    def __len__(self) -> int:
+        return len(self.size_codes)
+
+    @classmethod
+    def from_submissions(cls, submissions: Sequence[dict]) -> "DimensionKeys":
+        industries, locations, risk_factors = _Encoder(), _Encoder(), _Encoder()
+        industry_codes, location_codes, size_codes, date_ordinals, revenue = [], [], [], [], []
+        risk_offsets, risk_codes = [0], []
+        parsed_dates: Dict[Any, int] = {}
+
+        for sub in submissions:
+            company = sub.get("company_data", {})
+            industry_codes.append(industries.encode(company.get("industry", "unknown")))
+            location_codes.append(locations.encode(company.get("location", "unknown")))
+            size_codes.append(_company_size(company.get("employees", 0)))
+            date_ordinals.append(_date_ordinal(sub.get("submission_date"), parsed_dates))
+            revenue.append(_revenue(sub.get("financials", {}).get("revenue", 0)))
+            for factor in sub.get("risk_profile", {}).get("risk_factors", []):
+                risk_codes.append(risk_factors.encode(factor))
+            risk_offsets.append(len(risk_codes))
+
+        return cls(
+            np.array(industry_codes, dtype=np.int32), industries.labels,
+            np.array(location_codes, dtype=np.int32), locations.labels,
+            np.array(size_codes, dtype=np.int8),
+            np.array(date_ordinals, dtype=np.int32),
+            np.array(revenue, dtype=np.float64),
+            np.array(risk_offsets, dtype=np.int64),
+            np.array(risk_codes, dtype=np.int32), risk_factors.labels,
+        )
+
+    def slice(self, start: int, stop: int) -> "DimensionKeys":
+        offsets = self.risk_offsets[start:stop + 1]
+        return DimensionKeys(
+            self.industry_codes[start:stop], self.industry_labels,
+            self.location_codes[start:stop], self.location_labels,
+            self.size_codes[start:stop],
+            self.date_ordinals[start:stop],
+            self.revenue[start:stop],
+            offsets - offsets[0],
+            self.risk_codes[offsets[0]:offsets[-1]], self.risk_labels,
+        )
+
+
+class ImpactAggregate:
+    """
+    Partial impact report over a slice of submissions.
+
+    Aggregates built over disjoint slices are combined with ``merge``; ``to_report`` turns the
+    result into the payload returned by ``analyze_impact_advanced``.
+    """
+
+    def __init__(self, immediate_cutoff: datetime):
+        self.immediate_cutoff = immediate_cutoff
+        self.total_submissions = 0
+        self.outcome_changes = 0
+        self.breakdown_by_industry: Dict[Any, int] = {}
+        self.breakdown_by_risk_factor: Dict[Any, int] = {}
+        self.breakdown_by_company_size: Dict[Any, int] = {}
+        self.breakdown_by_location: Dict[Any, int] = {}
+        self.time_impact = {"immediate": 0, "gradual": 0}
+        self.financial_impact = 0.0
+        # (distance, position, submission_id); ranked when the report is built.
+        self.near_misses: List[Tuple[float, int, Any]] = []
+
+    def add(self, sub: dict, baseline_result: bool, modified_result: bool,
+            near_miss: Optional[float], position: int) -> None:
+        if baseline_result != modified_result:
+            self.outcome_changes += 1
+
+            industry = sub.get("company_data", {}).get("industry", "unknown")
+            _increment(self.breakdown_by_industry, industry)
+
+            for factor in sub.get("risk_profile", {}).get("risk_factors", []):
+                _increment(self.breakdown_by_risk_factor, factor)
+
+            # Unknown sizes (e.g. employees of None) are left out, as in ``add_masks``.
+            size = _company_size(sub.get("company_data", {}).get("employees", 0))
+            if size >= 0:
+                _increment(self.breakdown_by_company_size, COMPANY_SIZES[size])
+
+            location = sub.get("company_data", {}).get("location", "unknown")
+            _increment(self.breakdown_by_location, location)
+
+            try:
+                sub_date = datetime.strptime(sub.get("submission_date"), "%Y-%m-%d")
+                if sub_date >= self.immediate_cutoff:
+                    self.time_impact["immediate"] += 1
+                else:
+                    self.time_impact["gradual"] += 1
+            except Exception:
+                pass
+
+            revenue = _revenue(sub.get("financials", {}).get("revenue", 0))
+            if modified_result and not baseline_result:
+                self.financial_impact += revenue
+            elif baseline_result and not modified_result:
+                self.financial_impact -= revenue
+
+        if near_miss is not None:
+            self.near_misses.append((near_miss, position, sub.get("submission_id")))
+
+    def add_masks(self, dimensions: DimensionKeys, baseline_results: np.ndarray, modified_results: np.ndarray,
+                  near_miss_distances: np.ndarray, submission_ids: Sequence[Any] = (), offset: int = 0) -> None:
+        """
+        Aggregates a whole slice in one vectorized group-by pass.
+
+        ``near_miss_distances`` is NaN for rows that are not near misses; ``submission_ids``
+        are the ids of the near-miss rows in position order and ``offset`` is the position of
+        the slice in the full dataset.
+        """
+        changed = baseline_results != modified_results
+        self.outcome_changes += int(np.count_nonzero(changed))
+
+        for counter, counts in (
+            (self.breakdown_by_industry, counts_by_label(dimensions.industry_codes[changed], dimensions.industry_labels)),
+            (self.breakdown_by_location, counts_by_label(dimensions.location_codes[changed], dimensions.location_labels)),
+            (self.breakdown_by_risk_factor, counts_by_label(
+                dimensions.risk_codes[changed[dimensions.risk_rows]], dimensions.risk_labels)),
+        ):
+            for key, count in counts.items():
+                _increment(counter, key, count)
+
+        sizes = dimensions.size_codes[changed]
+        for key, count in counts_by_label(sizes[sizes >= 0], COMPANY_SIZES).items():
+            _increment(self.breakdown_by_company_size, key, count)
+
+        cutoff = self.immediate_cutoff
+        first_immediate = cutoff.toordinal() + (0 if cutoff.time() == time(0) else 1)
+        dates = dimensions.date_ordinals[changed]
+        dates = dates[dates >= 0]
+        immediate = int(np.count_nonzero(dates >= first_immediate))
+        self.time_impact["immediate"] += immediate
+        self.time_impact["gradual"] += len(dates) - immediate
+
+        gained = modified_results & ~baseline_results
+        lost = baseline_results & ~modified_results
+        self.financial_impact += float(dimensions.revenue[gained].sum() - dimensions.revenue[lost].sum())
+
+        positions = np.flatnonzero(~np.isnan(near_miss_distances))
+        self.near_misses.extend(zip(near_miss_distances[positions].tolist(), (positions + offset).tolist(),
+                                    submission_ids))
+
+    def merge(self, other: "ImpactAggregate") -> "ImpactAggregate":
+        self.total_submissions += other.total_submissions
+        self.outcome_changes += other.outcome_changes
+        for mine, theirs in (
+            (self.breakdown_by_industry, other.breakdown_by_industry),
+            (self.breakdown_by_risk_factor, other.breakdown_by_risk_factor),
+            (self.breakdown_by_company_size, other.breakdown_by_company_size),
+            (self.breakdown_by_location, other.breakdown_by_location),
+            (self.time_impact, other.time_impact),
+        ):
+            for key, count in theirs.items():
+                _increment(mine, key, count)
+        self.financial_impact += other.financial_impact
+        self.near_misses.extend(other.near_misses)
+        return self
+
+    def to_report(self, near_misses: bool = True) -> Dict[str, Any]:
+        """The impact report; ``near_misses=False`` leaves out the (sorted) near-miss ranking."""
+        total_submissions = self.total_submissions
+        outcome_change_percentage = (self.outcome_changes / total_submissions * 100) if total_submissions else 0.0
+        report = {
+            "total_submissions": total_submissions,
+            "outcome_changes": self.outcome_changes,
+            "outcome_change_percentage": outcome_change_percentage,
+            "breakdown_by_industry": self.breakdown_by_industry,
+            "breakdown_by_risk_factor": self.breakdown_by_risk_factor,
+            "breakdown_by_company_size": self.breakdown_by_company_size,
+            "breakdown_by_location": self.breakdown_by_location,
+            "time_impact": self.time_impact,
+            "financial_impact": self.financial_impact,
+        }
+        if near_misses:
+            ranked = sorted(self.near_misses, key=lambda x: x[:2])
+            report["near_miss_submissions"] = [submission_id for _, _, submission_id in ranked]
+        return report
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class SimulationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'simulation'
+
+    def ready(self):
+        from .warmup import WARM_UP, serving_process
+
+        WARM_UP.load_guidelines()
+        if not serving_process():
+            return
+        if settings.SIMULATION_WARM_UP == "eager":
+            WARM_UP.run()
+        elif settings.SIMULATION_WARM_UP == "background":
+            WARM_UP.start()
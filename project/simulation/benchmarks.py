@@ -0,0 +1,225 @@
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from django.conf import settings
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from . import views
+from .charts import ChartRenderer, render_png, report_charts
+from .engine import ColumnarDataset
+from .guidelines import replace_guidelines
+from .loader import load_submission_store
+from .services import (
+    BASELINE_CACHE, CONDITION_STORE, analyze_impact_advanced, evaluate_condition, evaluate_guideline,
+    evaluate_near_miss
+)
+from .snapshot import snapshot_stamp
+from .synthetic import generate_guidelines, write_submissions
+
+BENCHMARK_GROUPS = ("load", "evaluate", "analyze", "charts", "http")
+# Benchmarks of per-submission functions, and of the rows engine, use this many submissions.
+ROW_SAMPLE = 10_000
+# Full listings are not requested over larger datasets: the response is the whole dataset.
+MAX_FULL_LISTING = 1_000_000
+
+
+def measure(run: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Times ``repeat`` calls of ``run``, each after an untimed ``setup``."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return {
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+    }
+
+
+def environment(seed: int, repeat: int) -> Dict[str, Any]:
+    """What a benchmark run ran on, so results of different commits and machines can be told apart."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+@contextmanager
+def serving(dataset: ColumnarDataset, guidelines: List[dict]) -> Iterator[None]:
+    """Makes the views serve ``dataset`` and ``guidelines`` instead of the configured data."""
+    state = views.SUBMISSIONS_DATASET, views.SUBMISSIONS_SNAPSHOT, list(views.GUIDELINES_DATA)
+    views.SUBMISSIONS_DATASET, views.SUBMISSIONS_SNAPSHOT = dataset, snapshot_stamp(views.SNAPSHOT_PATH)
+    replace_guidelines(guidelines)
+    try:
+        with override_settings(SIMULATION_DATA_SOURCE="memory", ALLOWED_HOSTS=["*"]):
+            yield
+    finally:
+        views.SUBMISSIONS_DATASET, views.SUBMISSIONS_SNAPSHOT = state[:2]
+        replace_guidelines(state[2])
+
+
+class BenchmarkRun:
+    """
+    Benchmarks the simulation pipeline over synthetic datasets (see ``synthetic``), written to
+    ``data_dir`` as JSON Lines and reused by later runs with the same size and seed.
+
+    Each result records the benchmark ``name``, the number of ``rows`` it processed, timing
+    statistics over ``repeat`` runs and the throughput in rows per second.
+    """
+
+    def __init__(self, data_dir: str, seed: int = 0, repeat: int = 3,
+                 groups: Sequence[str] = BENCHMARK_GROUPS, log: Callable[[str], None] = lambda message: None):
+        self.data_dir = data_dir
+        self.seed = seed
+        self.repeat = repeat
+        self.groups = groups
+        self.log = log
+        self.results: List[Dict[str, Any]] = []
+        self.guidelines = generate_guidelines(20, seed)
+
+    def record(self, name: str, rows: int, timing: Dict[str, Any]) -> None:
+        result = {"name": name, "rows": rows, **timing,
+                  "rows_per_s": rows / timing["median_s"] if timing["median_s"] else None}
+        self.results.append(result)
+        self.log(f"{name} [{rows:,}]: {timing['median_s'] * 1000:.2f} ms")
+
+    def run(self, sizes: Sequence[int]) -> Dict[str, Any]:
+        for size in sizes:
+            self.run_size(size)
+        return {"environment": environment(self.seed, self.repeat), "results": self.results}
+
+    def run_size(self, size: int) -> None:
+        path = os.path.join(self.data_dir, f"submissions-{size}-{self.seed}.jsonl")
+        if not os.path.exists(path):
+            self.log(f"Generating {size:,} submissions in {path}")
+        write_submissions(path, size, self.seed)
+
+        store = None
+
+        def load() -> None:
+            nonlocal store
+            store = load_submission_store(path)
+
+        if "load" in self.groups:
+            self.record("load_submission_store", size, measure(load, self.repeat))
+        else:
+            load()
+        dataset = ColumnarDataset(store, version=f"benchmark:{size}:{self.seed}")
+        baseline, modified = self.guidelines[0], self.guidelines[1]
+
+        if "evaluate" in self.groups:
+            sample = store[:ROW_SAMPLE].to_dicts()
+            condition = modified["conditions"]["conditions"][0]
+            for name, function, argument in (("evaluate_condition", evaluate_condition, condition),
+                                             ("evaluate_guideline", evaluate_guideline, modified),
+                                             ("evaluate_near_miss", evaluate_near_miss, modified)):
+                self.record(name, len(sample), measure(lambda: [function(s, argument) for s in sample], self.repeat))
+            self.record("analyze_impact_advanced[rows]", len(sample), measure(
+                lambda: analyze_impact_advanced(sample, baseline, modified, engine="rows"), self.repeat))
+
+        report = None
+        if "analyze" in self.groups or "charts" in self.groups:
+            fresh: List[ColumnarDataset] = []
+
+            def cold() -> None:
+                BASELINE_CACHE.clear()
+                CONDITION_STORE.clear()
+                fresh[:] = [ColumnarDataset(store, version=f"benchmark:{size}:{self.seed}")]
+
+            def analyze() -> None:
+                nonlocal report
+                report = analyze_impact_advanced(fresh[0] if fresh else dataset, baseline, modified)
+
+            if "analyze" in self.groups:
+                self.record("analyze_impact_advanced", size, measure(analyze, self.repeat, setup=cold))
+                fresh.clear()
+                analyze()
+                self.record("analyze_impact_advanced[warm]", size, measure(analyze, self.repeat))
+            else:
+                analyze()
+
+        if "charts" in self.groups:
+            charts = list(report_charts(report).values())
+            self.record("render_charts[serial]", len(charts),
+                        measure(lambda: [render_png(chart) for chart in charts], self.repeat))
+            renderer = ChartRenderer(max_workers=max(settings.SIMULATION_CHART_WORKERS, 2), cache_bytes=0)
+            try:
+                # The first call starts the process pool.
+                renderer.render(charts)
+                self.record("render_charts[processes]", len(charts),
+                            measure(lambda: renderer.render(charts), self.repeat))
+            finally:
+                renderer.shutdown()
+
+        if "http" in self.groups:
+            self.run_http(dataset, size, baseline, modified)
+
+    def run_http(self, dataset: ColumnarDataset, size: int, baseline: dict, modified: dict) -> None:
+        client = Client()
+
+        def request(method: str, url: str, data: Any = None, **params) -> Callable[[], Any]:
+            def call():
+                if method == "post":
+                    response = client.post(url, data, content_type="application/json")
+                else:
+                    response = client.get(url, data, **params)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{method.upper()} {url} returned {response.status_code}: {response.content[:200]!r}")
+                return response
+            return call
+
+        with serving(dataset, self.guidelines):
+            simulate = request("post", reverse("simulate"), dict(modified, id=baseline["id"]))
+            report = simulate().json()
+            self.record("POST /simulate/", size, measure(simulate, self.repeat))
+            self.record("GET /submissions/?limit=100", 100,
+                        measure(request("get", reverse("submissions"), {"limit": 100}), self.repeat))
+            if size <= MAX_FULL_LISTING:
+                listing = request("get", reverse("submissions"), HTTP_ACCEPT_ENCODING="gzip")
+                # The first request encodes the listing.
+                listing()
+                self.record("GET /submissions/", size, measure(listing, self.repeat))
+            graphs = request("post", reverse("graphs"), report)
+            # The first request starts the chart process pool; later ones are served from the PNG cache.
+            graphs()
+            self.record("POST /graphs/", len(report_charts(report)), measure(graphs, self.repeat))
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The median time of each result relative to the baseline result with the same name and
+    row count: above 1 is slower than the baseline.
+    """
+    previous = {(result["name"], result["rows"]): result for result in baseline}
+    changes = []
+    for result in results:
+        before = previous.get((result["name"], result["rows"]))
+        if before is None or not before["median_s"]:
+            continue
+        changes.append({"name": result["name"], "rows": result["rows"], "baseline_median_s": before["median_s"],
+                        "median_s": result["median_s"], "ratio": result["median_s"] / before["median_s"]})
+    return changes
@@ -0,0 +1,97 @@
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+class Bitset:
+    """
+    Fixed-length set of submission positions packed eight to a byte.
+
+    Bit order follows ``np.packbits``; padding bits in the last byte are always zero.
+    """
+    __slots__ = ("words", "length")
+
+    def __init__(self, words: np.ndarray, length: int):
+        self.words = words
+        self.length = length
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "Bitset":
+        return cls(np.packbits(np.asarray(mask, dtype=bool)), len(mask))
+
+    @classmethod
+    def from_positions(cls, positions: Iterable[int], length: int) -> "Bitset":
+        mask = np.zeros(length, dtype=bool)
+        mask[np.asarray(positions if isinstance(positions, np.ndarray) else list(positions), dtype=np.int64)] = True
+        return cls.from_mask(mask)
+
+    @classmethod
+    def zeros(cls, length: int) -> "Bitset":
+        return cls(np.zeros((length + 7) // 8, dtype=np.uint8), length)
+
+    def to_mask(self) -> np.ndarray:
+        return np.unpackbits(self.words, count=self.length).view(bool)
+
+    def positions(self) -> np.ndarray:
+        return np.flatnonzero(self.to_mask())
+
+    def count(self) -> int:
+        return int(_POPCOUNT[self.words].sum(dtype=np.int64))
+
+    @property
+    def nbytes(self) -> int:
+        return self.words.nbytes
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _check(self, other: "Bitset") -> None:
+        if self.length != other.length:
+            raise ValueError(f"Bitset lengths differ: {self.length} != {other.length}")
+
+    def __and__(self, other: "Bitset") -> "Bitset":
+        self._check(other)
+        return Bitset(self.words & other.words, self.length)
+
+    def __or__(self, other: "Bitset") -> "Bitset":
+        self._check(other)
+        return Bitset(self.words | other.words, self.length)
+
+    def __xor__(self, other: "Bitset") -> "Bitset":
+        self._check(other)
+        return Bitset(self.words ^ other.words, self.length)
+
+    def __invert__(self) -> "Bitset":
+        words = ~self.words
+        padding = -self.length % 8
+        if padding:
+            words[-1] &= (0xFF << padding) & 0xFF
+        return Bitset(words, self.length)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Bitset):
+            return NotImplemented
+        return self.length == other.length and np.array_equal(self.words, other.words)
+
+    __hash__ = None
+
+
+def at_least(weighted: Sequence[Tuple[Bitset, int]], threshold: int, universe: Bitset) -> Bitset:
+    """
+    Positions of ``universe`` whose summed weights over ``weighted`` reach ``threshold``.
+
+    Works entirely on packed words: ``reached[j]`` holds the rows that have accumulated at
+    least ``j`` so far, updated once per bitset, so the cost is O(len(weighted) * threshold)
+    word operations rather than a per-row count.
+    """
+    if threshold <= 0:
+        return universe
+    reached = [universe] + [Bitset.zeros(universe.length) for _ in range(threshold)]
+    for bitset, weight in weighted:
+        if weight <= 0:
+            continue
+        for j in range(threshold, 0, -1):
+            reached[j] = reached[j] | (reached[max(j - weight, 0)] & bitset)
+    return reached[threshold] & universe
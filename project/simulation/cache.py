@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .bitsets import Bitset
+from .compiler import CompiledCondition
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by the total ``weigh`` of its values, in bytes.
+
+    Keys should be content addresses (for example a compiled guideline digest plus a dataset
+    fingerprint), so a hit can never be stale and independent worker processes agree on keys.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def weigh(value: Any) -> int:
+        return len(value)
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.weigh(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self.weigh(previous)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self.weigh(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class BitsetCache(LRUCache):
+    """``LRUCache`` of ``Bitset`` results bounded by their packed size."""
+
+    @staticmethod
+    def weigh(value: Bitset) -> int:
+        return value.nbytes
+
+    def get(self, key: Hashable) -> Optional[Bitset]:
+        return super().get(key)
+
+
+class ConditionStore(BitsetCache):
+    """
+    Result bitsets of single conditions keyed by ``(canonical condition, dataset fingerprint)``.
+
+    ``load`` seeds a per-call memo with the results already known and ``save`` keeps the
+    full-length masks the call computed, so any guideline, baseline or candidate repeating a
+    condition reuses its result instead of scanning again.
+    """
+
+    def load(self, fingerprint: str, conditions: Iterable[CompiledCondition],
+             memo: Dict[Any, np.ndarray]) -> Tuple[int, int]:
+        """Seeds ``memo``; returns how many conditions were looked up and found, and not found."""
+        found = missing = 0
+        for cond in conditions:
+            if cond.key not in memo:
+                bitset = self.get((cond.key, fingerprint))
+                if bitset is not None:
+                    memo[cond.key] = bitset.to_mask()
+                    found += 1
+                else:
+                    missing += 1
+        return found, missing
+
+    def save(self, fingerprint: str, conditions: Iterable[CompiledCondition], memo: Dict[Any, np.ndarray]) -> None:
+        for cond in conditions:
+            mask = memo.get(cond.key)
+            if mask is not None and (cond.key, fingerprint) not in self:
+                self.put((cond.key, fingerprint), Bitset.from_mask(mask))
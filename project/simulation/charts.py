@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import io
+import json
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .cache import LRUCache
+
+CHART_KINDS = ("bar", "pie")
+# The charts of an impact report: name, kind, report field and title.
+REPORT_CHARTS = (
+    ("industry", "bar", "breakdown_by_industry", "Industry Breakdown"),
+    ("risk_factor", "bar", "breakdown_by_risk_factor", "Risk Factor Breakdown"),
+    ("company_size", "bar", "breakdown_by_company_size", "Company Size Breakdown"),
+    ("location", "bar", "breakdown_by_location", "Location Breakdown"),
+    ("time_impact", "pie", "time_impact", "Time Impact"),
+)
+
+
+class Chart:
+    """
+    One chart to render: its ``kind`` (see ``CHART_KINDS``), ``title`` and ``data`` mapping
+    labels to values, drawn in the mapping's order. ``digest`` addresses its PNG.
+    """
+
+    __slots__ = ("kind", "title", "items", "digest")
+
+    def __init__(self, kind: str, data: Dict[Any, Any], title: str):
+        if kind not in CHART_KINDS:
+            raise ValueError(f"Unknown chart kind: {kind}")
+        self.kind = kind
+        self.title = title
+        self.items: Tuple[Tuple[Any, Any], ...] = tuple(data.items())
+        canonical = json.dumps([kind, title, self.items], default=str, separators=(",", ":"))
+        self.digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def __reduce__(self):
+        return Chart, (self.kind, dict(self.items), self.title)
+
+
+def render_png(chart: Chart) -> bytes:
+    """
+    Draws ``chart`` on its own ``Figure`` and Agg canvas. No pyplot state is involved, so
+    charts can be rendered concurrently in threads or processes. Matplotlib is imported on
+    first use, so processes that never draw a chart do not load it.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(6, 4))
+    FigureCanvasAgg(figure)
+    ax = figure.subplots()
+    labels = [label for label, _ in chart.items]
+    values = [value for _, value in chart.items]
+    if chart.kind == "bar":
+        ax.bar(labels, values, color='skyblue')
+        ax.set_ylabel("Count")
+        for label in ax.get_xticklabels():
+            label.set_rotation(45)
+            label.set_horizontalalignment("right")
+    else:
+        ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=140)
+    ax.set_title(chart.title)
+    figure.tight_layout()
+    buf = io.BytesIO()
+    figure.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def report_charts(report: Dict[str, Any]) -> Dict[str, Chart]:
+    """The ``REPORT_CHARTS`` of an impact report, by name."""
+    return {name: Chart(kind, report.get(field) or {}, title) for name, kind, field, title in REPORT_CHARTS}
+
+
+def bundle_digest(charts: Sequence[Chart]) -> str:
+    return hashlib.sha256(",".join(chart.digest for chart in charts).encode("ascii")).hexdigest()
+
+
+def zip_bundle(pngs: Dict[str, bytes]) -> bytes:
+    """
+    A zip archive holding ``<name>.png`` for each PNG. Entries are stored uncompressed with a
+    fixed timestamp, so the same PNGs always give the same bytes.
+    """
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as archive:
+        for name, png in pngs.items():
+            archive.writestr(zipfile.ZipInfo(f"{name}.png", date_time=(1980, 1, 1, 0, 0, 0)), png)
+    return buf.getvalue()
+
+
+def data_uri(png: bytes) -> str:
+    return f"data:image/png;base64,{base64.b64encode(png).decode('utf-8')}"
+
+
+class ChartRenderer:
+    """
+    Renders charts to PNG, keeping the last ``cache_bytes`` of PNGs in an LRU cache keyed by
+    ``Chart.digest``.
+
+    The charts of one ``render`` call that are not cached are drawn in parallel on a pool of
+    ``max_workers`` processes, started on first use; with fewer than two workers, or a single
+    chart to draw, they are drawn in the calling thread instead.
+    """
+
+    def __init__(self, max_workers: int, cache_bytes: int):
+        self.max_workers = max_workers
+        self.cache = LRUCache(cache_bytes)
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                # Forking a process whose other threads may hold locks is unsafe.
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def render(self, charts: Sequence[Chart]) -> List[bytes]:
+        pngs: List[Optional[bytes]] = [self.cache.get(chart.digest) for chart in charts]
+        missing: Dict[str, Chart] = {chart.digest: chart for chart, png in zip(charts, pngs) if png is None}
+        if missing:
+            rendered = dict(zip(missing, self._render_all(list(missing.values()))))
+            for digest, png in rendered.items():
+                self.cache.put(digest, png)
+            pngs = [rendered[chart.digest] if png is None else png for chart, png in zip(charts, pngs)]
+        return pngs
+
+    def _render_all(self, charts: List[Chart]) -> List[bytes]:
+        if self.max_workers < 2 or len(charts) < 2:
+            return [render_png(chart) for chart in charts]
+        try:
+            return list(self._executor().map(render_png, charts))
+        except BrokenProcessPool:
+            with self._lock:
+                self._pool = None
+            return [render_png(chart) for chart in charts]
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,112 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from typing import Any, Callable, Iterable, List, Tuple, Union
+
+from .operators import compile_operator
+
+
+def canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def canonical_conditions(conditions: dict) -> dict:
+    """The parts of a ``conditions`` block that decide which submissions match."""
+    return {
+        "logic": conditions.get('logic', 'all').lower(),
+        "conditions": [
+            {"field": cond.get('field', ''), "operator": cond.get('operator'), "value": cond.get('value')}
+            for cond in conditions.get('conditions', [])
+        ],
+    }
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    field: str
+    operator: str
+    value: Any
+    path: Tuple[str, ...]
+    test: Callable[[Any], bool] = field(repr=False, compare=False)
+    key: str = field(repr=False)
+
+    def resolve(self, submission: dict) -> Any:
+        value = submission
+        for part in self.path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+        return value
+
+    def __call__(self, submission: dict) -> bool:
+        return self.test(self.resolve(submission))
+
+
+@dataclass(frozen=True)
+class CompiledGuideline:
+    logic: str
+    conditions: Tuple[CompiledCondition, ...]
+    key: str = field(repr=False)
+
+    @cached_property
+    def digest(self) -> str:
+        return hashlib.sha256(self.key.encode("utf-8")).hexdigest()
+
+    def __call__(self, submission: dict) -> bool:
+        if not self.conditions:
+            return False
+        if self.logic == 'any':
+            return any(cond(submission) for cond in self.conditions)
+        return all(cond(submission) for cond in self.conditions)
+
+
+def compile_condition(condition: dict) -> CompiledCondition:
+    field_path = condition.get('field', '')
+    operator = condition.get('operator')
+    value = condition.get('value')
+    return CompiledCondition(
+        field=field_path,
+        operator=operator,
+        value=value,
+        path=tuple(field_path.split('.')),
+        test=compile_operator(operator, value),
+        key=canonical_json({"field": field_path, "operator": operator, "value": value}),
+    )
+
+
+@lru_cache(maxsize=1024)
+def compile_canonical(key: str) -> CompiledGuideline:
+    conditions = json.loads(key)
+    return CompiledGuideline(
+        logic=conditions["logic"],
+        conditions=tuple(compile_condition(cond) for cond in conditions["conditions"]),
+        key=key,
+    )
+
+
+def compile_conditions(conditions: dict) -> CompiledGuideline:
+    """
+    Compiles a guideline ``conditions`` block.
+
+    Results are cached by the canonical form of the block, so equal conditions coming from
+    different guideline dicts, versions or requests share one compiled predicate.
+    """
+    return compile_canonical(canonical_json(canonical_conditions(conditions)))
+
+
+def as_compiled(guideline: Union[dict, CompiledGuideline]) -> CompiledGuideline:
+    if isinstance(guideline, CompiledGuideline):
+        return guideline
+    return compile_conditions(guideline.get('conditions', {}))
+
+
+compile_cache_info = compile_canonical.cache_info
+
+
+def referenced_fields(guidelines: Iterable[Union[dict, CompiledGuideline]]) -> List[str]:
+    fields = {}
+    for guideline in guidelines:
+        for cond in as_compiled(guideline).conditions:
+            fields.setdefault(cond.field)
+    return list(fields)
@@ -0,0 +1,620 @@
+import hashlib
+import json
+import math
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .aggregation import DimensionKeys
+from .compiler import CompiledCondition, CompiledGuideline, as_compiled, compile_condition
+from .indexes import MAX_INDEX_CARDINALITY, CategoryIndex, ListIndex, SortedIndex
+from .operators import COMPARISON_OPERATORS, as_range, compile_operator, near_miss_distance, near_miss_scale
+
+# Largest integer magnitude a float64 column can hold without rounding.
+MAX_EXACT_INT = 2 ** 53
+# An indexed column answers a subset query from its full mask unless the subset is smaller
+# than 1/INDEXED_SUBSET_RATIO of the rows.
+INDEXED_SUBSET_RATIO = 8
+
+
+def is_plain_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return True
+    if isinstance(value, int):
+        return abs(value) <= MAX_EXACT_INT
+    return isinstance(value, float)
+
+
+def _is_column_number(value: Any) -> bool:
+    return not isinstance(value, bool) and is_plain_number(value)
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _value_key(value: Any):
+    # Keeps 1, 1.0 and True apart so dictionary encoding never merges distinct values.
+    return value.__class__, value
+
+
+class Column:
+    kind = "object"
+    index = None
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def to_pylist(self) -> List[Any]:
+        raise NotImplementedError
+
+    def slice(self, start: int, stop: int) -> "Column":
+        raise NotImplementedError
+
+    def take(self, positions: Sequence[int]) -> List[Any]:
+        values = self.to_pylist()
+        return [values[position] for position in positions]
+
+    def gather(self, positions: np.ndarray) -> "Column":
+        """An unindexed column holding the rows at ``positions``."""
+        return ObjectColumn(self.take(positions))
+
+    def build_index(self) -> None:
+        pass
+
+    def map_values(self, predicate: Callable[[Any], bool]) -> np.ndarray:
+        return np.fromiter((predicate(value) for value in self.to_pylist()), dtype=bool, count=len(self))
+
+    def evaluate(self, condition: CompiledCondition) -> np.ndarray:
+        return self.map_values(condition.test)
+
+    def evaluate_at(self, condition: CompiledCondition, positions: np.ndarray) -> np.ndarray:
+        """Evaluates ``condition`` for the rows at ``positions`` only."""
+        if self.index is not None and len(positions) * INDEXED_SUBSET_RATIO >= len(self):
+            return self.evaluate(condition)[positions]
+        return self.gather(positions).evaluate(condition)
+
+    def near_miss(self, condition: CompiledCondition, margin: float) -> np.ndarray:
+        """Relative distance by which each row misses ``condition``; NaN unless within ``margin``."""
+        if condition.operator not in COMPARISON_OPERATORS and condition.operator != "between":
+            return np.full(len(self), np.nan)
+        return _near_miss_values(self.to_pylist(), condition, margin)
+
+
+def _near_miss_values(values: Sequence[Any], condition: CompiledCondition, margin: float) -> np.ndarray:
+    def distance(field_value):
+        missed_by = near_miss_distance(condition.operator, field_value, condition.value)
+        return missed_by if missed_by is not None and missed_by <= margin else np.nan
+    return np.fromiter((distance(value) for value in values), dtype=np.float64, count=len(values))
+
+
+class ObjectColumn(Column):
+    def __init__(self, values: Sequence[Any]):
+        self.values = list(values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def to_pylist(self) -> List[Any]:
+        return self.values
+
+    def slice(self, start: int, stop: int) -> "ObjectColumn":
+        return ObjectColumn(self.values[start:stop])
+
+
+class NumericColumn(Column):
+    """Float64 values with a null mask; only holds ints that float64 represents exactly."""
+    kind = "numeric"
+
+    def __init__(self, values: np.ndarray, null: np.ndarray):
+        self.values = values
+        self.null = null
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def to_pylist(self) -> List[Any]:
+        return [None if is_null else value for value, is_null in zip(self.values.tolist(), self.null.tolist())]
+
+    def slice(self, start: int, stop: int) -> "NumericColumn":
+        return NumericColumn(self.values[start:stop], self.null[start:stop])
+
+    def gather(self, positions: np.ndarray) -> "NumericColumn":
+        return NumericColumn(self.values[positions], self.null[positions])
+
+    def build_index(self) -> None:
+        if self.index is None:
+            self.index = SortedIndex.build(self.values, self.null)
+
+    def _equals(self, value: Any) -> np.ndarray:
+        if value is None:
+            return self.null.copy()
+        if self.index is not None:
+            return self.index.mask(value, value)
+        return (self.values == value) & ~self.null
+
+    def _between(self, lower: Any, upper: Any, inclusive: bool) -> np.ndarray:
+        if self.index is not None:
+            return self.index.mask(lower, upper, inclusive, inclusive)
+        if inclusive:
+            return (self.values >= lower) & (self.values <= upper) & ~self.null
+        return (self.values > lower) & (self.values < upper) & ~self.null
+
+    def _compare(self, operator: str, value: Any) -> np.ndarray:
+        if self.index is None:
+            return COMPARISON_OPERATORS[operator](self.values, value) & ~self.null
+        if operator in (">=", ">"):
+            return self.index.mask(lower=value, lower_inclusive=operator == ">=")
+        return self.index.mask(upper=value, upper_inclusive=operator == "<=")
+
+    def evaluate(self, condition: CompiledCondition) -> np.ndarray:
+        operator, value = condition.operator, condition.value
+        if operator == "equals" and (value is None or is_plain_number(value)):
+            return self._equals(value)
+        if operator == "in":
+            candidates = value if isinstance(value, list) else [value]
+            if all(candidate is None or is_plain_number(candidate) for candidate in candidates):
+                mask = np.zeros(len(self), dtype=bool)
+                for candidate in candidates:
+                    mask |= self._equals(candidate)
+                return mask
+        if operator in COMPARISON_OPERATORS or operator == "between":
+            try:
+                bounds = as_range(operator, value)
+            except (TypeError, ValueError):
+                return np.zeros(len(self), dtype=bool)
+            if bounds is not None:
+                lower, upper, inclusive = bounds
+                if is_plain_number(lower) and is_plain_number(upper):
+                    return self._between(lower, upper, inclusive)
+            elif is_plain_number(value):
+                return self._compare(operator, value)
+        if operator == "contains_at_least":
+            return np.zeros(len(self), dtype=bool)
+        return super().evaluate(condition)
+
+    def _near_miss_windows(self, operator: str, value: Any, margin: float) -> List[Tuple[Any, Any]]:
+        # Inclusive value windows that contain every near miss; exact distances are checked after.
+        try:
+            bounds = as_range(operator, value)
+        except (TypeError, ValueError):
+            return []
+        if bounds is not None:
+            lower, upper, _ = bounds
+            if not (is_plain_number(lower) and is_plain_number(upper)):
+                return []
+            return [(lower - 2 * margin * near_miss_scale(lower), lower),
+                    (upper, upper + 2 * margin * near_miss_scale(upper))]
+        if operator not in COMPARISON_OPERATORS or not is_plain_number(value):
+            return []
+        width = 2 * margin * near_miss_scale(value)
+        return [(value - width, value)] if operator in (">=", ">") else [(value, value + width)]
+
+    def near_miss(self, condition: CompiledCondition, margin: float) -> np.ndarray:
+        """Relative distance by which each row misses ``condition``; NaN unless within ``margin``."""
+        distances = np.full(len(self), np.nan)
+        windows = self._near_miss_windows(condition.operator, condition.value, margin)
+        if not windows:
+            return distances
+        if self.index is not None:
+            # Range windows may overlap; a repeated position just receives the same distance twice.
+            positions = np.concatenate([self.index.span(lower, upper) for lower, upper in windows])
+        else:
+            positions = np.flatnonzero(~self.null)
+        candidate = violation_distances(self.values[positions], condition.operator, condition.value)
+        with np.errstate(invalid="ignore"):
+            near = candidate <= margin
+        distances[positions[near]] = candidate[near]
+        return distances
+
+
+def violation_distances(values: np.ndarray, operator: str, value: Any) -> np.ndarray:
+    """Vectorized ``operators.near_miss_distance``: NaN where a value passes or cannot be compared."""
+    distances = np.full(len(values), np.nan)
+    try:
+        bounds = as_range(operator, value)
+    except (TypeError, ValueError):
+        return distances
+    if bounds is not None:
+        lower, upper, inclusive = bounds
+        if not (is_plain_number(lower) and is_plain_number(upper)):
+            return distances
+        below = values < lower if inclusive else values <= lower
+        above = (values > upper if inclusive else values >= upper) & ~below
+        distances[below] = (lower - values[below]) / near_miss_scale(lower)
+        distances[above] = (values[above] - upper) / near_miss_scale(upper)
+    elif operator in COMPARISON_OPERATORS and is_plain_number(value):
+        if operator in (">=", ">"):
+            fails = values < value if operator == ">=" else values <= value
+            distances[fails] = (value - values[fails]) / near_miss_scale(value)
+        else:
+            fails = values > value if operator == "<=" else values >= value
+            distances[fails] = (values[fails] - value) / near_miss_scale(value)
+    return distances
+
+
+class CategoryColumn(Column):
+    """Dictionary-encoded hashable values; operators run once per distinct value."""
+    kind = "category"
+
+    def __init__(self, codes: np.ndarray, categories: List[Any]):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def to_pylist(self) -> List[Any]:
+        categories = self.categories
+        return [categories[code] for code in self.codes.tolist()]
+
+    def slice(self, start: int, stop: int) -> "CategoryColumn":
+        return CategoryColumn(self.codes[start:stop], self.categories)
+
+    def gather(self, positions: np.ndarray) -> "CategoryColumn":
+        return CategoryColumn(self.codes[positions], self.categories)
+
+    def take(self, positions: Sequence[int]) -> List[Any]:
+        categories = self.categories
+        return [categories[code] for code in self.codes[positions].tolist()]
+
+    def build_index(self) -> None:
+        if self.index is None and len(self.categories) <= MAX_INDEX_CARDINALITY:
+            self.index = CategoryIndex.build(self.codes, len(self.categories))
+
+    def evaluate(self, condition: CompiledCondition) -> np.ndarray:
+        if self.index is None:
+            return super().evaluate(condition)
+        matching = [code for code, value in enumerate(self.categories) if condition.test(value)]
+        return self.index.union(matching).to_mask()
+
+    def map_values(self, predicate: Callable[[Any], bool]) -> np.ndarray:
+        matches = np.fromiter((predicate(value) for value in self.categories), dtype=bool, count=len(self.categories))
+        return matches[self.codes]
+
+    def near_miss(self, condition: CompiledCondition, margin: float) -> np.ndarray:
+        if condition.operator not in COMPARISON_OPERATORS and condition.operator != "between":
+            return np.full(len(self), np.nan)
+        return _near_miss_values(self.categories, condition, margin)[self.codes]
+
+
+class ListColumn(Column):
+    """Lists of hashable items stored as offsets into a flat array of item codes."""
+    kind = "list"
+
+    def __init__(self, offsets: np.ndarray, items: np.ndarray, vocabulary: List[Any], is_list: np.ndarray):
+        self.offsets = offsets
+        self.items = items
+        self.vocabulary = vocabulary
+        self.is_list = is_list
+
+    def __len__(self) -> int:
+        return len(self.is_list)
+
+    def to_pylist(self) -> List[Any]:
+        vocabulary = self.vocabulary
+        items = self.items.tolist()
+        offsets = self.offsets.tolist()
+        return [
+            [vocabulary[code] for code in items[offsets[row]:offsets[row + 1]]] if is_list else None
+            for row, is_list in enumerate(self.is_list.tolist())
+        ]
+
+    def slice(self, start: int, stop: int) -> "ListColumn":
+        offsets = self.offsets[start:stop + 1]
+        return ListColumn(
+            offsets - offsets[0],
+            self.items[offsets[0]:offsets[-1]],
+            self.vocabulary,
+            self.is_list[start:stop],
+        )
+
+    def gather(self, positions: np.ndarray) -> "ListColumn":
+        starts = self.offsets[positions]
+        lengths = self.offsets[positions + 1] - starts
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        items = self.items[np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])]
+        return ListColumn(offsets, items, self.vocabulary, self.is_list[positions])
+
+    def build_index(self) -> None:
+        if self.index is None and len(self.vocabulary) <= MAX_INDEX_CARDINALITY:
+            self.index = ListIndex.build(self.offsets, self.items, len(self.vocabulary), self.is_list)
+
+    def near_miss(self, condition: CompiledCondition, margin: float) -> np.ndarray:
+        # Lists and missing values are never numbers, so they are never near misses.
+        return np.full(len(self), np.nan)
+
+    def rows_containing(self, item: Any) -> np.ndarray:
+        equals_item = compile_operator("equals", item)
+        codes = [code for code, candidate in enumerate(self.vocabulary) if equals_item(candidate)]
+        mask = np.zeros(len(self), dtype=bool)
+        if codes:
+            rows = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+            mask[rows[np.isin(self.items, codes)]] = True
+        return mask
+
+    def evaluate(self, condition: CompiledCondition) -> np.ndarray:
+        if condition.operator != "contains_at_least":
+            return super().evaluate(condition)
+        value = condition.value
+        try:
+            items = value.get("items", [])
+            threshold = value.get("threshold", 1)
+            if self.index is not None and is_plain_number(threshold):
+                needed = len(items) + 1 if threshold > len(items) else math.ceil(threshold)
+                return self.index.contains_at_least(self.vocabulary, items, needed).to_mask()
+            counts = np.zeros(len(self), dtype=np.int64)
+            for item in items:
+                counts += self.rows_containing(item)
+            return (counts >= threshold) & self.is_list
+        except (TypeError, ValueError, AttributeError):
+            return np.zeros(len(self), dtype=bool)
+
+
+def build_column(values: Sequence[Any]) -> Column:
+    numeric = hashable = lists = True
+    for value in values:
+        if value is None:
+            continue
+        if numeric and not _is_column_number(value):
+            numeric = False
+        if lists and not (isinstance(value, list) and all(_is_hashable(item) for item in value)):
+            lists = False
+        if hashable and not _is_hashable(value):
+            hashable = False
+        if not (numeric or lists or hashable):
+            return ObjectColumn(values)
+
+    if numeric:
+        null = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+        numbers = np.fromiter((0.0 if value is None else value for value in values), dtype=np.float64, count=len(values))
+        numbers[null] = np.nan
+        return NumericColumn(numbers, null)
+
+    if lists:
+        vocabulary, index = [], {}
+        offsets, items = [0], []
+        for value in values:
+            for item in value or ():
+                key = _value_key(item)
+                code = index.get(key)
+                if code is None:
+                    code = index[key] = len(vocabulary)
+                    vocabulary.append(item)
+                items.append(code)
+            offsets.append(len(items))
+        return ListColumn(
+            np.array(offsets, dtype=np.int64),
+            np.array(items, dtype=np.int32),
+            vocabulary,
+            np.fromiter((isinstance(value, list) for value in values), dtype=bool, count=len(values)),
+        )
+
+    categories, index, codes = [], {}, []
+    for value in values:
+        key = _value_key(value)
+        code = index.get(key)
+        if code is None:
+            code = index[key] = len(categories)
+            categories.append(value)
+        codes.append(code)
+    return CategoryColumn(np.array(codes, dtype=np.int32), categories)
+
+
+def extract_field(submissions: Sequence[dict], field_path: str) -> List[Any]:
+    parts = field_path.split('.')
+    values = []
+    for submission in submissions:
+        value = submission
+        for part in parts:
+            if isinstance(value, dict):
+                value = value.get(part)
+            else:
+                value = None
+                break
+        values.append(value)
+    return values
+
+
+class ColumnarDataset:
+    """
+    Column-oriented view over a list of submissions.
+
+    Each dotted field path is extracted and typed once, on first use, and reused by every
+    condition that references it. ``submissions`` may also be a ``store.SubmissionStore``,
+    whose ``column`` supplies fields from its arrays instead. ``version`` identifies the data
+    source (e.g. a file revision); without it the fingerprint is a hash of the submissions
+    themselves.
+    """
+
+    def __init__(self, submissions: Sequence[dict], version: Optional[str] = None):
+        self.submissions = submissions
+        self.version = version
+        self._columns: Dict[str, Column] = {}
+
+    def __len__(self) -> int:
+        return len(self.submissions)
+
+    @cached_property
+    def fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        if self.version is not None:
+            digest.update(f"version:{self.version}".encode("utf-8"))
+        else:
+            for submission in self.submissions:
+                digest.update(json.dumps(submission, sort_keys=True, default=str).encode("utf-8"))
+                digest.update(b"\n")
+        return digest.hexdigest()
+
+    def slice(self, start: int, stop: int) -> "ColumnarDataset":
+        """A dataset over ``submissions[start:stop]`` sharing the columns built so far."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        part = ColumnarDataset(self.submissions[start:stop], version=f"{self.fingerprint}[{start}:{stop}]")
+        part._columns = {field_path: column.slice(start, stop) for field_path, column in self._columns.items()}
+        if "dimensions" in self.__dict__:
+            part.dimensions = self.dimensions.slice(start, stop)
+        return part
+
+    @cached_property
+    def dimensions(self) -> DimensionKeys:
+        return DimensionKeys.from_submissions(self.submissions)
+
+    def build_indexes(self, field_paths: Sequence[str]) -> None:
+        """Builds inverted indexes for the given fields; scans are used for the rest."""
+        for field_path in field_paths:
+            self.column(field_path).build_index()
+
+    def column(self, field_path: str) -> Column:
+        column = self._columns.get(field_path)
+        if column is None:
+            stored = getattr(self.submissions, "column", None)
+            column = stored(field_path) if stored is not None else None
+            if column is None:
+                column = build_column(extract_field(self.submissions, field_path))
+            self._columns[field_path] = column
+        return column
+
+
+def as_dataset(submissions) -> ColumnarDataset:
+    if isinstance(submissions, ColumnarDataset):
+        return submissions
+    return ColumnarDataset(submissions)
+
+
+def _memoized(memo: Optional[Dict[Any, np.ndarray]], key: Any, compute: Callable[[], np.ndarray]) -> np.ndarray:
+    if memo is None:
+        return compute()
+    result = memo.get(key)
+    if result is None:
+        result = memo[key] = compute()
+    return result
+
+
+def condition_mask(dataset: ColumnarDataset, condition: Union[dict, CompiledCondition],
+                   memo: Optional[Dict[Any, np.ndarray]] = None) -> np.ndarray:
+    """
+    Evaluates one condition over every submission.
+
+    ``memo`` shares results between calls over the same dataset: conditions with the same
+    canonical key are evaluated once. Memoized masks are shared, so callers must not modify them.
+    """
+    if not isinstance(condition, CompiledCondition):
+        condition = compile_condition(condition)
+    return _memoized(memo, condition.key, lambda: dataset.column(condition.field).evaluate(condition))
+
+
+def condition_mask_at(dataset: ColumnarDataset, condition: CompiledCondition, positions: np.ndarray,
+                      memo: Optional[Dict[Any, np.ndarray]] = None) -> np.ndarray:
+    """``condition_mask(...)[positions]``, reading the memo but only evaluating ``positions``."""
+    if memo is not None and condition.key in memo:
+        return memo[condition.key][positions]
+    return dataset.column(condition.field).evaluate_at(condition, positions)
+
+
+def guideline_mask(dataset: ColumnarDataset, guideline: Union[dict, CompiledGuideline],
+                   memo: Optional[Dict[Any, np.ndarray]] = None) -> np.ndarray:
+    """
+    Evaluates a guideline over every submission.
+
+    With a ``memo`` the guideline's own result is shared as well, so a result computed some
+    other way (e.g. incrementally from a baseline) can be seeded under ``compiled.key``.
+    """
+    compiled = as_compiled(guideline)
+    if not compiled.conditions:
+        return np.zeros(len(dataset), dtype=bool)
+
+    def evaluate() -> np.ndarray:
+        masks = [condition_mask(dataset, cond, memo) for cond in compiled.conditions]
+        if compiled.logic == 'any':
+            return np.logical_or.reduce(masks)
+        return np.logical_and.reduce(masks)
+    return _memoized(memo, compiled.key, evaluate)
+
+
+def delta_mask(dataset: ColumnarDataset, baseline: CompiledGuideline, baseline_results: np.ndarray,
+               modified: CompiledGuideline, memo: Optional[Dict[Any, np.ndarray]] = None) -> Optional[np.ndarray]:
+    """
+    ``guideline_mask(dataset, modified)`` derived from the result of ``baseline``, or ``None``
+    when the two do not share their logic and at least one condition.
+
+    Conditions are matched by canonical key. Shared conditions come from ``memo`` where possible
+    and are only needed when ``modified`` drops some of the baseline's conditions. Conditions
+    new in ``modified`` are evaluated only for the rows they can still flip: under ``all`` the
+    rows that pass everything else so far, under ``any`` the rows that fail it.
+    """
+    if baseline.logic != modified.logic or not baseline.conditions or not modified.conditions:
+        return None
+    baseline_keys = {cond.key for cond in baseline.conditions}
+    shared = {cond.key: cond for cond in modified.conditions if cond.key in baseline_keys}
+    added = {cond.key: cond for cond in modified.conditions if cond.key not in baseline_keys}
+    if not shared:
+        return None
+
+    any_logic = modified.logic == 'any'
+    if len(shared) == len(baseline_keys):
+        result = baseline_results.copy()
+    else:
+        masks = [condition_mask(dataset, cond, memo) for cond in shared.values()]
+        result = np.logical_or.reduce(masks) if any_logic else np.logical_and.reduce(masks)
+
+    undecided = np.flatnonzero(~result if any_logic else result)
+    for cond in added.values():
+        passed = condition_mask_at(dataset, cond, undecided, memo)
+        if any_logic:
+            result[undecided[passed]] = True
+            undecided = undecided[~passed]
+        else:
+            result[undecided[~passed]] = False
+            undecided = undecided[passed]
+    return result
+
+
+def near_miss_distances(dataset: ColumnarDataset, guideline: Union[dict, CompiledGuideline],
+                        margin: float = 0.1, matched: Optional[np.ndarray] = None,
+                        memo: Optional[Dict[Any, np.ndarray]] = None) -> np.ndarray:
+    """
+    Ranks the submissions that ``guideline`` misses but would match with comparison bounds
+    relaxed by ``margin`` (relative to each bound).
+
+    Returns the relative distance to matching per submission, NaN for everything else. Under
+    ``any`` logic one near condition suffices (distance: the smallest); under ``all`` every
+    condition must pass or be near (distance: the largest).
+    """
+    compiled = as_compiled(guideline)
+    distances = np.full(len(dataset), np.nan)
+    if not compiled.conditions:
+        return distances
+    if matched is None:
+        matched = guideline_mask(dataset, compiled, memo)
+
+    per_condition = [
+        _memoized(memo, ("near_miss", cond.key, margin),
+                  lambda cond=cond: dataset.column(cond.field).near_miss(cond, margin))
+        for cond in compiled.conditions
+    ]
+    near = [~np.isnan(missed_by) for missed_by in per_condition]
+    if compiled.logic == 'any':
+        candidates = np.logical_or.reduce(near) & ~matched
+        if candidates.any():
+            distances[candidates] = np.nanmin(np.stack(per_condition)[:, candidates], axis=0)
+        return distances
+
+    # An unmatched row fails some condition, so it needs a near one. Each condition is then
+    # only evaluated for the rows that every earlier one passes or nearly passes.
+    candidates = np.logical_or.reduce(near) & ~matched
+    for cond, is_near in zip(compiled.conditions, near):
+        pending = np.flatnonzero(candidates & ~is_near)
+        candidates[pending] = condition_mask_at(dataset, cond, pending, memo)
+    if candidates.any():
+        distances[candidates] = np.nanmax(np.stack(per_condition)[:, candidates], axis=0)
+    return distances
+
+
+def near_miss_mask(dataset: ColumnarDataset, guideline: Union[dict, CompiledGuideline],
+                   margin: float = 0.1) -> np.ndarray:
+    return ~np.isnan(near_miss_distances(dataset, guideline, margin))
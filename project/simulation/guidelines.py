@@ -0,0 +1,48 @@
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+from .utils import file_version
+
+GUIDELINES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'guidelines.json')
+
+# The guidelines simulations compare against, loaded by ``SimulationConfig.ready()``. Views
+# add guidelines to it in place, so modules may hold on to the list itself.
+GUIDELINES_DATA: List[dict] = []
+
+# Identifies the contents of GUIDELINES_DATA: the revision of the file they were loaded from
+# (or a hash of them), chained with a hash of each guideline added since.
+_VERSION: Optional[str] = None
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def load_guidelines(path: str = GUIDELINES_PATH) -> List[dict]:
+    """Replaces the contents of ``GUIDELINES_DATA`` with the guidelines in ``path``."""
+    with open(path, 'r') as f:
+        guidelines = json.load(f)
+    if not isinstance(guidelines, list):
+        raise ValueError(f"{path} does not contain a list of guidelines.")
+    return replace_guidelines(guidelines, file_version(path))
+
+
+def replace_guidelines(guidelines: List[dict], version: Optional[str] = None) -> List[dict]:
+    """Replaces the contents of ``GUIDELINES_DATA``, identified by ``version`` or by their content."""
+    global _VERSION
+    GUIDELINES_DATA[:] = guidelines
+    _VERSION = version or _digest(guidelines)
+    return GUIDELINES_DATA
+
+
+def add_guideline(guideline: dict) -> None:
+    global _VERSION
+    GUIDELINES_DATA.append(guideline)
+    _VERSION = _digest(_VERSION, guideline)
+
+
+def guidelines_version() -> str:
+    """A version of the current guidelines for ``ColumnarDataset``: equal versions, equal guidelines."""
+    return f"guidelines:{_VERSION}:{len(GUIDELINES_DATA)}"
@@ -0,0 +1,97 @@
+from typing import Any, List, Sequence
+
+import numpy as np
+
+from .bitsets import Bitset, at_least
+from .operators import compile_operator
+
+# Columns with more distinct values than this are scanned instead of indexed.
+MAX_INDEX_CARDINALITY = 256
+
+
+def _postings(codes: np.ndarray, rows: np.ndarray, cardinality: int, length: int) -> List[Bitset]:
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=cardinality))))
+    sorted_rows = rows[order]
+    return [
+        Bitset.from_positions(sorted_rows[bounds[code]:bounds[code + 1]], length)
+        for code in range(cardinality)
+    ]
+
+
+class CategoryIndex:
+    """One bitset of submission positions per distinct value of a dictionary-encoded column."""
+
+    def __init__(self, postings: List[Bitset], length: int):
+        self.postings = postings
+        self.length = length
+
+    @classmethod
+    def build(cls, codes: np.ndarray, cardinality: int) -> "CategoryIndex":
+        return cls(_postings(codes, np.arange(len(codes)), cardinality, len(codes)), len(codes))
+
+    def union(self, codes: Sequence[int]) -> Bitset:
+        result = Bitset.zeros(self.length)
+        for code in codes:
+            result = result | self.postings[code]
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return sum(posting.nbytes for posting in self.postings)
+
+
+class ListIndex(CategoryIndex):
+    """One bitset per list item, marking the submissions whose list contains it."""
+
+    def __init__(self, postings: List[Bitset], length: int, lists: Bitset):
+        super().__init__(postings, length)
+        self.lists = lists
+
+    @classmethod
+    def build(cls, offsets: np.ndarray, items: np.ndarray, vocabulary_size: int, is_list: np.ndarray) -> "ListIndex":
+        length = len(is_list)
+        rows = np.repeat(np.arange(length), np.diff(offsets))
+        return cls(_postings(items, rows, vocabulary_size, length), length, Bitset.from_mask(is_list))
+
+    def contains_at_least(self, vocabulary: Sequence[Any], items: Sequence[Any], threshold: Any) -> Bitset:
+        weighted = []
+        for item in items:
+            equals_item = compile_operator("equals", item)
+            weighted.append((self.union([code for code, value in enumerate(vocabulary) if equals_item(value)]), 1))
+        return at_least(weighted, threshold, self.lists)
+
+
+class SortedIndex:
+    """Positions of a numeric column's comparable values, ordered by value."""
+
+    def __init__(self, order: np.ndarray, sorted_values: np.ndarray, length: int):
+        self.order = order
+        self.sorted_values = sorted_values
+        self.length = length
+
+    @classmethod
+    def build(cls, values: np.ndarray, null: np.ndarray) -> "SortedIndex":
+        positions = np.flatnonzero(~null & ~np.isnan(values))
+        order = positions[np.argsort(values[positions], kind="stable")]
+        return cls(order, values[order], len(values))
+
+    def span(self, lower: Any = None, upper: Any = None,
+             lower_inclusive: bool = True, upper_inclusive: bool = True) -> np.ndarray:
+        """Positions whose value lies between the bounds (``None`` leaves a side open)."""
+        start = 0
+        stop = len(self.order)
+        if lower is not None:
+            start = int(np.searchsorted(self.sorted_values, lower, side="left" if lower_inclusive else "right"))
+        if upper is not None:
+            stop = int(np.searchsorted(self.sorted_values, upper, side="right" if upper_inclusive else "left"))
+        return self.order[start:max(start, stop)]
+
+    def mask(self, *args, **kwargs) -> np.ndarray:
+        mask = np.zeros(self.length, dtype=bool)
+        mask[self.span(*args, **kwargs)] = True
+        return mask
+
+    @property
+    def nbytes(self) -> int:
+        return self.order.nbytes + self.sorted_values.nbytes
@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Timings:
+    """Durations of the stages of one request, and counts of what it processed."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def server_timing(self) -> str:
+        """A ``Server-Timing`` header value: stage durations in milliseconds, then the counts."""
+        metrics = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in self.durations.items()]
+        metrics += [f'{name};desc="{amount}"' for name, amount in self.counts.items()]
+        return ", ".join(metrics)
+
+
+_CURRENT: ContextVar[Optional[Timings]] = ContextVar("simulation_timings", default=None)
+
+
+@contextmanager
+def recording() -> Iterator[Timings]:
+    """
+    Collects the ``stage`` durations and ``count`` calls made in this context (and not in
+    threads or processes it hands work to) into a new ``Timings``.
+    """
+    timings = Timings()
+    token = _CURRENT.set(timings)
+    try:
+        yield timings
+    finally:
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Adds the duration of the block to stage ``name`` of the current recording, if any."""
+    timings = _CURRENT.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def count(name: str, amount: int = 1) -> None:
+    timings = _CURRENT.get()
+    if timings is not None:
+        timings.count(name, amount)
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped))
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, buckets: Tuple[float, ...], value: float) -> None:
+        self.counts[bisect.bisect_left(buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """
+    Request metrics of this process: latency histograms per endpoint, method and status,
+    stage duration histograms per endpoint and totals of the counts requests recorded.
+    ``render`` writes them in the Prometheus text exposition format.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._requests: Dict[Tuple[Tuple[str, str], ...], _Histogram] = {}
+        self._stages: Dict[Tuple[Tuple[str, str], ...], _Histogram] = {}
+        self._counts: Dict[str, Dict[Tuple[Tuple[str, str], ...], int]] = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, histograms: Dict, labels: Tuple[Tuple[str, str], ...], value: float) -> None:
+        histogram = histograms.get(labels)
+        if histogram is None:
+            histogram = histograms[labels] = _Histogram(self.buckets)
+        histogram.observe(self.buckets, value)
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float, timings: Timings) -> None:
+        with self._lock:
+            self._observe(self._requests, (("endpoint", endpoint), ("method", method), ("status", str(status))),
+                          seconds)
+            for name, duration in timings.durations.items():
+                self._observe(self._stages, (("endpoint", endpoint), ("stage", name)), duration)
+            for name, amount in timings.counts.items():
+                totals = self._counts.setdefault(name, {})
+                totals[(("endpoint", endpoint),)] = totals.get((("endpoint", endpoint),), 0) + amount
+
+    def _histogram_lines(self, name: str, help_text: str, histograms: Dict) -> List[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, observed in zip(self.buckets + (float("inf"),), histogram.counts):
+                cumulative += observed
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{{{_labels(labels + (('le', le),))}}} {cumulative}")
+            lines.append(f"{name}_sum{{{_labels(labels)}}} {histogram.sum!r}")
+            lines.append(f"{name}_count{{{_labels(labels)}}} {cumulative}")
+        return lines
+
+    def render(self, extra: Optional[List[str]] = None) -> str:
+        with self._lock:
+            lines = self._histogram_lines("simulation_request_duration_seconds",
+                                          "Time to handle a request, by endpoint, method and status.", self._requests)
+            lines += self._histogram_lines("simulation_stage_duration_seconds",
+                                           "Time a request spent in each stage, by endpoint.", self._stages)
+            for name, totals in sorted(self._counts.items()):
+                metric = f"simulation_{name}_total"
+                lines += [f"# HELP {metric} Total {name.replace('_', ' ')} recorded by requests, by endpoint.",
+                          f"# TYPE {metric} counter"]
+                lines += [f"{metric}{{{_labels(labels)}}} {total}" for labels, total in sorted(totals.items())]
+        return "\n".join(lines + (extra or [])) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._stages.clear()
+            self._counts.clear()
+
+
+METRICS = MetricsRegistry()
+
+_CACHE_METRICS = (
+    ("entries", "gauge", "Entries held by each cache."),
+    ("bytes", "gauge", "Bytes held by each cache."),
+    ("hits", "counter", "Lookups each cache answered."),
+    ("misses", "counter", "Lookups each cache could not answer."),
+    ("evictions", "counter", "Entries each cache evicted."),
+)
+
+
+def cache_metrics(stats: Dict[str, Dict[str, Any]]) -> List[str]:
+    """The sizes and hit counts of ``services.cache_stats()`` in the Prometheus text format."""
+    lines = []
+    for key, kind, help_text in _CACHE_METRICS:
+        metric = f"simulation_cache_{key}" + ("_total" if kind == "counter" else "")
+        values = [(name, cache[key]) for name, cache in sorted(stats.items()) if key in cache]
+        if values:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f"{metric}{{{_labels((('cache', name),))}}} {value}" for name, value in values]
+    return lines
@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's task by ``SimulationJob.advance`` once the job is cancelled."""
+
+
+class SimulationJob:
+    """
+    State of one background simulation. Its task reports progress with ``advance``, which is
+    also where a cancellation takes effect.
+    """
+
+    def __init__(self, total_rows: int, key: Optional[Hashable] = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.total_rows = total_rows
+        self.processed_rows = 0
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._cancelled = threading.Event()
+
+    def advance(self, processed_rows: int) -> None:
+        self.processed_rows = processed_rows
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Remaining time extrapolated from the rows processed so far; ``None`` until known."""
+        if self.status == "completed":
+            return 0.0
+        if self.status != "running" or not self.processed_rows:
+            return None
+        remaining = max(self.total_rows - self.processed_rows, 0)
+        return self.elapsed_seconds * remaining / self.processed_rows
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload = {
+            "id": self.id,
+            "status": self.status,
+            "total_rows": self.total_rows,
+            "processed_rows": self.processed_rows,
+            "progress": self.processed_rows / self.total_rows if self.total_rows else float(self.status == "completed"),
+            "elapsed_seconds": self.elapsed_seconds,
+            "eta_seconds": self.eta_seconds,
+        }
+        if self.status == "completed":
+            payload["result"] = self.result
+        if self.status == "failed":
+            payload["error"] = self.error
+        return payload
+
+
+class JobManager:
+    """
+    Runs simulation tasks on a pool of ``max_workers`` daemon threads in this process, so no
+    broker is needed; jobs are lost when the process exits.
+
+    The last ``max_jobs`` jobs stay queryable. Results of jobs submitted with a ``key`` are
+    kept in an LRU store of ``max_results`` entries: submitting a key whose result is stored
+    returns a completed job at once, and submitting a key that is already queued or running
+    returns that job.
+    """
+
+    def __init__(self, max_workers: int, max_jobs: int, max_results: int):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.max_results = max_results
+        self._jobs: "OrderedDict[str, SimulationJob]" = OrderedDict()
+        self._results: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def submit(self, task: Callable[[SimulationJob], Any], total_rows: int,
+               key: Optional[Hashable] = None) -> SimulationJob:
+        """Queues ``task(job)``; its return value becomes the job's result."""
+        with self._lock:
+            if key is not None:
+                if key in self._results:
+                    self.hits += 1
+                    self._results.move_to_end(key)
+                    job = SimulationJob(total_rows, key)
+                    job.status, job.processed_rows, job.result = "completed", total_rows, self._results[key]
+                    job.started = job.finished = time.monotonic()
+                    self._add(job)
+                    return job
+                for job in self._jobs.values():
+                    if job.key == key and job.status in ("queued", "running"):
+                        return job
+                self.misses += 1
+            job = SimulationJob(total_rows, key)
+            self._add(job)
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"simulation-job-{len(self._workers)}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        self._queue.put((job, task))
+        return job
+
+    def get(self, job_id: str) -> Optional[SimulationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[SimulationJob]:
+        """Cancels a queued job at once and a running one at its next progress report."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATUSES:
+                return job
+            job._cancelled.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+            return job
+
+    def _add(self, job: SimulationJob) -> None:
+        self._jobs[job.id] = job
+        if len(self._jobs) > self.max_jobs:
+            for job_id, old in list(self._jobs.items()):
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                if old.status in FINISHED_STATUSES:
+                    del self._jobs[job_id]
+
+    def _work(self) -> None:
+        while True:
+            job, task = self._queue.get()
+            with self._lock:
+                if job.status != "queued":
+                    continue
+                job.status, job.started = "running", time.monotonic()
+            try:
+                result = task(job)
+            except JobCancelled:
+                status, result, error = "cancelled", None, None
+            except Exception as e:
+                status, result, error = "failed", None, str(e) or type(e).__name__
+            else:
+                status, error = "completed", None
+            with self._lock:
+                job.result, job.error, job.finished = result, error, time.monotonic()
+                job.status = status
+                if status == "completed" and job.key is not None:
+                    self._results[job.key] = result
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            statuses = {status: 0 for status in JOB_STATUSES}
+            for job in self._jobs.values():
+                statuses[job.status] += 1
+            return {
+                "jobs": statuses,
+                "results": len(self._results),
+                "max_results": self.max_results,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
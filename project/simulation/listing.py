@@ -0,0 +1,153 @@
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+
+from .compiler import compile_conditions
+from .engine import ColumnarDataset, guideline_mask
+from .serializers import GuidelineConditionsSerializer
+
+_MISSING = object()
+
+
+class ListingError(ValueError):
+    """A listing request with an invalid cursor, projection or filter."""
+
+
+class SerializedListing:
+    """
+    A full listing encoded once: its JSON ``body``, the gzip of it and a strong ``etag``.
+    Gzip output has no timestamp, so the same listing always compresses to the same bytes.
+    """
+
+    def __init__(self, rows: Sequence[Any]):
+        self.body = JSONRenderer().render(rows)
+        self.gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        self.etag = hashlib.sha256(self.body).hexdigest()
+
+
+_SERIALIZED: Dict[str, Tuple[str, SerializedListing]] = {}
+_SERIALIZED_LOCK = threading.Lock()
+
+
+def serialized_listing(name: str, dataset: ColumnarDataset) -> SerializedListing:
+    """
+    The encoded listing of every row of ``dataset``, kept for its latest version under
+    ``name`` and re-encoded only when the dataset fingerprint changes.
+    """
+    fingerprint = dataset.fingerprint
+    cached = _SERIALIZED.get(name)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+    # One encoding at a time: concurrent requests for a new version wait for it instead of
+    # encoding it again.
+    with _SERIALIZED_LOCK:
+        cached = _SERIALIZED.get(name)
+        if cached is None or cached[0] != fingerprint:
+            rows = dataset.submissions
+            cached = _SERIALIZED[name] = (fingerprint, SerializedListing(
+                rows.to_dicts() if hasattr(rows, "to_dicts") else list(rows)))
+        return cached[1]
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[List[str]]]:
+    """The dotted paths of a comma-separated ``fields`` parameter, or ``None`` for all fields."""
+    if value is None:
+        return None
+    paths = [path.strip() for path in value.split(",") if path.strip()]
+    if not paths:
+        raise ListingError("fields must name at least one field.")
+    return [path.split(".") for path in paths]
+
+
+def project(record: Any, paths: List[List[str]]) -> Dict[str, Any]:
+    """
+    The parts of ``record`` at ``paths``, nested as in the record; paths it does not have
+    are left out.
+    """
+    projected: Dict[str, Any] = {}
+    for path in paths:
+        value = record
+        for key in path:
+            value = value.get(key, _MISSING) if isinstance(value, dict) else _MISSING
+            if value is _MISSING:
+                break
+        if value is _MISSING:
+            continue
+        target = projected
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+            if not isinstance(target, dict):
+                break
+        else:
+            target[path[-1]] = value
+    return projected
+
+
+def parse_filter(value: Optional[str]):
+    """
+    The compiled conditions of a ``filter`` parameter: a guideline ``conditions`` block as
+    JSON, or a single condition, or a list of conditions that must all hold. ``None`` when
+    there is nothing to filter on.
+    """
+    if value is None:
+        return None
+    try:
+        conditions = json.loads(value)
+    except ValueError:
+        raise ListingError("filter must be JSON.")
+    if isinstance(conditions, list):
+        conditions = {"logic": "all", "conditions": conditions}
+    elif isinstance(conditions, dict) and "conditions" not in conditions:
+        conditions = {"logic": "all", "conditions": [conditions]}
+    serializer = GuidelineConditionsSerializer(data=conditions)
+    if not serializer.is_valid():
+        raise ListingError(f"Invalid filter: {json.dumps(serializer.errors)}")
+    compiled = compile_conditions(conditions)
+    return compiled if compiled.conditions else None
+
+
+def encode_cursor(fingerprint: str, position: int) -> str:
+    return base64.urlsafe_b64encode(f"{fingerprint}:{position}".encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> int:
+    """The row position a cursor continues from; cursors of another dataset version are refused."""
+    try:
+        version, position = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").rsplit(":", 1)
+        position = int(position)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ListingError("Invalid cursor.")
+    if version != fingerprint:
+        raise ListingError("The cursor belongs to a previous version of the data; start again without it.")
+    return max(position, 0)
+
+
+def list_rows(dataset: ColumnarDataset, fields: Optional[List[List[str]]] = None, conditions=None,
+              limit: Optional[int] = None, start: int = 0) -> Tuple[List[Any], int, Optional[int]]:
+    """
+    The rows of ``dataset`` from position ``start`` that match ``conditions`` (all of them
+    without), at most ``limit`` of them, projected to ``fields``. Returns the rows, the number
+    of matching rows in the whole dataset and the position the next page starts from, if any.
+    """
+    if conditions is None:
+        positions = np.arange(len(dataset))
+    else:
+        positions = np.flatnonzero(guideline_mask(dataset, conditions))
+    count = len(positions)
+    positions = positions[np.searchsorted(positions, start):]
+    following = None
+    if limit is not None and len(positions) > limit:
+        following = int(positions[limit])
+        positions = positions[:limit]
+    rows = dataset.submissions
+    page = [rows[position] for position in positions.tolist()]
+    if fields is not None:
+        page = [project(row, fields) for row in page]
+    return page, count, following
@@ -0,0 +1,146 @@
+import gzip
+import io
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+from .store import SubmissionStore
+
+READ_SIZE = 1 << 20
+PROGRESS_INTERVAL = 100_000
+GZIP_MAGIC = b"\x1f\x8b"
+
+_WHITESPACE = re.compile(r"\s*")
+# A decoding error this close to the end of the buffer may be a value cut short by the
+# chunk boundary (``tru``, ``-Infinit``, ``\\u00e``) rather than a malformed one.
+_TRUNCATION_WINDOW = 8
+
+
+def _truncated(error: json.JSONDecodeError) -> bool:
+    # A string cut short is reported where it starts; it ends at the next quote in the input.
+    return len(error.doc) - error.pos <= _TRUNCATION_WINDOW or error.msg == "Unterminated string starting at"
+
+
+@dataclass(frozen=True)
+class LoadProgress:
+    records: int
+    bytes_read: int
+    total_bytes: int
+    seconds: float
+
+    @property
+    def fraction(self) -> float:
+        return self.bytes_read / self.total_bytes if self.total_bytes else 1.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes_read / self.seconds / 1e6 if self.seconds else 0.0
+
+
+def _text_stream(file: io.BufferedReader) -> io.TextIOWrapper:
+    # Gzip is recognised by its magic bytes rather than by the file name.
+    if file.peek(2)[:2] == GZIP_MAGIC:
+        file = gzip.GzipFile(fileobj=file)
+    return io.TextIOWrapper(file, encoding="utf-8-sig")
+
+
+def iter_json_records(file: io.BufferedReader, read_size: int = READ_SIZE) -> Iterator[Any]:
+    """
+    Yields the records of a JSON array, or of JSON Lines, one at a time, reading the buffered
+    binary ``file`` in chunks of about ``read_size`` characters; gzip input is decompressed on
+    the fly. ``file`` is left open.
+
+    JSON Lines are read as whitespace-separated JSON values, so pretty-printed records work too.
+    Raises ``ValueError`` (``json.JSONDecodeError`` for bad values, naming the record) on
+    malformed input, without reading past the chunk that holds it.
+    """
+    stream = _text_stream(file)
+    decoder = json.JSONDecoder()
+
+    def read_more(buffer: str, position: int):
+        chunk = stream.read(max(read_size, len(buffer) - position))
+        return buffer[position:] + chunk, 0, not chunk
+
+    try:
+        buffer, position, eof = read_more("", 0)
+        state = "start"
+        records = 0
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                if not eof:
+                    buffer, position, eof = read_more(buffer, position)
+                    continue
+                if state in ("start", "lines"):
+                    return
+                raise ValueError("Unexpected end of JSON array.")
+
+            char = buffer[position]
+            if state == "start":
+                state = "first" if char == "[" else "lines"
+                position += char == "["
+            elif state == "first" and char == "]":
+                return
+            elif state == "separator":
+                if char == "]":
+                    return
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' in JSON array, found {char!r}.")
+                state, position = "value", position + 1
+            else:
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as e:
+                    if eof or not _truncated(e):
+                        raise json.JSONDecodeError(f"Malformed record {records + 1}: {e.msg}", e.doc, e.pos) from None
+                    end = len(buffer)
+                # A value that reaches the end of the buffer may continue in the next chunk (even a
+                # number), so it is parsed again once more input is read.
+                if end == len(buffer) and not eof:
+                    buffer, position, eof = read_more(buffer, position)
+                    continue
+                yield record
+                records += 1
+                position = end
+                if state != "lines":
+                    state = "separator"
+    finally:
+        stream.detach()
+
+
+def load_submission_store(path: str,
+                          progress: Optional[Callable[[LoadProgress], None]] = None,
+                          progress_interval: int = PROGRESS_INTERVAL) -> SubmissionStore:
+    """
+    Streams a submissions file (JSON array or JSON Lines, optionally gzipped) into a
+    ``SubmissionStore``. Memory stays bounded by the store plus one read chunk.
+
+    ``progress`` is called every ``progress_interval`` records and once at the end.
+    """
+    with open(path, "rb") as file:
+        total_bytes = os.fstat(file.fileno()).st_size
+        started = time.perf_counter()
+        count = 0
+
+        def report() -> None:
+            progress(LoadProgress(count, file.tell(), total_bytes, time.perf_counter() - started))
+
+        def records() -> Iterator[Any]:
+            nonlocal count
+            for record in iter_json_records(file):
+                yield record
+                count += 1
+                if progress is not None and count % progress_interval == 0:
+                    report()
+
+        store = SubmissionStore.from_records(records())
+        if progress is not None:
+            report()
+    return store
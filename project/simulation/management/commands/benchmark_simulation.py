@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simulation.benchmarks import BENCHMARK_GROUPS, BenchmarkRun, compare
+
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower().replace("_", "")
+    multiplier = SUFFIXES.get(value[-1:], 1)
+    try:
+        size = int(value[:-1] if multiplier > 1 else value) * multiplier
+    except ValueError:
+        raise CommandError(f"Invalid dataset size: {value}")
+    if size < 1:
+        raise CommandError("Dataset sizes must be positive.")
+    return size
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks condition evaluation, impact analysis, chart rendering and the HTTP endpoints "
+            "over synthetic datasets, and writes the timings as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1K,10K,100K",
+                            help="Comma-separated dataset sizes, with optional K/M suffixes, e.g. 1K,1M,10M.")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data.")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs of each benchmark.")
+        parser.add_argument("--only", default=",".join(BENCHMARK_GROUPS),
+                            help=f"Comma-separated benchmark groups to run, of {', '.join(BENCHMARK_GROUPS)}.")
+        parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "simulation-benchmarks"),
+                            help="Where generated datasets are written and reused from.")
+        parser.add_argument("--output", help="Write the results to this file instead of standard output.")
+        parser.add_argument("--compare", help="Results of an earlier run to compare against.")
+
+    def handle(self, *args, **options):
+        sizes = [parse_size(size) for size in options["sizes"].split(",") if size.strip()]
+        groups = [group.strip() for group in options["only"].split(",") if group.strip()]
+        unknown = set(groups) - set(BENCHMARK_GROUPS)
+        if unknown:
+            raise CommandError(f"Unknown benchmark groups: {', '.join(sorted(unknown))}")
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as file:
+                    baseline = json.load(file)["results"]
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Could not read the results to compare against: {e}")
+
+        run = BenchmarkRun(options["data_dir"], seed=options["seed"], repeat=options["repeat"], groups=groups,
+                           log=self.stderr.write)
+        try:
+            results = run.run(sizes)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        if baseline is not None:
+            results["comparison"] = compare(results["results"], baseline)
+            for change in results["comparison"]:
+                self.stderr.write(f"{change['name']} over {change['rows']:,} rows: {change['ratio']:.2f}x the baseline")
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Wrote {len(results['results'])} results to {options['output']}"))
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from simulation.engine import ColumnarDataset
+from simulation.loader import LoadProgress, load_submission_store
+from simulation.snapshot import write_snapshot
+from simulation.utils import file_version
+
+
+class Command(BaseCommand):
+    help = "Compiles the submissions file into the binary snapshot mapped by the simulation workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=str(settings.SIMULATION_SUBMISSIONS_PATH),
+                            help="Submissions file: a JSON array or JSON Lines, optionally gzipped.")
+        parser.add_argument("--output", default=str(settings.SIMULATION_SNAPSHOT_PATH),
+                            help="Snapshot path; an existing snapshot is replaced atomically.")
+
+    def handle(self, *args, **options):
+        source, output = options["source"], options["output"]
+
+        def report(progress: LoadProgress) -> None:
+            self.stdout.write(
+                f"{progress.records:,} submissions, {progress.fraction:.0%} of {source} "
+                f"({progress.records_per_second:,.0f} submissions/s, {progress.megabytes_per_second:.1f} MB/s)"
+            )
+
+        # Taken before reading, so a file changed mid-build never matches the snapshot.
+        version = file_version(source)
+        try:
+            store = load_submission_store(source, progress=report)
+            dataset = ColumnarDataset(store, version=version)
+            write_snapshot(output, store, version=version, dimensions=dataset.dimensions)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not build the snapshot: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(store):,} submissions to {output}"))
@@ -0,0 +1,43 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from simulation.loader import iter_json_records
+from simulation.sql import IMPORT_BATCH_SIZE, import_guidelines, import_submissions
+
+
+class Command(BaseCommand):
+    help = "Imports the submissions and guidelines files into the database used by database simulations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", default=str(settings.SIMULATION_SUBMISSIONS_PATH),
+                            help="Submissions file: a JSON array or JSON Lines, optionally gzipped.")
+        parser.add_argument("--guidelines", default=os.path.join(settings.BASE_DIR, "simulation", "data",
+                                                                 "guidelines.json"),
+                            help="Guidelines file: a JSON array.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+                            help="Rows inserted per statement.")
+
+    def handle(self, *args, **options):
+        source, batch_size = options["source"], options["batch_size"]
+        started = time.perf_counter()
+
+        def records():
+            with open(source, "rb") as file:
+                for count, record in enumerate(iter_json_records(file), 1):
+                    yield record
+                    if count % 100_000 == 0:
+                        self.stdout.write(f"{count:,} submissions "
+                                          f"({count / (time.perf_counter() - started):,.0f} submissions/s)")
+
+        try:
+            with open(options["guidelines"]) as file:
+                guidelines = json.load(file)
+            submissions = import_submissions(records(), batch_size=batch_size)
+            guidelines = import_guidelines(guidelines)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not import the simulation data: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {submissions:,} submissions and {guidelines:,} guidelines"))
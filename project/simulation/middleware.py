@@ -0,0 +1,48 @@
+import cProfile
+import os
+import time
+import uuid
+
+from django.conf import settings
+
+from .instrumentation import METRICS, recording
+
+
+class InstrumentationMiddleware:
+    """
+    Times every request routed to a named URL: the ``Server-Timing`` header of the response
+    lists the stages the request went through (see ``instrumentation.stage``) and the total,
+    and ``instrumentation.METRICS`` aggregates them for the metrics endpoint.
+
+    With ``SIMULATION_PROFILE_DIR`` set, a request with ``?profile=1`` also runs under
+    cProfile; its stats are dumped to a file in that directory, named in the
+    ``X-Simulation-Profile`` response header (load it with ``pstats``).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiler = None
+        if settings.SIMULATION_PROFILE_DIR and request.GET.get("profile") == "1":
+            profiler = cProfile.Profile()
+        with recording() as timings:
+            started = time.perf_counter()
+            if profiler is not None:
+                response = profiler.runcall(self.get_response, request)
+            else:
+                response = self.get_response(request)
+            elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        if match is None or not match.url_name:
+            return response
+        timings.add("total", elapsed)
+        response["Server-Timing"] = timings.server_timing()
+        METRICS.observe_request(match.url_name, request.method, response.status_code, elapsed, timings)
+        if profiler is not None:
+            os.makedirs(settings.SIMULATION_PROFILE_DIR, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{match.url_name}-{uuid.uuid4().hex[:8]}.prof"
+            profiler.dump_stats(os.path.join(settings.SIMULATION_PROFILE_DIR, name))
+            response["X-Simulation-Profile"] = name
+        return response
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Guideline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('guideline_id', models.TextField(db_index=True, null=True)),
+                ('version', models.IntegerField(null=True)),
+                ('priority', models.IntegerField(null=True)),
+                ('effective_date', models.DateField(null=True)),
+                ('action', models.TextField(null=True)),
+                ('conditions', models.JSONField(default=dict)),
+                ('data', models.JSONField()),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_id', models.TextField(db_index=True, null=True)),
+                ('industry', models.TextField(db_index=True, null=True)),
+                ('sub_industry', models.TextField(db_index=True, null=True)),
+                ('location', models.TextField(db_index=True, null=True)),
+                ('submission_date', models.TextField(null=True)),
+                ('underwriting_result', models.TextField(db_index=True, null=True)),
+                ('employees', models.FloatField(db_index=True, null=True)),
+                ('years_in_business', models.FloatField(db_index=True, null=True)),
+                ('prior_claims', models.FloatField(null=True)),
+                ('credit_score', models.FloatField(db_index=True, null=True)),
+                ('compliance_issues', models.FloatField(null=True)),
+                ('revenue', models.FloatField(db_index=True, null=True)),
+                ('profit_margin', models.FloatField(null=True)),
+                ('assets', models.FloatField(null=True)),
+                ('has_risk_factors', models.BooleanField(default=False)),
+                ('industry_group', models.JSONField(null=True)),
+                ('location_group', models.JSONField(null=True)),
+                ('company_size', models.SmallIntegerField(null=True)),
+                ('submitted_on', models.DateField(null=True)),
+                ('revenue_amount', models.FloatField(default=0.0)),
+                ('data', models.JSONField()),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubmissionRiskFactor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('factor', models.TextField()),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risk_factors', to='simulation.submission')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['factor', 'submission'], name='simulation__factor_329683_idx')],
+                'constraints': [models.UniqueConstraint(fields=('submission', 'position'), name='unique_risk_factor_position')],
+            },
+        ),
+    ]
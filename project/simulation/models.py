@@ -1,3 +1,87 @@
 from django.db import models
 
-# Create your models here.
+# Dotted submission fields stored in typed columns, which guideline conditions are translated to.
+TEXT_FIELDS = {
+    "submission_id": "submission_id",
+    "company_data.industry": "industry",
+    "company_data.sub_industry": "sub_industry",
+    "company_data.location": "location",
+    "submission_date": "submission_date",
+    "underwriting_result": "underwriting_result",
+}
+NUMBER_FIELDS = {
+    "company_data.employees": "employees",
+    "company_data.years_in_business": "years_in_business",
+    "company_data.prior_claims": "prior_claims",
+    "risk_profile.credit_score": "credit_score",
+    "risk_profile.compliance_issues": "compliance_issues",
+    "financials.revenue": "revenue",
+    "financials.profit_margin": "profit_margin",
+    "financials.assets": "assets",
+}
+RISK_FACTORS_FIELD = "risk_profile.risk_factors"
+
+
+class Submission(models.Model):
+    """
+    One submission. The condition columns hold the value at their field path, or NULL when it
+    is missing, null or not of the column's type; ``data`` keeps the original record.
+
+    The breakdown columns hold the keys of ``aggregation.DimensionKeys``: industry and location
+    labels (``"unknown"`` when missing), the company size code (NULL when unknown), the parsed
+    submission date and the revenue counted in financial impact.
+    """
+    submission_id = models.TextField(null=True, db_index=True)
+    industry = models.TextField(null=True, db_index=True)
+    sub_industry = models.TextField(null=True, db_index=True)
+    location = models.TextField(null=True, db_index=True)
+    submission_date = models.TextField(null=True)
+    underwriting_result = models.TextField(null=True, db_index=True)
+    employees = models.FloatField(null=True, db_index=True)
+    years_in_business = models.FloatField(null=True, db_index=True)
+    prior_claims = models.FloatField(null=True)
+    credit_score = models.FloatField(null=True, db_index=True)
+    compliance_issues = models.FloatField(null=True)
+    revenue = models.FloatField(null=True, db_index=True)
+    profit_margin = models.FloatField(null=True)
+    assets = models.FloatField(null=True)
+    # Whether ``risk_profile.risk_factors`` is a list; its items are in ``SubmissionRiskFactor``.
+    has_risk_factors = models.BooleanField(default=False)
+
+    industry_group = models.JSONField(null=True)
+    location_group = models.JSONField(null=True)
+    company_size = models.SmallIntegerField(null=True)
+    submitted_on = models.DateField(null=True)
+    revenue_amount = models.FloatField(default=0.0)
+
+    data = models.JSONField()
+
+    class Meta:
+        ordering = ["id"]
+
+
+class SubmissionRiskFactor(models.Model):
+    """Junction of submissions and their risk factors, one row per string item of the list."""
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name="risk_factors")
+    position = models.PositiveSmallIntegerField()
+    factor = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["submission", "position"], name="unique_risk_factor_position"),
+        ]
+        indexes = [models.Index(fields=["factor", "submission"])]
+
+
+class Guideline(models.Model):
+    """One guideline revision; ``data`` keeps the original payload."""
+    guideline_id = models.TextField(null=True, db_index=True)
+    version = models.IntegerField(null=True)
+    priority = models.IntegerField(null=True)
+    effective_date = models.DateField(null=True)
+    action = models.TextField(null=True)
+    conditions = models.JSONField(default=dict)
+    data = models.JSONField()
+
+    class Meta:
+        ordering = ["id"]
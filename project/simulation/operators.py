@@ -0,0 +1,151 @@
+import operator as _operator
+from collections import Counter
+from typing import Any, Callable, Optional, Tuple
+
+COMPARISON_OPERATORS = {
+    ">=": _operator.ge,
+    "<=": _operator.le,
+    ">": _operator.gt,
+    "<": _operator.lt,
+}
+
+SUPPORTED_OPERATORS = ("equals", "in", ">=", "<=", ">", "<", "between", "contains_at_least")
+
+
+def as_range(operator: str, value: Any) -> Optional[Tuple[Any, Any, bool]]:
+    """
+    Returns ``(lower, upper, inclusive)`` when a comparison condition describes a range.
+
+    ``between`` is always a range (a scalar value is the degenerate range ``[value, value]``).
+    The comparison operators describe a range when their value is a ``[lower, upper]`` pair:
+    ``>=``/``<=`` include both bounds, ``>``/``<`` exclude them.
+    Raises ``ValueError`` for malformed range values.
+    """
+    if operator == "between":
+        if isinstance(value, list):
+            lower, upper = value
+            return lower, upper, True
+        return value, value, True
+    if operator in COMPARISON_OPERATORS and isinstance(value, list):
+        lower, upper = value
+        return lower, upper, operator in (">=", "<=")
+    return None
+
+
+def never(field_value: Any) -> bool:
+    return False
+
+
+def _guarded(test: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    def guarded(field_value: Any) -> bool:
+        try:
+            return bool(test(field_value))
+        except (TypeError, ValueError, AttributeError):
+            return False
+    return guarded
+
+
+def _compile_membership(choices: list) -> Callable[[Any], bool]:
+    try:
+        choice_set = frozenset(choices)
+    except TypeError:
+        return _guarded(lambda field_value: field_value in choices)
+
+    def test(field_value: Any) -> bool:
+        try:
+            return field_value in choice_set
+        except TypeError:
+            return field_value in choices
+    return _guarded(test)
+
+
+def _compile_contains_at_least(value: Any) -> Callable[[Any], bool]:
+    if not isinstance(value, dict):
+        return never
+    items = value.get("items", [])
+    threshold = value.get("threshold", 1)
+    try:
+        weights = tuple(Counter(items).items())
+    except TypeError:
+        return _guarded(
+            lambda field_value: isinstance(field_value, list)
+            and sum(1 for item in items if item in field_value) >= threshold
+        )
+
+    def test(field_value: Any) -> bool:
+        if not isinstance(field_value, list):
+            return False
+        try:
+            present = set(field_value)
+        except TypeError:
+            present = field_value
+        return sum(weight for item, weight in weights if item in present) >= threshold
+    return _guarded(test)
+
+
+def compile_operator(operator: str, value: Any) -> Callable[[Any], bool]:
+    """
+    Resolves a guideline operator and its value into a single-argument predicate.
+
+    Lookup sets for ``in`` and item weights for ``contains_at_least`` are built here, once.
+    Unknown operators, malformed values and incomparable types never match.
+    """
+    if operator == "equals" or (operator == "in" and not isinstance(value, list)):
+        return _guarded(lambda field_value: field_value == value)
+    if operator == "in":
+        return _compile_membership(value)
+    if operator == "contains_at_least":
+        return _compile_contains_at_least(value)
+    if operator in COMPARISON_OPERATORS or operator == "between":
+        try:
+            bounds = as_range(operator, value)
+        except (TypeError, ValueError):
+            return never
+        if bounds is None:
+            compare = COMPARISON_OPERATORS[operator]
+            return _guarded(lambda field_value: compare(field_value, value))
+        lower, upper, inclusive = bounds
+        if inclusive:
+            return _guarded(lambda field_value: lower <= field_value <= upper)
+        return _guarded(lambda field_value: lower < field_value < upper)
+    return never
+
+
+def match_value(operator: str, field_value: Any, guideline_value: Any) -> bool:
+    return compile_operator(operator, guideline_value)(field_value)
+
+
+def near_miss_scale(bound: Any) -> float:
+    """Distances are measured relative to the bound; a zero bound measures them absolutely."""
+    return abs(bound) or 1.0
+
+
+def near_miss_distance(operator: str, field_value: Any, guideline_value: Any) -> Optional[float]:
+    """
+    Relative distance by which ``field_value`` fails a comparison condition.
+
+    Returns ``None`` when the value satisfies the condition, when the condition is not a
+    comparison or range, or when the value is not a number.
+    """
+    if isinstance(field_value, bool) or not isinstance(field_value, (int, float)) or field_value != field_value:
+        return None
+    try:
+        bounds = as_range(operator, guideline_value)
+        if bounds is not None:
+            lower, upper, inclusive = bounds
+            below = field_value < lower if inclusive else field_value <= lower
+            if below:
+                return (lower - field_value) / near_miss_scale(lower)
+            above = field_value > upper if inclusive else field_value >= upper
+            if above:
+                return (field_value - upper) / near_miss_scale(upper)
+            return None
+        if operator in (">=", ">"):
+            fails = field_value < guideline_value if operator == ">=" else field_value <= guideline_value
+            return (guideline_value - field_value) / near_miss_scale(guideline_value) if fails else None
+        if operator in ("<=", "<"):
+            fails = field_value > guideline_value if operator == "<=" else field_value >= guideline_value
+            return (field_value - guideline_value) / near_miss_scale(guideline_value) if fails else None
+    except (TypeError, ValueError):
+        return None
+    return None
@@ -0,0 +1,192 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .aggregation import counts_by_label
+from .compiler import CompiledGuideline, as_compiled
+from .engine import ColumnarDataset, delta_mask, guideline_mask
+
+NO_DECISION = "NO_DECISION"
+PORTFOLIO_CHANGES = ("add", "edit", "remove")
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _revision_key(guideline: dict) -> Tuple[Any, date]:
+    return guideline.get("version") or 0, _as_date(guideline.get("effective_date")) or date.min
+
+
+def active_guidelines(guidelines: Sequence[dict], as_of: Optional[date] = None) -> List[dict]:
+    """
+    The revision of each guideline in force on ``as_of`` (default: today).
+
+    Revisions share an ``id``; among those already effective the highest ``version`` wins,
+    then the latest ``effective_date``, then the one listed last. Guidelines without an ``id``
+    are independent rules.
+    """
+    as_of = as_of or date.today()
+    active: Dict[Any, dict] = {}
+    for position, guideline in enumerate(guidelines):
+        effective = _as_date(guideline.get("effective_date"))
+        if effective is None or effective > as_of:
+            continue
+        key = guideline.get("id") or ("position", position)
+        current = active.get(key)
+        if current is None or _revision_key(guideline) >= _revision_key(current):
+            active[key] = guideline
+    return list(active.values())
+
+
+def _descending(guideline: dict) -> Tuple[Any, int, Any]:
+    effective = _as_date(guideline.get("effective_date")) or date.min
+    return -(guideline.get("priority") or 0), -effective.toordinal(), -(guideline.get("version") or 0)
+
+
+class Portfolio:
+    """
+    Active guidelines ordered by precedence: highest ``priority`` first, then the latest
+    ``effective_date``, then the highest ``version``; remaining ties keep list order.
+
+    Each submission's decision is the ``action`` of the first guideline in that order it matches.
+    """
+
+    def __init__(self, guidelines: Sequence[dict]):
+        order = sorted(range(len(guidelines)), key=lambda i: (_descending(guidelines[i]), i))
+        self.guidelines = [guidelines[i] for i in order]
+        self.compiled: List[CompiledGuideline] = [as_compiled(guideline) for guideline in self.guidelines]
+        self.actions = [guideline.get("action") for guideline in self.guidelines]
+
+    def __len__(self) -> int:
+        return len(self.guidelines)
+
+    def position(self, guideline: Optional[dict]) -> Optional[int]:
+        return next((i for i, candidate in enumerate(self.guidelines) if candidate is guideline), None)
+
+    def masks(self, dataset: ColumnarDataset, memo: Optional[Dict[Any, np.ndarray]] = None) -> List[np.ndarray]:
+        return [guideline_mask(dataset, compiled, memo) for compiled in self.compiled]
+
+    @staticmethod
+    def decide(masks: Sequence[np.ndarray], length: int) -> np.ndarray:
+        """Position of the deciding guideline per row, -1 where none matches."""
+        winners = np.full(length, -1, dtype=np.int64)
+        undecided = np.ones(length, dtype=bool)
+        for position, mask in enumerate(masks):
+            decided = undecided & mask
+            winners[decided] = position
+            undecided &= ~decided
+        return winners
+
+    def action_labels(self, winners: np.ndarray) -> np.ndarray:
+        labels = np.array([*self.actions, NO_DECISION], dtype=object)
+        return labels[winners]
+
+
+def apply_change(guidelines: Sequence[dict], change: str, guideline: Optional[dict] = None,
+                 guideline_id: Any = None, as_of: Optional[date] = None) -> Tuple[List[dict], List[dict]]:
+    """
+    Returns ``(before, after)``: the active guidelines on ``as_of`` without and with ``change``
+    applied.
+
+    ``add`` introduces ``guideline`` as a new rule, ``edit`` makes it the active revision of the
+    rule with its ``id`` and ``remove`` drops the rule ``guideline_id``. The changed revision
+    applies regardless of its ``effective_date``. Raises ``ValueError`` for unknown changes,
+    unknown ids and adding an id that is already active.
+    """
+    if change not in PORTFOLIO_CHANGES:
+        raise ValueError(f"Unknown portfolio change: {change}")
+    before = active_guidelines(guidelines, as_of)
+    if change == "add":
+        changed_id = guideline.get("id")
+        if changed_id and any(existing.get("id") == changed_id for existing in before):
+            raise ValueError(f"Guideline with id {changed_id} is already active.")
+        return before, [*before, guideline]
+
+    changed_id = guideline.get("id") if change == "edit" else guideline_id
+    if not changed_id or not any(existing.get("id") == changed_id for existing in before):
+        raise ValueError(f"Guideline with id {changed_id} is not active.")
+    after = [existing for existing in before if existing.get("id") != changed_id]
+    if change == "edit":
+        after.append(guideline)
+    return before, after
+
+
+def portfolio_impact(dataset: ColumnarDataset, before: Sequence[dict], after: Sequence[dict],
+                     memo: Optional[Dict[Any, np.ndarray]] = None) -> Dict[str, Any]:
+    """
+    Compares the decisions of two portfolios that differ in at most one rule, as returned by
+    ``apply_change``.
+
+    Only submissions matched by the old or the new revision of that rule can change decision,
+    so only they are re-decided; the new revision is derived from the old one with
+    ``delta_mask`` where possible.
+    """
+    removed = next((guideline for guideline in before if all(guideline is not other for other in after)), None)
+    added = next((guideline for guideline in after if all(guideline is not other for other in before)), None)
+    old, new = Portfolio(before), Portfolio(after)
+    masks = old.masks(dataset, memo)
+    winners = Portfolio.decide(masks, len(dataset))
+
+    old_position = old.position(removed)
+    new_position = new.position(added)
+
+    affected = np.zeros(len(dataset), dtype=bool)
+    new_mask = None
+    if old_position is not None:
+        affected |= masks[old_position]
+    if new_position is not None:
+        compiled = new.compiled[new_position]
+        if old_position is not None:
+            new_mask = delta_mask(dataset, old.compiled[old_position], masks[old_position], compiled, memo)
+        if new_mask is None:
+            new_mask = guideline_mask(dataset, compiled, memo)
+        affected |= new_mask
+
+    # Masks of the new portfolio: unchanged rules keep theirs, the changed rule takes its new one.
+    old_masks = {id(guideline): mask for guideline, mask in zip(old.guidelines, masks)}
+    rows = np.flatnonzero(affected)
+    new_masks = [
+        (new_mask if position == new_position else old_masks[id(guideline)])[rows]
+        for position, guideline in enumerate(new.guidelines)
+    ]
+
+    before_actions = old.action_labels(winners)
+    after_actions = before_actions.copy()
+    after_actions[rows] = new.action_labels(Portfolio.decide(new_masks, len(rows)))
+    changed = before_actions != after_actions
+
+    transitions: Dict[str, Dict[str, int]] = {}
+    for previous, current in zip(before_actions[changed].tolist(), after_actions[changed].tolist()):
+        counts = transitions.setdefault(previous, {})
+        counts[current] = counts.get(current, 0) + 1
+
+    dimensions = dataset.dimensions
+    total = len(dataset)
+    decision_changes = int(np.count_nonzero(changed))
+    submission_ids = dataset.column("submission_id").take(np.flatnonzero(changed))
+    return {
+        "total_submissions": total,
+        "active_guidelines_before": len(old),
+        "active_guidelines_after": len(new),
+        "reevaluated_submissions": len(rows),
+        "decision_changes": decision_changes,
+        "decision_change_percentage": (decision_changes / total * 100) if total else 0.0,
+        "actions_before": _action_counts(before_actions),
+        "actions_after": _action_counts(after_actions),
+        "transitions": transitions,
+        "breakdown_by_industry": counts_by_label(dimensions.industry_codes[changed], dimensions.industry_labels),
+        "breakdown_by_location": counts_by_label(dimensions.location_codes[changed], dimensions.location_labels),
+        "changed_submissions": submission_ids,
+    }
+
+
+def _action_counts(actions: np.ndarray) -> Dict[Any, int]:
+    labels, counts = np.unique(actions.astype(str), return_counts=True)
+    return dict(zip(labels.tolist(), counts.tolist()))
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from .engine import ColumnarDataset
+
+_WORKER_DATASET: Optional[ColumnarDataset] = None
+
+
+def _init_worker(dataset: ColumnarDataset) -> None:
+    # Spawned workers start from a fresh interpreter; the simulation services import the models.
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    global _WORKER_DATASET
+    _WORKER_DATASET = dataset
+
+
+def _call(function: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+    return function(_WORKER_DATASET, *args)
+
+
+class DatasetProcessPool:
+    """
+    A pool of ``workers`` processes holding one dataset, sent to each of them once when the pool
+    starts. The pool is kept between calls and started again only for another dataset (by
+    fingerprint), another worker count or in a process forked from the one that started it.
+
+    Workers are spawned: forking a process whose other threads may hold locks is unsafe.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._key: Optional[Tuple[str, int, int]] = None
+        self._lock = threading.Lock()
+
+    def submit(self, dataset: ColumnarDataset, workers: int, function: Callable[..., Any],
+               calls: Sequence[Tuple[Any, ...]]) -> List[Future]:
+        """
+        Runs ``function(dataset, *args)`` in the workers for each ``args`` of ``calls``.
+        ``function`` must be importable by the workers.
+        """
+        key = (dataset.fingerprint, workers, os.getpid())
+        with self._lock:
+            if self._pool is None or self._key != key:
+                previous = self._pool if self._key is not None and self._key[2] == key[2] else None
+                if previous is not None:
+                    # Tasks already submitted by other threads still complete.
+                    previous.shutdown(wait=False)
+                self._pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=_init_worker, initargs=(dataset,))
+                self._key = key
+            # Submitting under the lock: a pool is only shut down once nothing more is sent to it.
+            return [self._pool.submit(_call, function, args) for args in calls]
+
+    def reset(self) -> None:
+        """Stops the pool (e.g. once it is broken); the next ``submit`` starts a new one."""
+        with self._lock:
+            pool, self._pool, self._key = self._pool, None, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool, self._key = self._pool, None, None
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,183 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, time
+from statistics import NormalDist
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .aggregation import COMPANY_SIZES
+from .engine import ColumnarDataset
+
+# Samples of this many recent dataset versions are kept.
+MAX_SAMPLES = 4
+
+
+class StratifiedSample:
+    """
+    A fixed random sample of a dataset, stratified by industry, location and company size.
+
+    Each stratum gets a share of ``size`` proportional to its population (at least two rows,
+    so its variance can be estimated, or all of them if it is smaller); within a stratum rows
+    are drawn uniformly with a generator seeded by ``seed``, so a dataset version always
+    yields the same sample. ``dataset`` is a ``ColumnarDataset`` over the sampled submissions.
+    """
+
+    def __init__(self, source: ColumnarDataset, size: int, seed: int = 0):
+        total = len(source)
+        dimensions = source.dimensions
+        keys = (dimensions.industry_codes.astype(np.int64) * (len(dimensions.location_labels) + 1)
+                + dimensions.location_codes) * (len(COMPANY_SIZES) + 1) + dimensions.size_codes + 1
+        _, strata = np.unique(keys, return_inverse=True)
+        strata = strata.reshape(-1)
+        population = np.bincount(strata)
+        if size >= total:
+            allocation = population
+        else:
+            proportional = np.round(size * population / total).astype(np.int64)
+            allocation = np.minimum(population, np.maximum(proportional, 2))
+
+        # Rows in random order within each stratum; the first ``allocation`` of each are taken.
+        order = np.lexsort((np.random.default_rng(seed).random(total), strata))
+        starts = np.cumsum(population) - population
+        rank = np.arange(total) - starts[strata[order]]
+        self.positions = np.sort(order[rank < allocation[strata[order]]])
+
+        self.population_size = total
+        self.population = population.astype(np.float64)
+        self.sampled = allocation.astype(np.float64)
+        self.strata = strata[self.positions]
+        self.dataset = ColumnarDataset([source.submissions[position] for position in self.positions.tolist()],
+                                       version=f"{source.fingerprint}:sample:{size}:{seed}")
+        self.dataset.dimensions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def estimate(self, rows: np.ndarray, keys: np.ndarray, values: np.ndarray,
+                 n_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Population totals of a per-row measure and their variances, for each of ``n_keys`` keys.
+
+        Row ``rows[i]`` of the sample contributes ``values[i]`` to key ``keys[i]`` (a row may
+        contribute several times). Totals are the stratified expansion estimator and variances
+        include the finite population correction.
+        """
+        n_strata = len(self.population)
+        cells, inverse = np.unique(rows.astype(np.int64) * n_keys + keys, return_inverse=True)
+        measures = np.bincount(inverse.reshape(-1), weights=values, minlength=len(cells))
+        index = self.strata[cells // n_keys] * n_keys + cells % n_keys
+        sums = np.bincount(index, weights=measures, minlength=n_strata * n_keys).reshape(n_strata, n_keys)
+        squares = np.bincount(index, weights=measures * measures, minlength=n_strata * n_keys).reshape(n_strata, n_keys)
+
+        population, sampled = self.population[:, None], self.sampled[:, None]
+        means = sums / sampled
+        spread = np.maximum(squares - sampled * means * means, 0.0) / np.maximum(sampled - 1, 1)
+        totals = (population * means).sum(axis=0)
+        variances = (population * population * (1 - sampled / population) * spread / sampled).sum(axis=0)
+        return totals, variances
+
+
+_SAMPLES: "OrderedDict[Tuple[str, int, int], StratifiedSample]" = OrderedDict()
+_SAMPLES_LOCK = threading.Lock()
+
+
+def stratified_sample(dataset: ColumnarDataset, size: int, seed: int = 0) -> StratifiedSample:
+    """The sample of ``dataset``, drawn once per dataset version and reused afterwards."""
+    key = (dataset.fingerprint, size, seed)
+    with _SAMPLES_LOCK:
+        sample = _SAMPLES.get(key)
+        if sample is not None:
+            _SAMPLES.move_to_end(key)
+            return sample
+    sample = StratifiedSample(dataset, size, seed)
+    with _SAMPLES_LOCK:
+        _SAMPLES[key] = sample
+        while len(_SAMPLES) > MAX_SAMPLES:
+            _SAMPLES.popitem(last=False)
+    return sample
+
+
+class _Interval:
+    def __init__(self, z: float, low: float = -np.inf, high: float = np.inf):
+        self.z, self.low, self.high = z, low, high
+
+    def __call__(self, total: float, variance: float) -> List[float]:
+        margin = self.z * float(np.sqrt(variance))
+        return [max(self.low, float(total) - margin), min(self.high, float(total) + margin)]
+
+
+def _breakdown(sample: StratifiedSample, interval: _Interval, rows: np.ndarray, codes: np.ndarray,
+               labels: Sequence[Any]) -> Tuple[Dict[Any, float], Dict[Any, List[float]]]:
+    totals, variances = sample.estimate(rows, codes, np.ones(len(rows)), max(len(labels), 1))
+    estimates, intervals = {}, {}
+    for code in np.flatnonzero(totals).tolist():
+        estimates[labels[code]] = float(totals[code])
+        intervals[labels[code]] = interval(totals[code], variances[code])
+    return estimates, intervals
+
+
+def estimate_report(sample: StratifiedSample, baseline_results: np.ndarray, modified_results: np.ndarray,
+                    immediate_cutoff: datetime, confidence: float) -> Dict[str, Any]:
+    """
+    Estimates the ``analyze_impact_advanced`` report of the whole dataset from the results
+    over ``sample``, with ``confidence`` (e.g. 0.95) normal-approximation intervals in
+    ``confidence_intervals``. Near misses are not estimated.
+    """
+    dimensions = sample.dataset.dimensions
+    total = sample.population_size
+    counts = _Interval(NormalDist().inv_cdf(0.5 + confidence / 2), 0.0, float(total))
+    amounts = _Interval(counts.z)
+
+    changed = baseline_results != modified_results
+    rows = np.flatnonzero(changed)
+    [outcome_changes], [outcome_variance] = sample.estimate(rows, np.zeros(len(rows), dtype=np.int64),
+                                                            np.ones(len(rows)), 1)
+    intervals: Dict[str, Any] = {"outcome_changes": counts(outcome_changes, outcome_variance)}
+    percentage = 100 / total if total else 0.0
+    intervals["outcome_change_percentage"] = [bound * percentage for bound in intervals["outcome_changes"]]
+
+    report: Dict[str, Any] = {}
+    for name, codes, labels in (
+        ("breakdown_by_industry", dimensions.industry_codes, dimensions.industry_labels),
+        ("breakdown_by_location", dimensions.location_codes, dimensions.location_labels),
+    ):
+        report[name], intervals[name] = _breakdown(sample, counts, rows, codes[rows], labels)
+    # A submission may list a risk factor more than once, so these counts are not bounded by the total.
+    risk_rows = dimensions.risk_rows[changed[dimensions.risk_rows]]
+    risk_codes = dimensions.risk_codes[changed[dimensions.risk_rows]]
+    report["breakdown_by_risk_factor"], intervals["breakdown_by_risk_factor"] = _breakdown(
+        sample, _Interval(counts.z, 0.0), risk_rows, risk_codes, dimensions.risk_labels)
+    sizes = dimensions.size_codes[rows]
+    report["breakdown_by_company_size"], intervals["breakdown_by_company_size"] = _breakdown(
+        sample, counts, rows[sizes >= 0], sizes[sizes >= 0].astype(np.int64), COMPANY_SIZES)
+
+    first_immediate = immediate_cutoff.toordinal() + (0 if immediate_cutoff.time() == time(0) else 1)
+    dates = dimensions.date_ordinals[rows]
+    dated = dates >= 0
+    timing, timing_variances = sample.estimate(rows[dated], (dates[dated] < first_immediate).astype(np.int64),
+                                               np.ones(int(dated.sum())), 2)
+    report["time_impact"] = {"immediate": float(timing[0]), "gradual": float(timing[1])}
+    intervals["time_impact"] = {"immediate": counts(timing[0], timing_variances[0]),
+                                "gradual": counts(timing[1], timing_variances[1])}
+
+    gained = modified_results & ~baseline_results
+    revenue = np.where(gained, dimensions.revenue, -dimensions.revenue)[rows]
+    [financial_impact], [financial_variance] = sample.estimate(rows, np.zeros(len(rows), dtype=np.int64), revenue, 1)
+    intervals["financial_impact"] = amounts(financial_impact, financial_variance)
+
+    return {
+        "mode": "estimate",
+        "sample_size": len(sample),
+        "confidence": confidence,
+        "total_submissions": total,
+        "outcome_changes": float(outcome_changes),
+        "outcome_change_percentage": float(outcome_changes) * percentage,
+        "breakdown_by_industry": report["breakdown_by_industry"],
+        "breakdown_by_risk_factor": report["breakdown_by_risk_factor"],
+        "breakdown_by_company_size": report["breakdown_by_company_size"],
+        "breakdown_by_location": report["breakdown_by_location"],
+        "time_impact": report["time_impact"],
+        "financial_impact": float(financial_impact),
+        "confidence_intervals": intervals,
+    }
@@ -1,8 +1,15 @@
+import math
+
+from django.conf import settings
 from rest_framework import serializers
 
+from .operators import SUPPORTED_OPERATORS
+from .portfolio import PORTFOLIO_CHANGES
+from .sweep import SWEEP_OPERATORS
+
 class GuidelineConditionSerializer(serializers.Serializer):
     field = serializers.CharField()
-    operator = serializers.CharField()
+    operator = serializers.ChoiceField(choices=SUPPORTED_OPERATORS)
     value = serializers.JSONField()
 
 class GuidelineConditionsSerializer(serializers.Serializer):
@@ -10,11 +17,71 @@ class GuidelineConditionsSerializer(serializers.Serializer):
     conditions = GuidelineConditionSerializer(many=True)
 
 class GuidelineSerializer(serializers.Serializer):
-    id = serializers.CharField(allow_null=True),
+    id = serializers.CharField(allow_null=True, required=False)
     name = serializers.CharField()
     conditions = GuidelineConditionsSerializer()
     action = serializers.CharField()
     priority = serializers.IntegerField()
     effective_date = serializers.DateField()
     version = serializers.IntegerField()
-    coverage_types = serializers.ListField(child=serializers.CharField())
\ No newline at end of file
+    coverage_types = serializers.ListField(child=serializers.CharField())
+class BatchSimulationSerializer(serializers.Serializer):
+    baseline_id = serializers.CharField(allow_null=True, required=False)
+    guidelines = serializers.ListField(
+        child=GuidelineSerializer(), allow_empty=False, max_length=settings.SIMULATION_MAX_BATCH_SIZE
+    )
+
+class ThresholdRangeSerializer(serializers.Serializer):
+    start = serializers.FloatField()
+    stop = serializers.FloatField()
+    step = serializers.FloatField()
+
+    def validate(self, data):
+        if data["step"] <= 0:
+            raise serializers.ValidationError("step must be positive.")
+        if data["stop"] < data["start"]:
+            raise serializers.ValidationError("stop must not be less than start.")
+        return data
+
+class ThresholdSweepSerializer(serializers.Serializer):
+    baseline_id = serializers.CharField(allow_null=True, required=False)
+    guideline = GuidelineSerializer()
+    condition_index = serializers.IntegerField(min_value=0, default=0)
+    thresholds = serializers.ListField(child=serializers.FloatField(), allow_empty=False, required=False)
+    range = ThresholdRangeSerializer(required=False)
+
+    def validate(self, data):
+        if ("thresholds" in data) == ("range" in data):
+            raise serializers.ValidationError("Provide exactly one of thresholds or range.")
+        if "range" in data:
+            start, stop, step = data["range"]["start"], data["range"]["stop"], data["range"]["step"]
+            count = math.floor((stop - start) / step + 1e-9) + 1
+            if count > settings.SIMULATION_MAX_SWEEP_POINTS:
+                raise serializers.ValidationError(f"range has more than {settings.SIMULATION_MAX_SWEEP_POINTS} thresholds.")
+            data["thresholds"] = [start + i * step for i in range(count)]
+        elif len(data["thresholds"]) > settings.SIMULATION_MAX_SWEEP_POINTS:
+            raise serializers.ValidationError(f"thresholds has more than {settings.SIMULATION_MAX_SWEEP_POINTS} values.")
+
+        conditions = data["guideline"]["conditions"]["conditions"]
+        if data["condition_index"] >= len(conditions):
+            raise serializers.ValidationError({"condition_index": "Guideline has no condition at this index."})
+        if conditions[data["condition_index"]]["operator"] not in SWEEP_OPERATORS:
+            raise serializers.ValidationError(
+                {"condition_index": f"Only {', '.join(SWEEP_OPERATORS)} conditions can be swept."})
+        return data
+
+class PortfolioChangeSerializer(serializers.Serializer):
+    change = serializers.ChoiceField(choices=PORTFOLIO_CHANGES)
+    guideline = GuidelineSerializer(required=False)
+    guideline_id = serializers.CharField(required=False)
+    as_of = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if data["change"] == "remove":
+            if not data.get("guideline_id"):
+                raise serializers.ValidationError({"guideline_id": "Required to remove a guideline."})
+        elif "guideline" not in data:
+            raise serializers.ValidationError({"guideline": f"Required to {data['change']} a guideline."})
+        elif data["change"] == "edit" and not data["guideline"].get("id"):
+            raise serializers.ValidationError({"guideline": "The edited guideline needs its id."})
+        return data
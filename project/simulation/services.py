@@ -1,160 +1,477 @@
 # simulation/services.py
 import concurrent.futures
-from datetime import datetime, timedelta
-from typing import Any, Dict, List
+import os
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
-from .utils import get_nested_value
+import numpy as np
+from django.conf import settings
 
-BASELINE_CACHE = {}
+from .aggregation import ImpactAggregate
+from .bitsets import Bitset
+from .cache import BitsetCache, ConditionStore
+from .charts import ChartRenderer
+from .compiler import (
+    CompiledCondition,
+    CompiledGuideline,
+    as_compiled,
+    compile_cache_info,
+    compile_canonical,
+    compile_condition,
+    compile_conditions,
+)
+from .engine import ColumnarDataset, as_dataset, delta_mask, guideline_mask, near_miss_distances
+from .instrumentation import count, stage
+from .jobs import JobManager
+from .operators import near_miss_distance
+from .portfolio import apply_change, portfolio_impact
+from .processes import DatasetProcessPool
+from .sampling import estimate_report, stratified_sample
+from .serializers import GuidelineSerializer
+from .sql import impact_report
+from .sweep import sweep_aggregates
+
+# Baseline results keyed by (compiled conditions digest, dataset fingerprint).
+BASELINE_CACHE = BitsetCache(max_bytes=settings.SIMULATION_BASELINE_CACHE_BYTES)
+# Single-condition results keyed by (canonical condition, dataset fingerprint), shared by every
+# columnar evaluation.
+CONDITION_STORE = ConditionStore(max_bytes=settings.SIMULATION_CONDITION_CACHE_BYTES)
+# Background simulations, with finished reports keyed by ``simulation_key``.
+JOB_MANAGER = JobManager(max_workers=settings.SIMULATION_JOB_WORKERS, max_jobs=settings.SIMULATION_MAX_JOBS,
+                         max_results=settings.SIMULATION_JOB_RESULTS)
+# Worker processes of the "processes" backend, kept between simulations of the same dataset.
+PROCESS_POOL = DatasetProcessPool()
+# Report chart PNGs keyed by ``Chart.digest``.
+CHART_RENDERER = ChartRenderer(max_workers=settings.SIMULATION_CHART_WORKERS,
+                               cache_bytes=settings.SIMULATION_CHART_CACHE_BYTES)
+
+EVALUATION_ENGINES = ("columnar", "rows")
+EXECUTION_BACKENDS = ("serial", "threads", "processes")
+SIMULATION_MODES = ("exact", "estimate")
+MIN_CHUNK_SIZE = 10_000
+# Changed submissions dated within this window of today count as immediate impact.
+IMMEDIATE_WINDOW = timedelta(days=180)
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Sizes and hit rates of the result caches and the compiled-guideline cache."""
+    compiled = compile_cache_info()
+    lookups = compiled.hits + compiled.misses
+    return {
+        "baselines": BASELINE_CACHE.stats(),
+        "conditions": CONDITION_STORE.stats(),
+        "job_results": JOB_MANAGER.stats(),
+        "charts": CHART_RENDERER.stats(),
+        "compiled_guidelines": {
+            "entries": compiled.currsize,
+            "max_entries": compiled.maxsize,
+            "hits": compiled.hits,
+            "misses": compiled.misses,
+            "hit_rate": compiled.hits / lookups if lookups else 0.0,
+        },
+    }
+
+def simulation_key(dataset: ColumnarDataset, baseline: dict, modified: dict) -> str:
+    """
+    Identifies the ``analyze_impact_advanced`` report of ``baseline`` and ``modified`` over
+    ``dataset``: equal keys mean equal reports. The immediate-impact window moves with the
+    date, so keys do too.
+    """
+    return ":".join((dataset.fingerprint, as_compiled(baseline or {}).digest, as_compiled(modified).digest,
+                     date.today().isoformat()))
+
+def compile_guideline(payload: dict) -> CompiledGuideline:
+    """
+    Validates a guideline payload with ``GuidelineSerializer`` and compiles its conditions.
+
+    Raises ``rest_framework.exceptions.ValidationError`` for invalid payloads.
+    """
+    serializer = GuidelineSerializer(data=payload)
+    serializer.is_valid(raise_exception=True)
+    return compile_conditions(serializer.validated_data["conditions"])
 
 def evaluate_condition(submission: dict, condition: dict) -> bool:
-    field_value = get_nested_value(submission, condition.get('field', ''))
-    operator = condition.get('operator')
-    guideline_value = condition.get('value')
-    
-    if operator == "equals":
-        return field_value == guideline_value
-    elif operator == ">=":
-        if isinstance(guideline_value, list):
-            lower, upper = guideline_value
-            return lower <= field_value <= upper
-        return field_value >= guideline_value
-    elif operator == "in":
-        if isinstance(guideline_value, list):
-            return field_value in guideline_value
-        return field_value == guideline_value
-    elif operator == "contains_at_least":
-        if not isinstance(field_value, list):
-            return False
-        items = guideline_value.get("items", [])
-        threshold = guideline_value.get("threshold", 1)
-        count = sum(1 for item in items if item in field_value)
-        return count >= threshold
-    return False
-
-def evaluate_guideline(submission: dict, guideline: dict) -> bool:
-    conditions = guideline.get('conditions', {})
-    logic = conditions.get('logic', 'all').lower()
-    condition_list = conditions.get('conditions', [])
-    if not condition_list:
-        return False
-    results = [evaluate_condition(submission, cond) for cond in condition_list]
-    return any(results) if logic == 'any' else all(results)
-
-def evaluate_near_miss(submission: dict, guideline: dict, margin: float = 0.1) -> bool:
-    for cond in guideline.get('conditions', {}).get('conditions', []):
-        if cond.get('operator') == ">=":
-            field_value = get_nested_value(submission, cond.get('field'))
-            if field_value is None:
-                continue
-            if isinstance(cond.get('value'), list):
-                lower, _ = cond.get('value')
-                if (lower - field_value) / lower <= margin:
-                    return True
-            else:
-                threshold = cond.get('value')
-                if (threshold - field_value) / threshold <= margin:
-                    return True
-    return False
+    return compile_condition(condition)(submission)
+
+def evaluate_guideline(submission: dict, guideline: Union[dict, CompiledGuideline]) -> bool:
+    return as_compiled(guideline)(submission)
+
+def near_miss_score(submission: dict, guideline: Union[dict, CompiledGuideline], margin: float = 0.1) -> Optional[float]:
+    """
+    Relative distance by which ``guideline`` misses ``submission`` through its comparison
+    conditions, or ``None`` if it matches or misses by more than ``margin``.
+    See ``engine.near_miss_distances`` for the column-wise equivalent.
+    """
+    compiled = as_compiled(guideline)
+    if not compiled.conditions or compiled(submission):
+        return None
+    distances = []
+    for cond in compiled.conditions:
+        value = cond.resolve(submission)
+        missed_by = near_miss_distance(cond.operator, value, cond.value)
+        if missed_by is not None and missed_by <= margin:
+            distances.append(missed_by)
+        elif compiled.logic != 'any' and not cond.test(value):
+            return None
+    if not distances:
+        return None
+    return min(distances) if compiled.logic == 'any' else max(distances)
+
+def evaluate_near_miss(submission: dict, guideline: Union[dict, CompiledGuideline], margin: float = 0.1) -> bool:
+    return near_miss_score(submission, guideline, margin) is not None
+
+def _lookup_baseline(compiled: CompiledGuideline, dataset: ColumnarDataset) -> Optional[np.ndarray]:
+    if not compiled.conditions:
+        return np.zeros(len(dataset), dtype=bool)
+    cached = BASELINE_CACHE.get((compiled.digest, dataset.fingerprint))
+    count("baseline_cache_hits" if cached is not None else "baseline_cache_misses")
+    return cached.to_mask() if cached is not None else None
+
+
+def _load_conditions(dataset: ColumnarDataset, conditions: Sequence[CompiledCondition],
+                     memo: Dict[Any, np.ndarray]) -> None:
+    found, missing = CONDITION_STORE.load(dataset.fingerprint, conditions, memo)
+    count("condition_cache_hits", found)
+    count("condition_cache_misses", missing)
+
+
+def _store_baseline(compiled: CompiledGuideline, dataset: ColumnarDataset, mask: np.ndarray) -> None:
+    if compiled.conditions:
+        BASELINE_CACHE.put((compiled.digest, dataset.fingerprint), Bitset.from_mask(mask))
+
+def _conditions(guidelines: Sequence[CompiledGuideline]) -> List[CompiledCondition]:
+    return [cond for compiled in guidelines for cond in compiled.conditions]
+
+def baseline_mask(baseline: Union[dict, CompiledGuideline], dataset: ColumnarDataset) -> np.ndarray:
+    compiled = as_compiled(baseline or {})
+    mask = _lookup_baseline(compiled, dataset)
+    if mask is None:
+        memo: Dict[Any, np.ndarray] = {}
+        _load_conditions(dataset, compiled.conditions, memo)
+        mask = guideline_mask(dataset, compiled, memo)
+        CONDITION_STORE.save(dataset.fingerprint, compiled.conditions, memo)
+        _store_baseline(compiled, dataset, mask)
+    return mask
 
 def get_baseline_results(baseline: dict, submissions: List[dict]) -> List[bool]:
-    if not baseline or not baseline.get("conditions", {}).get("conditions"):
-        return [False] * len(submissions)
-    
-    baseline_id = baseline.get('id')
-    if baseline_id in BASELINE_CACHE:
-        return BASELINE_CACHE[baseline_id]
-    
-    results = [evaluate_guideline(submission, baseline) for submission in submissions]
-    BASELINE_CACHE[baseline_id] = results
-    return results
+    return baseline_mask(baseline, as_dataset(submissions)).tolist()
+
+def _incremental_memo(dataset: ColumnarDataset,
+                      baseline: CompiledGuideline,
+                      candidates: Sequence[CompiledGuideline],
+                      baseline_results: Optional[np.ndarray]) -> Tuple[Dict[Any, np.ndarray], np.ndarray]:
+    """
+    Resolves the baseline and seeds a memo with each candidate's result, derived from the
+    baseline with ``delta_mask`` where the candidate only edits some of its conditions.
+    """
+    memo: Dict[Any, np.ndarray] = {}
+    conditions = _conditions([baseline, *candidates])
+    _load_conditions(dataset, conditions, memo)
+    if baseline_results is None:
+        baseline_results = guideline_mask(dataset, baseline, memo)
+    for modified in candidates:
+        result = delta_mask(dataset, baseline, baseline_results, modified, memo)
+        if result is not None:
+            memo[modified.key] = result
+    CONDITION_STORE.save(dataset.fingerprint, conditions, memo)
+    return memo, baseline_results
+
+def _evaluate_chunk(dataset: ColumnarDataset,
+                    baseline: CompiledGuideline,
+                    candidates: Sequence[CompiledGuideline],
+                    engine: str,
+                    immediate_cutoff: datetime,
+                    baseline_results: Optional[np.ndarray] = None,
+                    offset: int = 0,
+                    memo: Optional[Dict[Any, np.ndarray]] = None) -> Tuple[List[ImpactAggregate], np.ndarray]:
+    aggregates = [ImpactAggregate(immediate_cutoff) for _ in candidates]
+    for aggregate in aggregates:
+        aggregate.total_submissions = len(dataset)
+
+    if engine == "columnar":
+        # Candidates usually share most of their conditions; each distinct one is evaluated once.
+        memo = {} if memo is None else memo
+        conditions = _conditions([baseline, *candidates])
+        _load_conditions(dataset, conditions, memo)
+        if baseline_results is None:
+            with stage("baseline"):
+                baseline_results = guideline_mask(dataset, baseline, memo)
+        for aggregate, modified in zip(aggregates, candidates):
+            with stage("modified"):
+                modified_results = guideline_mask(dataset, modified, memo)
+            with stage("near_miss"):
+                near_misses = near_miss_distances(dataset, modified, matched=modified_results, memo=memo)
+                near_miss_ids = dataset.column("submission_id").take(np.flatnonzero(~np.isnan(near_misses)))
+            with stage("aggregate"):
+                aggregate.add_masks(dataset.dimensions, baseline_results, modified_results, near_misses,
+                                    near_miss_ids, offset)
+        CONDITION_STORE.save(dataset.fingerprint, conditions, memo)
+    else:
+        submissions = dataset.submissions
+        if baseline_results is None:
+            with stage("baseline"):
+                baseline_results = np.fromiter((baseline(sub) for sub in submissions), dtype=bool,
+                                               count=len(submissions))
+        with stage("rows"):
+            for i, sub in enumerate(submissions):
+                for aggregate, modified in zip(aggregates, candidates):
+                    aggregate.add(sub, bool(baseline_results[i]), modified(sub), near_miss_score(sub, modified),
+                                  offset + i)
+    return aggregates, baseline_results
+
+def _evaluate_process_chunk(dataset: ColumnarDataset,
+                            start: int,
+                            stop: int,
+                            baseline_key: str,
+                            candidate_keys: Sequence[str],
+                            engine: str,
+                            immediate_cutoff: datetime,
+                            baseline_bits: Optional[Bitset]) -> Tuple[List[ImpactAggregate], Bitset]:
+    aggregates, baseline_results = _evaluate_chunk(
+        dataset.slice(start, stop),
+        compile_canonical(baseline_key),
+        [compile_canonical(key) for key in candidate_keys],
+        engine,
+        immediate_cutoff,
+        baseline_bits.to_mask() if baseline_bits is not None else None,
+        start,
+    )
+    return aggregates, Bitset.from_mask(baseline_results)
+
+def _chunk_bounds(total: int, chunk_size: int) -> List[Tuple[int, int]]:
+    return [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)] or [(0, 0)]
+
+def _growing_bounds(total: int, first_chunk_size: int, chunk_size: int) -> List[Tuple[int, int]]:
+    # Chunks double from ``first_chunk_size`` up to ``chunk_size``.
+    bounds, start, size = [], 0, first_chunk_size
+    while start < total:
+        bounds.append((start, min(start + size, total)))
+        start, size = bounds[-1][1], min(size * 2, chunk_size)
+    return bounds or [(0, 0)]
+
+def _run_chunks(dataset: ColumnarDataset,
+                baseline: CompiledGuideline,
+                candidates: Sequence[CompiledGuideline],
+                engine: str,
+                backend: str,
+                chunk_size: Optional[int],
+                max_workers: Optional[int]) -> List[ImpactAggregate]:
+    immediate_cutoff = datetime.now() - IMMEDIATE_WINDOW
+    cached_baseline = _lookup_baseline(baseline, dataset)
+
+    if backend == "serial":
+        memo = None
+        baseline_results = cached_baseline
+        if engine == "columnar":
+            with stage("conditions"):
+                memo, baseline_results = _incremental_memo(dataset, baseline, candidates, cached_baseline)
+        partials = [_evaluate_chunk(dataset, baseline, candidates, engine, immediate_cutoff, baseline_results,
+                                    memo=memo)]
+    else:
+        workers = max_workers or os.cpu_count() or 1
+        chunk_size = chunk_size or max(MIN_CHUNK_SIZE, -(-len(dataset) // (workers * 4)))
+        bounds = _chunk_bounds(len(dataset), chunk_size)
+
+        def run(start: int, stop: int) -> Tuple[List[ImpactAggregate], np.ndarray]:
+            chunk_baseline = cached_baseline[start:stop] if cached_baseline is not None else None
+            return _evaluate_chunk(dataset.slice(start, stop), baseline, candidates, engine,
+                                   immediate_cutoff, chunk_baseline, start)
+
+        if backend == "threads":
+            with stage("pool"), concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                partials = list(executor.map(run, *zip(*bounds)))
+        else:
+            candidate_keys = [modified.key for modified in candidates]
+            with stage("pool"):
+                try:
+                    futures = PROCESS_POOL.submit(dataset, workers, _evaluate_process_chunk, [
+                        (start, stop, baseline.key, candidate_keys, engine, immediate_cutoff,
+                         Bitset.from_mask(cached_baseline[start:stop]) if cached_baseline is not None else None)
+                        for start, stop in bounds
+                    ])
+                    partials = [(aggregates, bits.to_mask()) for aggregates, bits in (f.result() for f in futures)]
+                except BrokenProcessPool:
+                    # A worker died (e.g. out of memory): this call runs here, the next starts a new pool.
+                    PROCESS_POOL.reset()
+                    partials = [run(start, stop) for start, stop in bounds]
+
+    with stage("merge"):
+        aggregates = [ImpactAggregate(immediate_cutoff) for _ in candidates]
+        for chunk_aggregates, _ in partials:
+            for aggregate, partial in zip(aggregates, chunk_aggregates):
+                aggregate.merge(partial)
+        if cached_baseline is None:
+            _store_baseline(baseline, dataset, np.concatenate([chunk for _, chunk in partials]))
+    return aggregates
+
+def _check_execution(engine: str, backend: str, mode: str = "exact") -> None:
+    if mode not in SIMULATION_MODES:
+        raise ValueError(f"Unknown simulation mode: {mode}")
+    if engine not in EVALUATION_ENGINES:
+        raise ValueError(f"Unknown evaluation engine: {engine}")
+    if backend not in EXECUTION_BACKENDS:
+        raise ValueError(f"Unknown execution backend: {backend}")
 
 def analyze_impact_advanced(submissions: List[dict],
                             baseline: dict,
-                            modified: dict) -> Dict[str, Any]:
-    total_submissions = len(submissions)
-    outcome_changes = 0
-    breakdown_by_industry = {}
-    breakdown_by_risk_factor = {}
-    breakdown_by_company_size = {}
-    breakdown_by_location = {}
-    time_impact = {"immediate": 0, "gradual": 0}
-    financial_impact = 0.0
-    near_miss_submissions = []
-
-    immediate_cutoff = datetime.now() - timedelta(days=180)
-
-    baseline_results = get_baseline_results(baseline, submissions)
-
-    def process_submission(index: int, submission: dict) -> Dict[str, Any]:
-        baseline_result = baseline_results[index]
-        modified_result = evaluate_guideline(submission, modified)
-        near_miss = evaluate_near_miss(submission, modified)
-        return {
-            "baseline": baseline_result,
-            "modified": modified_result,
-            "near_miss": near_miss,
-            "submission": submission
-        }
-
-    results = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = {executor.submit(process_submission, idx, sub): idx for idx, sub in enumerate(submissions)}
-        for future in concurrent.futures.as_completed(futures):
-            results.append(future.result())
-
-    for res in results:
-        sub = res["submission"]
-        if res["baseline"] != res["modified"]:
-            outcome_changes += 1
-
-            industry = sub.get("company_data", {}).get("industry", "unknown")
-            breakdown_by_industry[industry] = breakdown_by_industry.get(industry, 0) + 1
-
-            for factor in sub.get("risk_profile", {}).get("risk_factors", []):
-                breakdown_by_risk_factor[factor] = breakdown_by_risk_factor.get(factor, 0) + 1
-
-            employees = sub.get("company_data", {}).get("employees", 0)
-            if employees < 50:
-                size = "small"
-            elif employees < 250:
-                size = "medium"
-            else:
-                size = "large"
-            breakdown_by_company_size[size] = breakdown_by_company_size.get(size, 0) + 1
-
-            location = sub.get("company_data", {}).get("location", "unknown")
-            breakdown_by_location[location] = breakdown_by_location.get(location, 0) + 1
-
-            try:
-                sub_date = datetime.strptime(sub.get("submission_date"), "%Y-%m-%d")
-                if sub_date >= immediate_cutoff:
-                    time_impact["immediate"] += 1
-                else:
-                    time_impact["gradual"] += 1
-            except Exception:
-                pass
-
-            revenue = sub.get("financials", {}).get("revenue", 0)
-            if res["modified"] and not res["baseline"]:
-                financial_impact += revenue
-            elif res["baseline"] and not res["modified"]:
-                financial_impact -= revenue
-
-        if res["near_miss"]:
-            near_miss_submissions.append(sub.get("submission_id"))
-
-    outcome_change_percentage = (outcome_changes / total_submissions * 100) if total_submissions else 0.0
+                            modified: dict,
+                            engine: str = "columnar",
+                            backend: str = "serial",
+                            chunk_size: Optional[int] = None,
+                            max_workers: Optional[int] = None,
+                            mode: str = "exact") -> Dict[str, Any]:
+    """
+    Compares how ``baseline`` and ``modified`` classify every submission.
 
-    return {
-        "total_submissions": total_submissions,
-        "outcome_changes": outcome_changes,
-        "outcome_change_percentage": outcome_change_percentage,
-        "breakdown_by_industry": breakdown_by_industry,
-        "breakdown_by_risk_factor": breakdown_by_risk_factor,
-        "breakdown_by_company_size": breakdown_by_company_size,
-        "breakdown_by_location": breakdown_by_location,
-        "time_impact": time_impact,
-        "financial_impact": financial_impact,
-        "near_miss_submissions": near_miss_submissions,
-    }
+    ``engine="columnar"`` (the default) evaluates whole columns with NumPy masks; ``"rows"``
+    evaluates one submission dict at a time. Both produce the same report.
+    ``backend`` selects how the work is executed: ``"serial"`` in the calling thread,
+    ``"threads"`` or ``"processes"`` over chunks of ``chunk_size`` submissions whose partial
+    aggregates are merged here.
+    ``submissions`` may be a list of dicts or a prepared ``ColumnarDataset``.
+    ``mode="estimate"`` evaluates the stratified sample of the dataset instead (see
+    ``estimate_impact``).
+    """
+    _check_execution(engine, backend, mode)
+    dataset = as_dataset(submissions)
+    if mode == "estimate":
+        return estimate_impact(dataset, baseline, modified)
+    count("rows", len(dataset))
+    [aggregate] = _run_chunks(dataset, as_compiled(baseline or {}), [as_compiled(modified)],
+                              engine, backend, chunk_size, max_workers)
+    with stage("report"):
+        return aggregate.to_report()
+
+def iter_impact_aggregates(submissions: List[dict],
+                           baseline: dict,
+                           modified: dict,
+                           chunk_size: Optional[int] = None,
+                           first_chunk_size: Optional[int] = None) -> Iterator[Tuple[int, ImpactAggregate]]:
+    """
+    Runs ``analyze_impact_advanced`` chunk by chunk in the calling thread, yielding the number
+    of submissions processed so far and the running aggregate after each chunk of
+    ``chunk_size`` submissions; with ``first_chunk_size``, chunks grow from that size, so the
+    first result comes early. The report of the last aggregate equals the one
+    ``analyze_impact_advanced`` returns; stopping early discards the work.
+    """
+    dataset = as_dataset(submissions)
+    compiled_baseline, compiled = as_compiled(baseline or {}), as_compiled(modified)
+    immediate_cutoff = datetime.now() - IMMEDIATE_WINDOW
+    cached_baseline = _lookup_baseline(compiled_baseline, dataset)
+    aggregate = ImpactAggregate(immediate_cutoff)
+    baseline_chunks = []
+    chunk_size = chunk_size or MIN_CHUNK_SIZE
+    for start, stop in _growing_bounds(len(dataset), min(first_chunk_size or chunk_size, chunk_size), chunk_size):
+        chunk_baseline = cached_baseline[start:stop] if cached_baseline is not None else None
+        [partial], chunk_results = _evaluate_chunk(dataset.slice(start, stop), compiled_baseline, [compiled],
+                                                   "columnar", immediate_cutoff, chunk_baseline, start)
+        aggregate.merge(partial)
+        baseline_chunks.append(chunk_results)
+        yield stop, aggregate
+    if cached_baseline is None:
+        _store_baseline(compiled_baseline, dataset, np.concatenate(baseline_chunks))
+
+def analyze_impact_database(baseline: dict, modified: dict, margin: float = 0.1) -> Dict[str, Any]:
+    """
+    The ``analyze_impact_advanced`` report over the submissions imported into the database,
+    computed there by SQL rather than in memory (see ``sql.impact_report``).
+
+    Raises ``sql.UntranslatableCondition`` for conditions the database columns cannot evaluate.
+    """
+    return impact_report(baseline, modified, datetime.now() - IMMEDIATE_WINDOW, margin)
+
+def estimate_impact(submissions: List[dict],
+                    baseline: dict,
+                    modified: dict,
+                    sample_size: Optional[int] = None,
+                    confidence: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Estimates the ``analyze_impact_advanced`` report from a stratified sample of
+    ``sample_size`` submissions (by industry, location and company size), drawn once per
+    dataset version, with ``confidence`` intervals; the work grows with the sample, not
+    with the dataset. Estimates are exact when the sample covers the whole dataset.
+    """
+    dataset = as_dataset(submissions)
+    sample = stratified_sample(dataset, sample_size or settings.SIMULATION_SAMPLE_SIZE)
+    compiled = as_compiled(modified)
+    memo: Dict[Any, np.ndarray] = {}
+    count("rows", len(sample))
+    with stage("evaluate"):
+        _load_conditions(sample.dataset, compiled.conditions, memo)
+        modified_results = guideline_mask(sample.dataset, compiled, memo)
+        CONDITION_STORE.save(sample.dataset.fingerprint, compiled.conditions, memo)
+        baseline_results = baseline_mask(baseline, sample.dataset)
+    with stage("estimate"):
+        return estimate_report(sample, baseline_results, modified_results, datetime.now() - IMMEDIATE_WINDOW,
+                               confidence or settings.SIMULATION_ESTIMATE_CONFIDENCE)
+
+def analyze_impact_batch(submissions: List[dict],
+                         baseline: dict,
+                         candidates: Sequence[dict],
+                         engine: str = "columnar",
+                         backend: str = "serial",
+                         chunk_size: Optional[int] = None,
+                         max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Compares ``baseline`` with each of ``candidates`` in one pass over the submissions.
+
+    Returns one report per candidate, in order, each equal to what ``analyze_impact_advanced``
+    returns for that candidate. The baseline is resolved once, and conditions shared between
+    candidates are evaluated once per chunk.
+    """
+    _check_execution(engine, backend)
+    dataset = as_dataset(submissions)
+    aggregates = _run_chunks(dataset, as_compiled(baseline or {}), [as_compiled(modified) for modified in candidates],
+                             engine, backend, chunk_size, max_workers)
+    return [aggregate.to_report() for aggregate in aggregates]
+
+def analyze_threshold_sweep(submissions: List[dict],
+                            baseline: dict,
+                            modified: dict,
+                            condition_index: int,
+                            thresholds: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    Compares ``baseline`` with ``modified`` once for every value in ``thresholds`` substituted
+    into the ``>=``/``>``/``<=``/``<`` condition at ``condition_index``.
+
+    Returns one report per threshold, in order, each equal to the ``analyze_impact_advanced``
+    report for that threshold apart from ``near_miss_submissions``, which is omitted.
+    Raises ``ValueError`` for conditions or thresholds that cannot be swept.
+    """
+    dataset = as_dataset(submissions)
+    compiled = as_compiled(modified)
+    if not 0 <= condition_index < len(compiled.conditions):
+        raise ValueError(f"Guideline has no condition at index {condition_index}")
+    memo: Dict[Any, np.ndarray] = {}
+    _load_conditions(dataset, compiled.conditions, memo)
+    aggregates = sweep_aggregates(dataset, baseline_mask(baseline, dataset), compiled, condition_index,
+                                  thresholds, datetime.now() - IMMEDIATE_WINDOW, memo)
+    CONDITION_STORE.save(dataset.fingerprint, compiled.conditions, memo)
+    reports = []
+    for threshold, aggregate in zip(thresholds, aggregates):
+        report = aggregate.to_report()
+        del report["near_miss_submissions"]
+        reports.append({"threshold": threshold, **report})
+    return reports
+
+def analyze_portfolio_change(submissions: List[dict],
+                             guidelines: Sequence[dict],
+                             change: str,
+                             guideline: Optional[dict] = None,
+                             guideline_id: Any = None,
+                             as_of: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Compares the final ``action`` per submission of the guidelines active on ``as_of`` before
+    and after one rule is added, edited or removed (see ``portfolio.apply_change``).
+
+    Raises ``ValueError`` when the change does not apply to the active guidelines.
+    """
+    as_of = as_of or date.today()
+    dataset = as_dataset(submissions)
+    before, after = apply_change(guidelines, change, guideline, guideline_id, as_of)
+    conditions = _conditions([as_compiled(rule) for rule in (*before, *after)])
+    memo: Dict[Any, np.ndarray] = {}
+    _load_conditions(dataset, conditions, memo)
+    report = portfolio_impact(dataset, before, after, memo)
+    CONDITION_STORE.save(dataset.fingerprint, conditions, memo)
+    return {"as_of": as_of.isoformat(), "change": change, **report}
@@ -0,0 +1,227 @@
+import json
+import mmap
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .aggregation import DimensionKeys
+from .store import Shape, SubmissionStore, _CategoryField, _ListField, _NumberField, _ObjectField, _PackedStrings
+
+MAGIC = b"SIMSNAP\x00"
+FORMAT_VERSION = 1
+# Arrays start on cache-line boundaries so mapped views are aligned for every dtype.
+ALIGNMENT = 64
+
+_PREAMBLE = len(MAGIC) + 8
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _is_json_value(value: Any) -> bool:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return True
+    if isinstance(value, list):
+        return all(_is_json_value(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_json_value(item) for key, item in value.items())
+    return False
+
+
+def _json_values(values: List[Any]) -> List[Any]:
+    if not _is_json_value(values):
+        raise ValueError("Only JSON values can be written to a snapshot.")
+    return values
+
+
+def _shape_to_json(shape: Shape) -> Any:
+    if shape is None:
+        return None
+    return [[key, _shape_to_json(child)] for key, child in shape]
+
+
+def _shape_from_json(shape: Any) -> Shape:
+    if shape is None:
+        return None
+    return tuple((key, _shape_from_json(child)) for key, child in shape)
+
+
+@dataclass
+class Snapshot:
+    store: SubmissionStore
+    # Version of the data source the snapshot was built from, e.g. ``utils.file_version``.
+    version: Optional[str]
+    dimensions: Optional[DimensionKeys] = None
+
+
+class _Writer:
+    def __init__(self):
+        self.arrays: List[Tuple[int, np.ndarray]] = []
+        self.size = 0
+
+    def array(self, values: np.ndarray) -> Dict[str, Any]:
+        values = np.ascontiguousarray(values)
+        offset = _align(self.size)
+        self.arrays.append((offset, values))
+        self.size = offset + values.nbytes
+        return {"offset": offset, "dtype": values.dtype.str, "length": len(values)}
+
+    def field(self, field) -> Dict[str, Any]:
+        # Arrays are written in the dtypes the engine reads, so columns of a mapped snapshot are
+        # views of the mapping rather than per-process converted copies.
+        if not isinstance(field, _ObjectField):
+            field = field.engine_ready()
+        if isinstance(field, _NumberField):
+            return {
+                "type": "number",
+                "values": self.array(field.values),
+                "null": self.array(field.null),
+                "integral": self.array(field.integral) if field.integral is not None else None,
+            }
+        if isinstance(field, _CategoryField):
+            categories = field.categories
+            if isinstance(categories, _PackedStrings):
+                packed = {"data": self.array(np.frombuffer(categories.data, dtype=np.uint8)),
+                          "offsets": self.array(categories.offsets)}
+                return {"type": "category", "codes": self.array(field.codes), "packed": packed}
+            return {"type": "category", "codes": self.array(field.codes), "categories": _json_values(categories)}
+        if isinstance(field, _ListField):
+            return {
+                "type": "list",
+                "offsets": self.array(field.offsets),
+                "items": self.array(field.items),
+                "vocabulary": _json_values(field.vocabulary),
+                "is_list": self.array(field.is_list),
+            }
+        return {"type": "object", "values": _json_values(field.values)}
+
+    def dimensions(self, dimensions: DimensionKeys) -> Dict[str, Any]:
+        return {
+            "industry_codes": self.array(dimensions.industry_codes),
+            "industry_labels": _json_values(dimensions.industry_labels),
+            "location_codes": self.array(dimensions.location_codes),
+            "location_labels": _json_values(dimensions.location_labels),
+            "size_codes": self.array(dimensions.size_codes),
+            "date_ordinals": self.array(dimensions.date_ordinals),
+            "revenue": self.array(dimensions.revenue),
+            "risk_offsets": self.array(dimensions.risk_offsets),
+            "risk_codes": self.array(dimensions.risk_codes),
+            "risk_labels": _json_values(dimensions.risk_labels),
+        }
+
+
+def write_snapshot(path: str, store: SubmissionStore, version: Optional[str] = None,
+                   dimensions: Optional[DimensionKeys] = None) -> None:
+    """
+    Writes ``store`` (and optionally its precomputed ``dimensions``) as a snapshot at ``path``.
+
+    The file is written next to ``path`` and moved over it with ``os.replace``, so readers see
+    either the previous snapshot or the new one, never a partial file; processes that mapped
+    the previous file keep reading it until they reopen. Raises ``ValueError`` for values that
+    are not JSON (the snapshot stores labels as JSON).
+    """
+    writer = _Writer()
+    header = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "length": len(store),
+        "shapes": _json_values([_shape_to_json(shape) for shape in store.shapes]),
+        "shape_codes": writer.array(store.shape_codes),
+        "fields": [{"path": list(path), **writer.field(field)} for path, field in store.fields.items()],
+        "dimensions": writer.dimensions(dimensions) if dimensions is not None else None,
+    }
+    encoded = json.dumps(header, allow_nan=True).encode("utf-8")
+    data_start = _align(_PREAMBLE + len(encoded))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(MAGIC + len(encoded).to_bytes(8, "little") + encoded)
+            for offset, values in writer.arrays:
+                file.seek(data_start + offset)
+                file.write(values.tobytes())
+            file.truncate(data_start + writer.size)
+            file.flush()
+            os.fsync(file.fileno())
+        # ``mkstemp`` creates the file private to its owner; workers may run as another user.
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def open_snapshot(path: str) -> Snapshot:
+    """
+    Maps the snapshot at ``path`` read-only. Its arrays, and the engine columns built on them,
+    are views of the mapping, so opening is independent of the data size and every process
+    mapping the file shares its pages. Only the labels of categories and lists are read into
+    each process, as Python lists.
+    Raises ``ValueError`` for files that are not snapshots of this format.
+    """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a submissions snapshot.")
+    header_length = int.from_bytes(buffer[len(MAGIC):_PREAMBLE], "little")
+    header = json.loads(buffer[_PREAMBLE:_PREAMBLE + header_length])
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {header.get('format')}")
+    data_start = _align(_PREAMBLE + header_length)
+
+    def array(ref: Dict[str, Any]) -> Optional[np.ndarray]:
+        if ref is None:
+            return None
+        if not ref["length"]:
+            return np.empty(0, dtype=np.dtype(ref["dtype"]))
+        return np.frombuffer(buffer, dtype=np.dtype(ref["dtype"]), count=ref["length"],
+                             offset=data_start + ref["offset"])
+
+    fields = {}
+    for spec in header["fields"]:
+        kind = spec["type"]
+        if kind == "number":
+            field = _NumberField(array(spec["values"]), array(spec["null"]), array(spec["integral"]))
+        elif kind == "category":
+            packed = spec.get("packed")
+            if packed is not None:
+                categories = _PackedStrings(array(packed["data"]).data, array(packed["offsets"]))
+            else:
+                categories = spec["categories"]
+            field = _CategoryField(array(spec["codes"]), categories)
+        elif kind == "list":
+            field = _ListField(array(spec["offsets"]), array(spec["items"]), spec["vocabulary"], array(spec["is_list"]))
+        else:
+            field = _ObjectField(spec["values"])
+        fields[tuple(spec["path"])] = field
+    store = SubmissionStore([_shape_from_json(shape) for shape in header["shapes"]], array(header["shape_codes"]),
+                            fields)
+
+    dimensions = None
+    spec = header.get("dimensions")
+    if spec is not None:
+        dimensions = DimensionKeys(
+            array(spec["industry_codes"]), spec["industry_labels"],
+            array(spec["location_codes"]), spec["location_labels"],
+            array(spec["size_codes"]),
+            array(spec["date_ordinals"]),
+            array(spec["revenue"]),
+            array(spec["risk_offsets"]),
+            array(spec["risk_codes"]), spec["risk_labels"],
+        )
+    return Snapshot(store, header.get("version"), dimensions)
+
+
+def snapshot_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """Changes whenever a snapshot is written at ``path``; ``None`` if there is none."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,389 @@
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, Exists, F, FloatField, IntegerField, Min, OuterRef, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils.dateparse import parse_date
+
+from .aggregation import COMPANY_SIZES, ImpactAggregate, _company_size, _date_ordinal, _revenue
+from .compiler import CompiledCondition, CompiledGuideline, as_compiled
+from .engine import is_plain_number
+from .models import NUMBER_FIELDS, RISK_FACTORS_FIELD, TEXT_FIELDS, Guideline, Submission, SubmissionRiskFactor
+from .operators import COMPARISON_OPERATORS, as_range, near_miss_scale
+
+IMPORT_BATCH_SIZE = 1000
+
+LOOKUPS = {">=": "gte", "<=": "lte", ">": "gt", "<": "lt"}
+
+# Matches no row; unlike ``Q(pk__in=[])`` it can be combined and negated inside ``When``.
+NEVER = Q(pk__isnull=True)
+
+
+class UntranslatableCondition(ValueError):
+    """A condition whose result the database columns cannot reproduce exactly."""
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _is_text(value: Any) -> bool:
+    return isinstance(value, str)
+
+
+def _resolve(submission: Any, path: List[str]) -> Any:
+    value = submission
+    for part in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _as_number(value: Any) -> Optional[float]:
+    if not _is_number(value):
+        return None
+    try:
+        return float(value)
+    except OverflowError:
+        return None
+
+
+def _as_dict(value: Any) -> dict:
+    return value if isinstance(value, dict) else {}
+
+
+def submission_rows(position: int, submission: dict) -> Tuple[Submission, List[SubmissionRiskFactor]]:
+    """The ``Submission`` row (with primary key ``position + 1``) and risk factor rows of a record."""
+    company = _as_dict(submission.get("company_data", {}))
+    ordinal = _date_ordinal(submission.get("submission_date"), {})
+    size = _company_size(company.get("employees", 0))
+    row = Submission(
+        id=position + 1,
+        has_risk_factors=isinstance(_resolve(submission, RISK_FACTORS_FIELD.split(".")), list),
+        industry_group=company.get("industry", "unknown"),
+        location_group=company.get("location", "unknown"),
+        company_size=size if size >= 0 else None,
+        submitted_on=date.fromordinal(ordinal) if ordinal >= 0 else None,
+        revenue_amount=_revenue(_as_dict(submission.get("financials", {})).get("revenue", 0)),
+        data=submission,
+    )
+    for field_path, column in TEXT_FIELDS.items():
+        value = _resolve(submission, field_path.split("."))
+        setattr(row, column, value if _is_text(value) else None)
+    for field_path, column in NUMBER_FIELDS.items():
+        setattr(row, column, _as_number(_resolve(submission, field_path.split("."))))
+
+    factors = _resolve(submission, RISK_FACTORS_FIELD.split("."))
+    risk_factors = [
+        SubmissionRiskFactor(submission_id=row.id, position=index, factor=factor)
+        for index, factor in enumerate(factors if isinstance(factors, list) else [])
+        if _is_text(factor)
+    ]
+    return row, risk_factors
+
+
+def _clear(*models) -> None:
+    # A plain DELETE; ``QuerySet.delete`` would load every row to collect cascades.
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+
+
+def import_submissions(records: Iterable[dict], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """
+    Replaces the stored submissions with ``records``, in order, inserting ``batch_size`` rows
+    at a time in one transaction. Returns the number of submissions imported.
+    """
+    count = 0
+    with transaction.atomic():
+        _clear(SubmissionRiskFactor, Submission)
+        rows, risk_factors = [], []
+        for count, record in enumerate(records, 1):
+            row, factors = submission_rows(count - 1, record)
+            rows.append(row)
+            risk_factors.extend(factors)
+            if len(rows) == batch_size:
+                Submission.objects.bulk_create(rows)
+                SubmissionRiskFactor.objects.bulk_create(risk_factors, batch_size=batch_size)
+                rows, risk_factors = [], []
+        Submission.objects.bulk_create(rows)
+        SubmissionRiskFactor.objects.bulk_create(risk_factors, batch_size=batch_size)
+    return count
+
+
+def import_guidelines(guidelines: Iterable[dict]) -> int:
+    """Replaces the stored guidelines with ``guidelines``. Returns the number imported."""
+    rows = []
+    for guideline in guidelines:
+        try:
+            effective_date = parse_date(str(guideline.get("effective_date")))
+        except ValueError:
+            effective_date = None
+        rows.append(Guideline(
+            guideline_id=guideline.get("id"),
+            version=guideline.get("version"),
+            priority=guideline.get("priority"),
+            effective_date=effective_date,
+            action=guideline.get("action"),
+            conditions=guideline.get("conditions", {}),
+            data=guideline,
+        ))
+    with transaction.atomic():
+        _clear(Guideline)
+        Guideline.objects.bulk_create(rows)
+    return len(rows)
+
+
+class ConditionTranslator:
+    """
+    Compiles guideline conditions into ``Q`` filters over ``Submission``.
+
+    Every filter reproduces the Python evaluation of ``operators.compile_operator``: equality
+    with a value of another type than the column's is checked against the JSON record, and
+    conditions on fields without a column, or comparisons the column type cannot answer for (a
+    number column compared with a string, say), raise ``UntranslatableCondition``.
+    ``contains_at_least`` becomes a weighted sum of ``EXISTS`` lookups in the risk factor
+    table, registered in ``aliases``, which must be added to the queryset with ``alias()``.
+    """
+
+    def __init__(self):
+        self.aliases: Dict[str, Any] = {}
+        self._filters: Dict[str, Q] = {}
+
+    def _alias(self, expression: Any) -> str:
+        name = f"_sql{len(self.aliases)}"
+        self.aliases[name] = expression
+        return name
+
+    def guideline(self, guideline: Union[dict, CompiledGuideline]) -> Q:
+        compiled = as_compiled(guideline)
+        if not compiled.conditions:
+            return NEVER
+        filters = [self.condition(cond) for cond in compiled.conditions]
+        combined = filters[0]
+        for condition_filter in filters[1:]:
+            combined = combined | condition_filter if compiled.logic == 'any' else combined & condition_filter
+        return combined
+
+    def condition(self, condition: CompiledCondition) -> Q:
+        if condition.key not in self._filters:
+            self._filters[condition.key] = self._translate(condition)
+        return self._filters[condition.key]
+
+    def _translate(self, condition: CompiledCondition) -> Q:
+        operator, value = condition.operator, condition.value
+        if condition.field == RISK_FACTORS_FIELD and operator == "contains_at_least":
+            return self._contains_at_least(value)
+        column, accepts = self._column(condition.field)
+        if operator == "equals" or operator == "in":
+            choices = value if operator == "in" and isinstance(value, list) else [value]
+            combined = NEVER
+            for choice in choices:
+                combined |= self._equals(condition, column, accepts, choice)
+            return combined
+        if operator in COMPARISON_OPERATORS or operator == "between":
+            try:
+                bounds = as_range(operator, value)
+            except (TypeError, ValueError):
+                return NEVER
+            if bounds is None:
+                return self._compare(condition, column, accepts, LOOKUPS[operator], value)
+            lower, upper, inclusive = bounds
+            return (self._compare(condition, column, accepts, "gte" if inclusive else "gt", lower)
+                    & self._compare(condition, column, accepts, "lte" if inclusive else "lt", upper))
+        if operator == "contains_at_least":
+            raise UntranslatableCondition(f"contains_at_least is only supported for {RISK_FACTORS_FIELD}")
+        return NEVER
+
+    @staticmethod
+    def _column(field_path: str):
+        if field_path in TEXT_FIELDS:
+            return TEXT_FIELDS[field_path], _is_text
+        if field_path in NUMBER_FIELDS:
+            return NUMBER_FIELDS[field_path], _is_number
+        raise UntranslatableCondition(f"No database column for field {field_path!r}")
+
+    @staticmethod
+    def _untranslatable(condition: CompiledCondition, value: Any) -> UntranslatableCondition:
+        return UntranslatableCondition(
+            f"Cannot compare {condition.field} with {value!r} ({type(value).__name__}) in the database"
+        )
+
+    def _equals(self, condition: CompiledCondition, column: str, accepts, value: Any) -> Q:
+        if value is None:
+            # Missing and null values both resolve to None; the column is also NULL for
+            # values of other types, so the original record decides.
+            path = "__".join(condition.path)
+            return Q(**{f"data__{path}": None}) | Q(**{f"data__{path}__isnull": True})
+        if not accepts(value):
+            # Only a value of the same JSON type can be equal, which the original record holds.
+            return Q(**{f"data__{'__'.join(condition.path)}": value})
+        return Q(**{column: value})
+
+    def _compare(self, condition: CompiledCondition, column: str, accepts, lookup: str, value: Any) -> Q:
+        if value is None:
+            return NEVER
+        if not accepts(value):
+            raise self._untranslatable(condition, value)
+        return Q(**{f"{column}__{lookup}": value})
+
+    def _contains_at_least(self, value: Any) -> Q:
+        if not isinstance(value, dict):
+            return NEVER
+        items = value.get("items", [])
+        threshold = value.get("threshold", 1)
+        if not isinstance(items, list) or not all(_is_text(item) for item in items):
+            raise UntranslatableCondition("contains_at_least items must be a list of strings in the database")
+        if not _is_number(threshold):
+            return NEVER
+        weights: Dict[str, int] = {}
+        for item in items:
+            weights[item] = weights.get(item, 0) + 1
+        # Each listed item counts once per occurrence in ``items``, whatever its repeats in the row.
+        present = [
+            Case(When(Exists(SubmissionRiskFactor.objects.filter(submission=OuterRef("pk"), factor=item)),
+                      then=Value(weight)), default=Value(0), output_field=IntegerField())
+            for item, weight in weights.items()
+        ]
+        if not present:
+            return Q(has_risk_factors=True) if threshold <= 0 else NEVER
+        total = present[0]
+        for weight in present[1:]:
+            total = total + weight
+        return Q(has_risk_factors=True, **{f"{self._alias(total)}__gte": threshold})
+
+    def violation(self, condition: CompiledCondition) -> Optional[Any]:
+        """
+        Expression of ``operators.near_miss_distance`` for a comparison condition on a number
+        column: the relative distance by which the row fails it, NULL when it passes.
+        """
+        column = NUMBER_FIELDS.get(condition.field)
+        if column is None:
+            return None
+        try:
+            bounds = as_range(condition.operator, condition.value)
+        except (TypeError, ValueError):
+            return None
+        if bounds is not None:
+            lower, upper, inclusive = bounds
+            if not (is_plain_number(lower) and is_plain_number(upper)):
+                return None
+            below = Q(**{f"{column}__{'lt' if inclusive else 'lte'}": lower})
+            above = Q(**{f"{column}__{'gt' if inclusive else 'gte'}": upper})
+            return Case(
+                When(below, then=(Value(float(lower)) - F(column)) / Value(float(near_miss_scale(lower)))),
+                When(above, then=(F(column) - Value(float(upper))) / Value(float(near_miss_scale(upper)))),
+                default=None, output_field=FloatField(),
+            )
+        value = condition.value
+        if condition.operator not in COMPARISON_OPERATORS or not is_plain_number(value):
+            return None
+        scale = Value(float(near_miss_scale(value)))
+        if condition.operator in (">=", ">"):
+            fails = Q(**{f"{column}__{'lt' if condition.operator == '>=' else 'lte'}": value})
+            distance = (Value(float(value)) - F(column)) / scale
+        else:
+            fails = Q(**{f"{column}__{'gt' if condition.operator == '<=' else 'gte'}": value})
+            distance = (F(column) - Value(float(value))) / scale
+        return Case(When(fails, then=distance), default=None, output_field=FloatField())
+
+    def near_miss(self, guideline: Union[dict, CompiledGuideline], margin: float) -> Optional[Tuple[Q, Any]]:
+        """
+        ``(filter, distance)`` selecting the rows that ``engine.near_miss_distances`` ranks,
+        given that ``guideline`` does not match them; ``None`` if it has no comparison conditions.
+        """
+        compiled = as_compiled(guideline)
+        near_filters, distances, conditions = [], [], []
+        for cond in compiled.conditions:
+            violation = self.violation(cond)
+            if violation is None:
+                conditions.append(self.condition(cond))
+                continue
+            distance = self._alias(violation)
+            near = self._alias(Case(When(Q(**{f"{distance}__lte": margin}), then=F(distance)),
+                                    default=None, output_field=FloatField()))
+            near_filters.append(Q(**{f"{near}__isnull": False}))
+            distances.append(F(near))
+            conditions.append(self.condition(cond) | near_filters[-1])
+        if not distances:
+            return None
+
+        near_filter = near_filters[0]
+        for other in near_filters[1:]:
+            near_filter |= other
+        if compiled.logic == 'any':
+            bounded = [Coalesce(distance, Value(float("inf"))) for distance in distances]
+            return near_filter, Least(*bounded) if len(bounded) > 1 else distances[0]
+        for condition_filter in conditions:
+            near_filter &= condition_filter
+        bounded = [Coalesce(distance, Value(-1.0)) for distance in distances]
+        return near_filter, Greatest(*bounded) if len(bounded) > 1 else distances[0]
+
+
+def _outcome(condition: Q) -> Case:
+    return Case(When(condition, then=Value(True)), default=Value(False))
+
+
+def impact_report(baseline: Union[dict, CompiledGuideline], modified: Union[dict, CompiledGuideline],
+                  immediate_cutoff: datetime, margin: float = 0.1, submissions=None) -> Dict[str, Any]:
+    """
+    The ``analyze_impact_advanced`` report over the stored submissions (or the ``submissions``
+    queryset), computed by the database: both guidelines become ``WHERE`` expressions and the
+    counts, breakdowns and near misses come from aggregate and ``GROUP BY`` queries.
+
+    Raises ``UntranslatableCondition`` for conditions the database cannot evaluate.
+    """
+    translator = ConditionTranslator()
+    baseline_filter = translator.guideline(baseline or {})
+    modified_filter = translator.guideline(modified)
+    near_miss = translator.near_miss(modified, margin)
+
+    submissions = Submission.objects.all() if submissions is None else submissions
+    rows = submissions.alias(**translator.aliases).alias(
+        baseline_result=_outcome(baseline_filter), modified_result=_outcome(modified_filter),
+    )
+    gained = Q(baseline_result=False, modified_result=True)
+    lost = Q(baseline_result=True, modified_result=False)
+    changed = rows.filter(gained | lost)
+
+    cutoff = immediate_cutoff
+    first_immediate = date.fromordinal(cutoff.toordinal() + (0 if cutoff.time() == time(0) else 1))
+    totals = rows.aggregate(
+        total=Count("id"),
+        changed=Count("id", filter=gained | lost),
+        immediate=Count("id", filter=(gained | lost) & Q(submitted_on__gte=first_immediate)),
+        gradual=Count("id", filter=(gained | lost) & Q(submitted_on__lt=first_immediate)),
+        gained=Sum("revenue_amount", filter=gained),
+        lost=Sum("revenue_amount", filter=lost),
+    )
+
+    aggregate = ImpactAggregate(immediate_cutoff)
+    aggregate.total_submissions = totals["total"]
+    aggregate.outcome_changes = totals["changed"]
+    aggregate.time_impact = {"immediate": totals["immediate"], "gradual": totals["gradual"]}
+    aggregate.financial_impact = float((totals["gained"] or 0.0) - (totals["lost"] or 0.0))
+    risk_factors = SubmissionRiskFactor.objects.filter(submission__in=changed.values("pk"))
+    for counter, queryset, key in (
+        (aggregate.breakdown_by_industry, changed, "industry_group"),
+        (aggregate.breakdown_by_location, changed, "location_group"),
+        (aggregate.breakdown_by_risk_factor, risk_factors, "factor"),
+    ):
+        # Groups in order of first appearance, as the in-memory breakdowns are.
+        groups = queryset.values(key).annotate(count=Count("id"), first=Min("id")).order_by("first")
+        for group in groups:
+            counter[group[key]] = group["count"]
+    for size, count in (changed.filter(company_size__isnull=False).values_list("company_size")
+                        .annotate(count=Count("id")).order_by("company_size")):
+        aggregate.breakdown_by_company_size[COMPANY_SIZES[size]] = count
+
+    if near_miss is not None:
+        near_filter, distance = near_miss
+        near_rows = rows.filter(near_filter, modified_result=False).annotate(distance=distance)
+        aggregate.near_misses = [
+            (missed_by, position, submission_id)
+            for missed_by, position, submission_id in near_rows.order_by("distance", "id").values_list(
+                "distance", "id", "data__submission_id")
+        ]
+    return aggregate.to_report()
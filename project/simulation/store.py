@@ -0,0 +1,471 @@
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .engine import (
+    MAX_EXACT_INT, CategoryColumn, Column, ListColumn, NumericColumn, ObjectColumn, _is_column_number, _is_hashable,
+    _value_key, build_column,
+)
+
+Path = Tuple[Any, ...]
+# A record's nesting: ``None`` for a leaf value, else the ``(key, shape)`` pairs of a dict in key order.
+Shape = Optional[Tuple[Tuple[Any, "Shape"], ...]]
+
+
+def _code_dtype(high: int) -> np.dtype:
+    """Smallest unsigned dtype holding ``0..high``."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if high <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _int_dtype(low: int, high: int) -> np.dtype:
+    """Smallest integer dtype holding ``low..high``."""
+    if low >= 0:
+        return _code_dtype(high)
+    for dtype in (np.int8, np.int16, np.int32):
+        if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _narrow(values: Union[array, np.ndarray], high: int) -> np.ndarray:
+    return np.asarray(values, dtype=np.int64).astype(_code_dtype(high))
+
+
+class _NumberField:
+    """
+    Numbers in an int array when every value is an int, else in a float array; ``integral``
+    marks the ints of a field that mixes both, so each value comes back with its own type.
+    """
+
+    def __init__(self, values: np.ndarray, null: np.ndarray, integral: Optional[np.ndarray] = None):
+        self.values = values
+        self.null = null
+        self.integral = integral
+
+    def __getitem__(self, row: int) -> Any:
+        if self.null[row]:
+            return None
+        value = self.values[row].item()
+        return int(value) if self.integral is not None and self.integral[row] else value
+
+    def to_pylist(self) -> List[Any]:
+        values = self.values.tolist()
+        if self.integral is not None:
+            values = [int(value) if integral else value for value, integral in zip(values, self.integral.tolist())]
+        if self.null.any():
+            values = [None if null else value for value, null in zip(values, self.null.tolist())]
+        return values
+
+    def slice(self, start: int, stop: int) -> "_NumberField":
+        integral = self.integral[start:stop] if self.integral is not None else None
+        return _NumberField(self.values[start:stop], self.null[start:stop], integral)
+
+    def to_column(self) -> NumericColumn:
+        if self.values.dtype == np.float64:
+            return NumericColumn(self.values, self.null)
+        return self.engine_ready().to_column()
+
+    def engine_ready(self) -> "_NumberField":
+        """The field with float64 values (NaN where null), which ``to_column`` uses as they are."""
+        if self.values.dtype == np.float64:
+            return self
+        numbers = self.values.astype(np.float64)
+        numbers[self.null] = np.nan
+        return _NumberField(numbers, self.null, ~self.null)
+
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.null.nbytes + (self.integral.nbytes if self.integral is not None else 0)
+
+
+class _PackedStrings:
+    """Strings as one UTF-8 buffer (``bytes`` or a view of a mapped file) and their offsets in it."""
+
+    def __init__(self, data: Union[bytes, memoryview], offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, strings: List[str]) -> "_PackedStrings":
+        encoded = [string.encode("utf-8", "surrogatepass") for string in strings]
+        offsets = np.cumsum([0, *map(len, encoded)])
+        return cls(b"".join(encoded), offsets.astype(_code_dtype(int(offsets[-1]))))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code: int) -> str:
+        return str(self.data[self.offsets[code]:self.offsets[code + 1]], "utf-8", "surrogatepass")
+
+    def tolist(self) -> List[str]:
+        data, offsets = self.data, self.offsets.tolist()
+        return [str(data[offsets[code]:offsets[code + 1]], "utf-8", "surrogatepass") for code in range(len(self))]
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.nbytes
+
+    def __reduce__(self):
+        # Views of a mapped file cannot be pickled; worker processes receive a copy.
+        return _PackedStrings, (bytes(self.data), self.offsets)
+
+
+class _CategoryField:
+    """Hashable values as codes into their distinct values; distinct strings are packed."""
+
+    def __init__(self, codes: np.ndarray, categories: Union[List[Any], _PackedStrings]):
+        self.codes = codes
+        self.categories = categories
+
+    def labels(self) -> List[Any]:
+        if isinstance(self.categories, _PackedStrings):
+            return self.categories.tolist()
+        return self.categories
+
+    def __getitem__(self, row: int) -> Any:
+        return self.categories[self.codes[row]]
+
+    def to_pylist(self) -> List[Any]:
+        categories = self.labels()
+        return [categories[code] for code in self.codes.tolist()]
+
+    def slice(self, start: int, stop: int) -> "_CategoryField":
+        return _CategoryField(self.codes[start:stop], self.categories)
+
+    def to_column(self) -> CategoryColumn:
+        return CategoryColumn(self.codes.astype(np.int32, copy=False), self.labels())
+
+    def engine_ready(self) -> "_CategoryField":
+        """The field with int32 codes, which ``to_column`` uses as they are."""
+        return _CategoryField(self.codes.astype(np.int32, copy=False), self.categories)
+
+    def nbytes(self) -> int:
+        if isinstance(self.categories, _PackedStrings):
+            return self.codes.nbytes + self.categories.nbytes()
+        return self.codes.nbytes + sum(sys.getsizeof(value) for value in self.categories)
+
+
+class _ListField:
+    """Lists of hashable items as offsets into a flat array of item codes."""
+
+    def __init__(self, offsets: np.ndarray, items: np.ndarray, vocabulary: List[Any], is_list: np.ndarray):
+        self.offsets = offsets
+        self.items = items
+        self.vocabulary = vocabulary
+        self.is_list = is_list
+
+    def __getitem__(self, row: int) -> Any:
+        if not self.is_list[row]:
+            return None
+        vocabulary = self.vocabulary
+        return [vocabulary[code] for code in self.items[self.offsets[row]:self.offsets[row + 1]].tolist()]
+
+    def to_pylist(self) -> List[Any]:
+        vocabulary = self.vocabulary
+        items = self.items.tolist()
+        offsets = self.offsets.tolist()
+        return [
+            [vocabulary[code] for code in items[offsets[row]:offsets[row + 1]]] if is_list else None
+            for row, is_list in enumerate(self.is_list.tolist())
+        ]
+
+    def slice(self, start: int, stop: int) -> "_ListField":
+        offsets = self.offsets[start:stop + 1]
+        return _ListField(offsets - offsets[0], self.items[offsets[0]:offsets[-1]], self.vocabulary,
+                          self.is_list[start:stop])
+
+    def to_column(self) -> ListColumn:
+        return ListColumn(self.offsets.astype(np.int64, copy=False), self.items.astype(np.int32, copy=False),
+                          self.vocabulary, self.is_list)
+
+    def engine_ready(self) -> "_ListField":
+        """The field with int64 offsets and int32 item codes, which ``to_column`` uses as they are."""
+        return _ListField(self.offsets.astype(np.int64, copy=False), self.items.astype(np.int32, copy=False),
+                          self.vocabulary, self.is_list)
+
+    def nbytes(self) -> int:
+        return (self.offsets.nbytes + self.items.nbytes + self.is_list.nbytes
+                + sum(sys.getsizeof(value) for value in self.vocabulary))
+
+
+class _ObjectField:
+    def __init__(self, values: List[Any]):
+        self.values = values
+
+    def __getitem__(self, row: int) -> Any:
+        return self.values[row]
+
+    def to_pylist(self) -> List[Any]:
+        return self.values
+
+    def slice(self, start: int, stop: int) -> "_ObjectField":
+        return _ObjectField(self.values[start:stop])
+
+    def to_column(self) -> ObjectColumn:
+        return ObjectColumn(self.values)
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.values) + sum(sys.getsizeof(value) for value in self.values)
+
+
+Field = Union[_NumberField, _CategoryField, _ListField, _ObjectField]
+
+
+def _is_item_list(value: Any) -> bool:
+    return isinstance(value, list) and all(_is_hashable(item) for item in value)
+
+
+class _FieldBuilder:
+    """
+    Types and encodes one field as its values arrive, following the rules of
+    ``engine.build_column``: numbers while every value is a number, lists while every value is
+    a list of hashable items, dictionary codes while every value is hashable, else objects.
+    A value that breaks the current type re-encodes the values seen so far, which happens at
+    most a few times per field; otherwise only compact arrays grow.
+    """
+
+    def __init__(self):
+        self._start("number")
+
+    def _start(self, mode: str) -> None:
+        self.mode = mode
+        self.length = 0
+        self.append: Callable[[Any], None] = getattr(self, f"_append_{mode}")
+        self.null, self.numbers, self.integral = array("b"), array("d"), array("b")
+        self.codes, self.labels, self._label_codes = array("q"), [], {}
+        self.offsets, self.items, self.is_list = array("q", [0]), array("q"), array("b")
+        self.objects: List[Any] = []
+
+    def _switch(self, mode: str) -> None:
+        values = self.build().to_pylist()
+        self._start(mode)
+        for value in values:
+            self.append(value)
+
+    def _code(self, value: Any) -> int:
+        # Strings only ever equal strings, so they skip the ``_value_key`` tuple.
+        key = value if value.__class__ is str else _value_key(value)
+        code = self._label_codes.get(key)
+        if code is None:
+            code = self._label_codes[key] = len(self.labels)
+            self.labels.append(value)
+        return code
+
+    def _append_number(self, value: Any) -> None:
+        cls = value.__class__
+        if cls is float or value is None:
+            integral = False
+        elif cls is int and -MAX_EXACT_INT <= value <= MAX_EXACT_INT:
+            integral = True
+        elif _is_column_number(value):
+            integral = isinstance(value, int)
+        else:
+            if _is_item_list(value) and self.null.count(0) == 0:
+                self._switch("list")
+            else:
+                self._switch("category" if _is_hashable(value) else "object")
+            self.append(value)
+            return
+        self.null.append(value is None)
+        self.numbers.append(0.0 if value is None else value)
+        self.integral.append(integral)
+        self.length += 1
+
+    def _append_category(self, value: Any) -> None:
+        if value.__class__ is not str and not _is_hashable(value):
+            self._switch("object")
+            self.append(value)
+            return
+        self.codes.append(self._code(value))
+        self.length += 1
+
+    def _append_list(self, value: Any) -> None:
+        if value is not None and not _is_item_list(value):
+            self._switch("object")
+            self.append(value)
+            return
+        if value:
+            self.items.extend([self._code(item) for item in value])
+        self.offsets.append(len(self.items))
+        self.is_list.append(value is not None)
+        self.length += 1
+
+    def _append_object(self, value: Any) -> None:
+        self.objects.append(value)
+        self.length += 1
+
+    def pad(self, length: int) -> None:
+        """Rows without this field read as None, as ``engine.extract_field`` reads them."""
+        for _ in range(length - self.length):
+            self.append(None)
+
+    def build(self) -> "Field":
+        if self.mode == "number":
+            null = np.frombuffer(self.null, dtype=bool).copy()
+            numbers = np.frombuffer(self.numbers, dtype=np.float64).copy()
+            integral = np.frombuffer(self.integral, dtype=bool)
+            if integral[~null].all():
+                values = numbers.astype(np.int64)
+                low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+                return _NumberField(values.astype(_int_dtype(low, high)), null)
+            numbers[null] = np.nan
+            if not integral[~null].any():
+                return _NumberField(numbers, null)
+            return _NumberField(numbers, null, integral.copy())
+        if self.mode == "category":
+            labels = self.labels
+            codes = _narrow(self.codes, len(labels) - 1)
+            if all(label.__class__ is str for label in labels):
+                return _CategoryField(codes, _PackedStrings.build(labels))
+            return _CategoryField(codes, labels)
+        if self.mode == "list":
+            return _ListField(_narrow(self.offsets, self.offsets[-1]), _narrow(self.items, len(self.labels) - 1),
+                              self.labels, np.frombuffer(self.is_list, dtype=bool).copy())
+        return _ObjectField(self.objects)
+
+
+def _walk(value: Any, leaves: List[Any]) -> Shape:
+    if not isinstance(value, dict):
+        leaves.append(value)
+        return None
+    return tuple([(key, _walk(child, leaves)) for key, child in value.items()])
+
+
+def _leaf_paths(shape: Shape, path: Path = ()) -> Iterator[Path]:
+    if shape is None:
+        yield path
+        return
+    for key, child in shape:
+        yield from _leaf_paths(child, path + (key,))
+
+
+def _interior_paths(shape: Shape, path: Path, paths: set) -> None:
+    if shape is not None:
+        paths.add(path)
+        for key, child in shape:
+            _interior_paths(child, path + (key,), paths)
+
+
+def _builder(shape: Shape, path: Path, getter: Callable[[Path], Callable[[int], Any]]) -> Callable[[int], Any]:
+    if shape is None:
+        return getter(path)
+    fields = [(key, _builder(child, path + (key,), getter)) for key, child in shape]
+    return lambda row: {key: build(row) for key, build in fields}
+
+
+class SubmissionStore(Sequence):
+    """
+    Submissions held as typed columns instead of nested dicts.
+
+    Every leaf path is one field: numbers in int or float arrays with a null mask, other
+    hashable values dictionary-encoded (distinct strings packed into one buffer), lists of
+    hashable items (``risk_factors``) as offsets into item codes and anything else as a plain
+    list. Each record keeps a code into the
+    distinct record shapes (nesting and key order), which tells a missing key from ``None``,
+    so indexing rebuilds a dict equal to the one stored.
+
+    Fields are typed like ``engine.build_column`` types them, and ``column`` hands their arrays
+    to a ``ColumnarDataset`` without extracting the field again.
+    """
+
+    def __init__(self, shapes: List[Shape], shape_codes: np.ndarray, fields: Dict[Path, Field]):
+        self.shapes = shapes
+        self.shape_codes = shape_codes
+        self.fields = fields
+        self._interior: set = set()
+        for shape in shapes:
+            _interior_paths(shape, (), self._interior)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any]) -> "SubmissionStore":
+        """
+        Encodes ``records`` in one pass. Only the compact field arrays are kept, so the records
+        can come from a stream and never all be in memory at once.
+        """
+        shapes: List[Shape] = []
+        # Each distinct shape maps to its code and the builders of its leaves in ``_walk`` order.
+        plans: Dict[Shape, Tuple[int, List[_FieldBuilder]]] = {}
+        shape_codes = array("q")
+        builders: Dict[Path, _FieldBuilder] = {}
+        for row, record in enumerate(records):
+            leaves: List[Any] = []
+            shape = _walk(record, leaves)
+            plan = plans.get(shape)
+            if plan is None:
+                plan = plans[shape] = len(shapes), [
+                    builders.setdefault(path, _FieldBuilder()) for path in _leaf_paths(shape)
+                ]
+                shapes.append(shape)
+            code, leaf_builders = plan
+            shape_codes.append(code)
+            for builder, value in zip(leaf_builders, leaves):
+                if builder.length < row:
+                    builder.pad(row)
+                builder.append(value)
+
+        fields = {}
+        for path, builder in builders.items():
+            builder.pad(len(shape_codes))
+            fields[path] = builder.build()
+        return cls(shapes, _narrow(shape_codes, len(shapes) - 1), fields)
+
+    def __len__(self) -> int:
+        return len(self.shape_codes)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            start, stop, step = row.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self.slice(start, stop)
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("submission index out of range")
+        shape = self.shapes[self.shape_codes[row]]
+        return _builder(shape, (), lambda path: self.fields[path].__getitem__)(row)
+
+    def __iter__(self) -> Iterator[Any]:
+        values: Dict[Path, List[Any]] = {}
+
+        def getter(path: Path) -> Callable[[int], Any]:
+            if path not in values:
+                values[path] = self.fields[path].to_pylist()
+            return values[path].__getitem__
+
+        builders = [_builder(shape, (), getter) for shape in self.shapes]
+        for row, code in enumerate(self.shape_codes.tolist()):
+            yield builders[code](row)
+
+    def to_dicts(self) -> List[Any]:
+        return list(self)
+
+    def slice(self, start: int, stop: int) -> "SubmissionStore":
+        part = SubmissionStore.__new__(SubmissionStore)
+        part.shapes = self.shapes
+        part.shape_codes = self.shape_codes[start:stop]
+        part.fields = {path: field.slice(start, stop) for path, field in self.fields.items()}
+        part._interior = self._interior
+        return part
+
+    def column(self, field_path: str) -> Optional[Column]:
+        """
+        The column for a dotted field path, built from the stored arrays. Returns ``None``
+        for paths that hold dicts in some record; those are extracted from rebuilt records.
+        """
+        path = tuple(field_path.split('.'))
+        if path in self._interior:
+            return None
+        field = self.fields.get(path)
+        if field is None:
+            return build_column([None] * len(self))
+        return field.to_column()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the fields, counting each distinct value once."""
+        return self.shape_codes.nbytes + sum(field.nbytes() for field in self.fields.values())
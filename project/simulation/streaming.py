@@ -0,0 +1,70 @@
+import json
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+
+from .engine import as_dataset
+from .services import MIN_CHUNK_SIZE, iter_impact_aggregates
+
+# Streams send about this many partial reports, whatever the dataset size.
+STREAM_UPDATES = 50
+# The first chunk is small so the first partial report arrives quickly.
+FIRST_CHUNK_SIZE = 2_000
+
+_DONE = object()
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One Server-Sent Event carrying ``data`` as JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+
+
+def iter_impact_events(submissions, baseline: dict, modified: dict, chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Server-Sent Events of a simulation: ``start`` with the number of submissions, a
+    ``partial`` report (without near misses) over the submissions processed so far after each
+    chunk, then the exact ``report``. Failures end the stream with an ``error`` event.
+    """
+    dataset = as_dataset(submissions)
+    total = len(dataset)
+    yield sse_event("start", {"total_submissions": total})
+    chunk_size = chunk_size or max(MIN_CHUNK_SIZE, -(-total // STREAM_UPDATES))
+    aggregate = None
+    try:
+        for processed, aggregate in iter_impact_aggregates(dataset, baseline, modified, chunk_size,
+                                                           first_chunk_size=FIRST_CHUNK_SIZE):
+            if processed < total:
+                yield sse_event("partial", aggregate.to_report(near_misses=False))
+        report = aggregate.to_report()
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+    yield sse_event("report", report)
+
+
+def iter_report_events(compute: Callable[[], Dict[str, Any]], total: int) -> Iterator[bytes]:
+    """The events of a simulation computed in one step: ``start``, then the ``report``."""
+    yield sse_event("start", {"total_submissions": total})
+    try:
+        report = compute()
+    except Exception as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+    yield sse_event("report", report)
+
+
+async def aiter_events(events: Iterator[bytes], thread_sensitive: bool = False) -> AsyncIterator[bytes]:
+    """
+    Serves a blocking event iterator to an ASGI server: each event is computed on a worker
+    thread, so the event loop sends every event as soon as it is ready. Iterators that use
+    the ORM need ``thread_sensitive=True``.
+    """
+    step = sync_to_async(next, thread_sensitive=thread_sensitive)
+    try:
+        while True:
+            event = await step(events, _DONE)
+            if event is _DONE:
+                return
+            yield event
+    finally:
+        events.close()
@@ -0,0 +1,176 @@
+from datetime import datetime, time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .aggregation import COMPANY_SIZES, DimensionKeys, ImpactAggregate
+from .compiler import CompiledGuideline, compile_canonical, canonical_json
+from .engine import ColumnarDataset, NumericColumn, guideline_mask, is_plain_number
+from .indexes import SortedIndex
+
+SWEEP_OPERATORS = (">=", ">", "<=", "<")
+TIME_IMPACT_LABELS = ("gradual", "immediate")
+
+
+def _recompile(guideline: CompiledGuideline, conditions: Sequence[dict]) -> CompiledGuideline:
+    return compile_canonical(canonical_json({"logic": guideline.logic, "conditions": list(conditions)}))
+
+
+def with_threshold(guideline: CompiledGuideline, condition_index: int, threshold: Any) -> CompiledGuideline:
+    """``guideline`` with the value of one condition replaced by ``threshold``."""
+    return _recompile(guideline, [
+        {"field": cond.field, "operator": cond.operator, "value": threshold if i == condition_index else cond.value}
+        for i, cond in enumerate(guideline.conditions)
+    ])
+
+
+def _labelled(counts: np.ndarray, labels: Sequence[Any]) -> Dict[Any, int]:
+    return {labels[code]: int(count) for code, count in enumerate(counts.tolist()) if count}
+
+
+class _Curve:
+    """
+    Counts of changed rows per category code, for every threshold.
+
+    Rows outside the sweep contribute a constant; swept rows are bucketed by the threshold
+    segment their sorted position falls in, so each threshold reads off prefix sums.
+    """
+
+    def __init__(self, codes: np.ndarray, rows: np.ndarray, labels: Sequence[Any], segments: int,
+                 constant: np.ndarray, row_segments: np.ndarray, baseline_results: np.ndarray):
+        # ``rows`` maps each code to its row; negative codes are not counted.
+        size = len(labels)
+        known = codes >= 0
+        codes, rows = codes[known], rows[known]
+        self.constant = np.bincount(codes[constant[rows]], minlength=size)
+        code_segments = row_segments[rows]
+        swept = code_segments >= 0
+        self.matched_prefix, self.unmatched_prefix = [
+            np.cumsum(np.bincount(code_segments[selected] * size + codes[selected],
+                                  minlength=segments * size).reshape(segments, size), axis=0)
+            for selected in (swept & baseline_results[rows], swept & ~baseline_results[rows])
+        ]
+
+    def changed(self, segment: int, suffix: bool) -> np.ndarray:
+        # Swept rows below the boundary fail the condition, rows from the boundary on pass it
+        # (or the reverse for ``<=``/``<``); a row changes when that differs from the baseline.
+        matched, unmatched = self.matched_prefix, self.unmatched_prefix
+        if suffix:
+            return self.constant + matched[segment] + unmatched[-1] - unmatched[segment]
+        return self.constant + unmatched[segment] + matched[-1] - matched[segment]
+
+
+def sweep_aggregates(dataset: ColumnarDataset,
+                     baseline_results: np.ndarray,
+                     guideline: CompiledGuideline,
+                     condition_index: int,
+                     thresholds: Sequence[Any],
+                     immediate_cutoff: datetime,
+                     memo: Optional[Dict[Any, np.ndarray]] = None) -> List[ImpactAggregate]:
+    """
+    Impact of ``guideline`` against ``baseline_results`` for every value of one condition.
+
+    The swept condition must be a ``>=``, ``>``, ``<=`` or ``<`` comparison. Over a numeric
+    column every threshold is answered from prefix sums over the swept rows sorted by value,
+    at a cost of one sort and one bucketing pass; other columns fall back to evaluating each
+    threshold. Near misses are not computed.
+    """
+    swept_condition = guideline.conditions[condition_index]
+    if swept_condition.operator not in SWEEP_OPERATORS:
+        raise ValueError(f"Cannot sweep operator: {swept_condition.operator}")
+    if not all(is_plain_number(threshold) for threshold in thresholds):
+        raise ValueError("Sweep thresholds must be numbers.")
+
+    column = dataset.column(swept_condition.field)
+    if not isinstance(column, NumericColumn):
+        aggregates = []
+        for threshold in thresholds:
+            aggregate = ImpactAggregate(immediate_cutoff)
+            aggregate.total_submissions = len(dataset)
+            aggregate.add_masks(dataset.dimensions, baseline_results,
+                                guideline_mask(dataset, with_threshold(guideline, condition_index, threshold), memo),
+                                np.full(len(dataset), np.nan))
+            aggregates.append(aggregate)
+        return aggregates
+
+    # Rows decided by the other conditions alone do not depend on the threshold.
+    others = _recompile(guideline, [
+        {"field": cond.field, "operator": cond.operator, "value": cond.value}
+        for i, cond in enumerate(guideline.conditions) if i != condition_index
+    ])
+    decided_result = guideline.logic == 'any'
+    if not others.conditions:
+        decided = np.zeros(len(dataset), dtype=bool)
+    elif decided_result:
+        decided = guideline_mask(dataset, others, memo)
+    else:
+        decided = ~guideline_mask(dataset, others, memo)
+    swept = ~decided
+
+    index = column.index if column.index is not None else SortedIndex.build(column.values, column.null | decided)
+    order = index.order[swept[index.order]]
+    sorted_values = column.values[order]
+
+    suffix = swept_condition.operator in (">=", ">")
+    side = "left" if swept_condition.operator in (">=", "<") else "right"
+    boundaries = np.searchsorted(sorted_values, np.asarray(thresholds, dtype=np.float64), side=side)
+    unique_boundaries, threshold_segments = np.unique(boundaries, return_inverse=True)
+
+    # Segment ``s`` holds sorted positions in [unique_boundaries[s - 1], unique_boundaries[s]).
+    row_segments = np.full(len(dataset), -1, dtype=np.int64)
+    row_segments[order] = np.searchsorted(unique_boundaries, np.arange(len(order)), side="right")
+    segments = len(unique_boundaries) + 1
+    # Swept rows without a comparable value never pass the condition.
+    unsorted = swept & (row_segments < 0)
+    constant = (decided & (baseline_results != decided_result)) | (unsorted & baseline_results)
+
+    dimensions: DimensionKeys = dataset.dimensions
+    all_rows = np.arange(len(dataset))
+    cutoff = immediate_cutoff
+    first_immediate = cutoff.toordinal() + (0 if cutoff.time() == time(0) else 1)
+    time_codes = np.where(dimensions.date_ordinals < 0, -1, dimensions.date_ordinals >= first_immediate)
+
+    def curve(codes: np.ndarray, labels: Sequence[Any], rows: np.ndarray = all_rows) -> _Curve:
+        return _Curve(codes.astype(np.int64), rows, labels, segments, constant, row_segments, baseline_results)
+
+    industry = curve(dimensions.industry_codes, dimensions.industry_labels)
+    location = curve(dimensions.location_codes, dimensions.location_labels)
+    size = curve(dimensions.size_codes, COMPANY_SIZES)
+    timing = curve(time_codes, TIME_IMPACT_LABELS)
+    risk = curve(dimensions.risk_codes, dimensions.risk_labels, dimensions.risk_rows)
+
+    revenue = dimensions.revenue
+    if decided_result:
+        constant_financial = float(revenue[decided & ~baseline_results].sum())
+    else:
+        constant_financial = -float(revenue[decided & baseline_results].sum())
+    constant_financial -= float(revenue[unsorted & baseline_results].sum())
+    sorted_segments = row_segments[order]
+    sorted_revenue = revenue[order]
+    sorted_baseline = baseline_results[order]
+    matched_revenue = np.cumsum(np.bincount(sorted_segments[sorted_baseline], sorted_revenue[sorted_baseline],
+                                            minlength=segments))
+    unmatched_revenue = np.cumsum(np.bincount(sorted_segments[~sorted_baseline], sorted_revenue[~sorted_baseline],
+                                              minlength=segments))
+
+    aggregates = []
+    for segment in threshold_segments.tolist():
+        aggregate = ImpactAggregate(immediate_cutoff)
+        aggregate.total_submissions = len(dataset)
+        industry_changes = industry.changed(segment, suffix)
+        aggregate.outcome_changes = int(industry_changes.sum())
+        aggregate.breakdown_by_industry = _labelled(industry_changes, dimensions.industry_labels)
+        aggregate.breakdown_by_location = _labelled(location.changed(segment, suffix), dimensions.location_labels)
+        aggregate.breakdown_by_company_size = _labelled(size.changed(segment, suffix), COMPANY_SIZES)
+        aggregate.breakdown_by_risk_factor = _labelled(risk.changed(segment, suffix), dimensions.risk_labels)
+        gradual, immediate = timing.changed(segment, suffix).tolist()
+        aggregate.time_impact = {"immediate": immediate, "gradual": gradual}
+        if suffix:
+            gained = unmatched_revenue[-1] - unmatched_revenue[segment]
+            lost = matched_revenue[segment]
+        else:
+            gained = unmatched_revenue[segment]
+            lost = matched_revenue[-1] - matched_revenue[segment]
+        aggregate.financial_impact = constant_financial + float(gained - lost)
+        aggregates.append(aggregate)
+    return aggregates
@@ -0,0 +1,169 @@
+import json
+import os
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+# Submissions are generated in blocks of this many rows, each from its own seeded generator,
+# so the first N rows are the same whatever the total and a block can be generated alone.
+BLOCK_SIZE = 100_000
+
+INDUSTRIES = ["healthcare", "transportation", "energy", "financial", "manufacturing", "technology",
+              "construction", "pharmaceuticals", "retail"]
+SUB_INDUSTRIES = {
+    "healthcare": ["hospital", "telemedicine", "medical_devices"],
+    "financial": ["banking", "insurance", "asset_management", "fintech"],
+    "technology": ["cybersecurity", "saas", "hardware"],
+    "pharmaceuticals": ["pharmacy", "medical_devices"],
+    "retail": ["ecommerce"],
+}
+LOCATIONS = ["OH", "NY", "PA", "CA", "IL", "MI", "TX", "GA", "NC", "FL"]
+RISK_FACTORS = ["economic_downturn", "regulatory_changes", "cyber_threats", "pandemic", "supply_chain",
+                "environmental", "reputation_risk", "natural_disasters", "workplace_safety"]
+EMPLOYEES = [0, 1, 5, 10, 50, 100, 500, 1000, 5000]
+REVENUES = [0, 500000, 1000000.0, 4900000.0, 5000000.0, 9900000.0, 10000000.0, 24900000.0, 49900000.0,
+            50000000.0, 100000000.0]
+UNDERWRITING_RESULTS = ["WITHDRAWN", "PENDING", "APPROVED", "REJECTED"]
+ACTIONS = ["REJECT", "REVIEW", "APPROVE", "ADDITIONAL_DOCUMENTS"]
+COVERAGE_TYPES = ["property", "cyber", "professional", "liability"]
+FIRST_DATE = date(2022, 2, 1)
+DATE_RANGE = 1091
+
+
+def _uuid(raw: bytes) -> str:
+    return str(uuid.UUID(bytes=raw, version=4))
+
+
+def _sub_industry(industry: str, draw: float, pick: int):
+    specific = SUB_INDUSTRIES.get(industry)
+    if draw < 0.38:
+        return "general"
+    if draw < 0.755 or not specific:
+        return None
+    if draw < 0.955:
+        return specific[pick % len(specific)]
+    if draw < 0.975:
+        return f"outdated_{specific[pick % len(specific)]}"
+    return "legacy" if pick % 2 else "obsolete"
+
+
+def _block(seed: int, block: int, size: int) -> Iterator[Dict[str, Any]]:
+    # Every block draws BLOCK_SIZE rows, so its first ``size`` rows do not depend on ``size``.
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(0, block)))
+    ids = rng.bytes(16 * BLOCK_SIZE)
+    industries, sub_draws, sub_picks, employees, locations, years = (
+        rng.integers(len(INDUSTRIES), size=BLOCK_SIZE)[:size].tolist(),
+        rng.random(BLOCK_SIZE)[:size].tolist(),
+        rng.integers(12, size=BLOCK_SIZE)[:size].tolist(),
+        rng.integers(len(EMPLOYEES), size=BLOCK_SIZE)[:size].tolist(),
+        rng.integers(len(LOCATIONS), size=BLOCK_SIZE)[:size].tolist(),
+        rng.integers(0, 101, size=BLOCK_SIZE)[:size].tolist(),
+    )
+    claims = np.where(rng.random(BLOCK_SIZE) < 0.3, -1, rng.integers(0, 21, size=BLOCK_SIZE))[:size].tolist()
+    factor_counts = rng.integers(0, 6, size=BLOCK_SIZE)[:size].tolist()
+    factor_order = np.argsort(rng.random((BLOCK_SIZE, len(RISK_FACTORS))), axis=1)[:size].tolist()
+    credit = np.where(rng.random(BLOCK_SIZE) < 0.095, -1, rng.integers(300, 851, size=BLOCK_SIZE))[:size].tolist()
+    compliance, revenues, margins, assets, days, results = (
+        rng.integers(0, 11, size=BLOCK_SIZE)[:size].tolist(),
+        rng.integers(len(REVENUES), size=BLOCK_SIZE)[:size].tolist(),
+        np.round(rng.uniform(-0.32, 0.66, size=BLOCK_SIZE), 2)[:size].tolist(),
+        (rng.integers(0, 101, size=BLOCK_SIZE) * 1_000_000.0)[:size].tolist(),
+        rng.integers(0, DATE_RANGE, size=BLOCK_SIZE)[:size].tolist(),
+        rng.integers(len(UNDERWRITING_RESULTS), size=BLOCK_SIZE)[:size].tolist(),
+    )
+
+    for row, count in enumerate(factor_counts):
+        industry = INDUSTRIES[industries[row]]
+        yield {
+            "submission_id": _uuid(ids[16 * row:16 * row + 16]),
+            "company_data": {
+                "industry": industry,
+                "sub_industry": _sub_industry(industry, sub_draws[row], sub_picks[row]),
+                "employees": EMPLOYEES[employees[row]],
+                "location": LOCATIONS[locations[row]],
+                "years_in_business": years[row],
+                "prior_claims": None if claims[row] < 0 else claims[row],
+            },
+            "risk_profile": {
+                "risk_factors": [RISK_FACTORS[factor] for factor in factor_order[row][:count]],
+                "credit_score": None if credit[row] < 0 else credit[row],
+                "compliance_issues": compliance[row],
+            },
+            "financials": {
+                "revenue": REVENUES[revenues[row]],
+                "profit_margin": margins[row],
+                "assets": assets[row],
+            },
+            "submission_date": (FIRST_DATE + timedelta(days=days[row])).isoformat(),
+            "underwriting_result": UNDERWRITING_RESULTS[results[row]],
+        }
+
+
+def generate_submissions(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    ``count`` submissions shaped and distributed like ``data/submissions.json``, generated
+    lazily: the same ``seed`` always yields the same submissions, and a longer run starts
+    with the submissions of a shorter one.
+    """
+    for block in range(-(-count // BLOCK_SIZE)):
+        yield from _block(seed, block, min(BLOCK_SIZE, count - block * BLOCK_SIZE))
+
+
+def _condition(rng: np.random.Generator) -> Dict[str, Any]:
+    kind = rng.integers(6)
+    if kind == 0:
+        items = sorted(rng.choice(RISK_FACTORS, size=int(rng.integers(1, 4)), replace=False).tolist())
+        return {"field": "risk_profile.risk_factors", "operator": "contains_at_least",
+                "value": {"items": items, "threshold": int(rng.integers(1, len(items) + 1))}}
+    if kind == 1:
+        return {"field": "company_data.industry", "operator": "equals", "value": str(rng.choice(INDUSTRIES))}
+    if kind == 2:
+        industries = sorted(rng.choice(INDUSTRIES, size=int(rng.integers(2, 5)), replace=False).tolist())
+        return {"field": "company_data.industry", "operator": "in", "value": industries}
+    if kind == 3:
+        low, high = sorted(rng.choice(REVENUES[1:], size=2, replace=False).tolist())
+        return {"field": "financials.revenue", "operator": "between", "value": [low, high]}
+    if kind == 4:
+        return {"field": "financials.revenue", "operator": str(rng.choice([">=", "<=", ">", "<"])),
+                "value": int(rng.integers(1, 100)) * 1_000_000}
+    return {"field": "company_data.years_in_business", "operator": ">=", "value": int(rng.integers(1, 50))}
+
+
+def generate_guidelines(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """``count`` guidelines shaped like ``data/guidelines.json``, the same for the same ``seed``."""
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(1,)))
+    guidelines = []
+    for number in range(count):
+        guidelines.append({
+            "id": _uuid(rng.bytes(16)),
+            "name": f"Synthetic Underwriting Policy {number + 1}",
+            "conditions": {
+                "logic": str(rng.choice(["any", "all"])),
+                "conditions": [_condition(rng) for _ in range(int(rng.integers(1, 5)))],
+            },
+            "action": str(rng.choice(ACTIONS)),
+            "priority": int(rng.integers(1, 11)),
+            "effective_date": (FIRST_DATE + timedelta(days=int(rng.integers(DATE_RANGE)))).isoformat(),
+            "version": 1,
+            "coverage_types": sorted(rng.choice(COVERAGE_TYPES, size=int(rng.integers(1, 3)), replace=False).tolist()),
+        })
+    return guidelines
+
+
+def write_submissions(path: str, count: int, seed: int = 0) -> str:
+    """
+    Writes ``generate_submissions(count, seed)`` to ``path`` as JSON Lines, unless a file
+    from an earlier run is already there. The file is renamed into place once complete.
+    """
+    if not os.path.exists(path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.partial"
+        with open(partial, "w") as file:
+            for submission in generate_submissions(count, seed):
+                file.write(json.dumps(submission))
+                file.write("\n")
+        os.replace(partial, path)
+    return path
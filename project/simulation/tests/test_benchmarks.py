@@ -0,0 +1,89 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from simulation.benchmarks import compare
+from simulation.serializers import GuidelineSerializer
+from simulation.services import analyze_impact_advanced
+from simulation.synthetic import generate_guidelines, generate_submissions, write_submissions
+from simulation.utils import get_nested_value
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+
+def paths(record, prefix=""):
+    for key, value in record.items():
+        if isinstance(value, dict):
+            yield from paths(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}"
+
+
+class TestSyntheticData(unittest.TestCase):
+    def test_submissions(self):
+        with open(os.path.join(DATA_DIR, "submissions.json")) as file:
+            bundled = json.load(file)[0]
+        submissions = list(generate_submissions(2500, seed=3))
+        self.assertEqual(len(submissions), 2500)
+        for submission in submissions[:50]:
+            self.assertEqual(list(paths(submission)), list(paths(bundled)))
+        self.assertEqual(list(generate_submissions(2500, seed=3)), submissions)
+        self.assertEqual(list(generate_submissions(10, seed=3)), submissions[:10])
+        self.assertNotEqual(list(generate_submissions(10, seed=4)), submissions[:10])
+        self.assertEqual(len({s["submission_id"] for s in submissions}), 2500)
+
+    def test_guidelines(self):
+        guidelines = generate_guidelines(30, seed=1)
+        self.assertEqual(generate_guidelines(30, seed=1), guidelines)
+        submissions = list(generate_submissions(500))
+        for guideline in guidelines:
+            self.assertTrue(GuidelineSerializer(data=guideline).is_valid())
+            analyze_impact_advanced(submissions, {}, guideline)
+        self.assertTrue(any(get_nested_value(s, "risk_profile.risk_factors") for s in submissions))
+
+    def test_write_submissions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_submissions(os.path.join(directory, "submissions.jsonl"), 20)
+            with open(path) as file:
+                self.assertEqual([json.loads(line) for line in file], list(generate_submissions(20)))
+
+
+class TestBenchmarkCommand(SimpleTestCase):
+    def test_run_and_compare(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command("benchmark_simulation", sizes="300", repeat=1, data_dir=directory, output=output,
+                         stderr=io.StringIO())
+            with open(output) as file:
+                results = json.load(file)
+            self.assertEqual(results["environment"]["repeat"], 1)
+            names = {result["name"] for result in results["results"]}
+            self.assertLessEqual({"load_submission_store", "evaluate_condition", "evaluate_guideline",
+                                  "evaluate_near_miss", "analyze_impact_advanced", "render_charts[serial]",
+                                  "POST /simulate/", "GET /submissions/"}, names)
+            for result in results["results"]:
+                self.assertGreater(result["median_s"], 0)
+
+            stdout = io.StringIO()
+            call_command("benchmark_simulation", sizes="300", repeat=1, data_dir=directory, only="analyze",
+                         compare=output, stdout=stdout, stderr=io.StringIO())
+            comparison = json.loads(stdout.getvalue())["comparison"]
+            self.assertEqual({change["name"] for change in comparison},
+                             {"analyze_impact_advanced", "analyze_impact_advanced[warm]"})
+
+    def test_invalid_options(self):
+        for options in ({"sizes": "lots"}, {"only": "everything"}, {"repeat": 0}):
+            with self.assertRaises(CommandError):
+                call_command("benchmark_simulation", stdout=io.StringIO(), stderr=io.StringIO(), **options)
+
+    def test_compare(self):
+        baseline = [{"name": "a", "rows": 10, "median_s": 2.0}, {"name": "b", "rows": 10, "median_s": 1.0}]
+        results = [{"name": "a", "rows": 10, "median_s": 3.0}, {"name": "a", "rows": 20, "median_s": 1.0}]
+        self.assertEqual(compare(results, baseline), [
+            {"name": "a", "rows": 10, "baseline_median_s": 2.0, "median_s": 3.0, "ratio": 1.5}])
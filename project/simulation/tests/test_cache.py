@@ -0,0 +1,132 @@
+import unittest
+
+import numpy as np
+
+from simulation.bitsets import Bitset, at_least
+from simulation.cache import BitsetCache, ConditionStore
+from simulation.compiler import as_compiled
+from simulation.engine import ColumnarDataset, guideline_mask
+from simulation.services import BASELINE_CACHE, CONDITION_STORE, analyze_impact_advanced, get_baseline_results
+
+
+class TestBitset(unittest.TestCase):
+    def test_round_trip_and_operations(self):
+        left = Bitset.from_mask(np.array([True, False, True, True, False, False, False, False, True, False]))
+        right = Bitset.from_positions([1, 3, 9], 10)
+        self.assertEqual(left.to_mask().tolist(), [True, False, True, True, False, False, False, False, True, False])
+        self.assertEqual(left.count(), 4)
+        self.assertEqual(left.nbytes, 2)
+        self.assertEqual((left & right).positions().tolist(), [3])
+        self.assertEqual((left | right).count(), 6)
+        self.assertEqual((left ^ right).positions().tolist(), [0, 1, 2, 8, 9])
+        self.assertEqual((~left).count(), 6)
+        self.assertEqual(~~left, left)
+        with self.assertRaises(ValueError):
+            left & Bitset.zeros(11)
+
+    def test_at_least(self):
+        universe = Bitset.from_positions(range(6), 8)
+        a = Bitset.from_positions([0, 1, 2, 6], 8)
+        b = Bitset.from_positions([1, 2, 3, 7], 8)
+        c = Bitset.from_positions([2, 4], 8)
+        self.assertEqual(at_least([(a, 1), (b, 1), (c, 1)], 1, universe).positions().tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(at_least([(a, 1), (b, 1), (c, 1)], 2, universe).positions().tolist(), [1, 2])
+        self.assertEqual(at_least([(a, 1), (b, 1), (c, 1)], 3, universe).positions().tolist(), [2])
+        self.assertEqual(at_least([(a, 2), (c, 1)], 2, universe).positions().tolist(), [0, 1, 2])
+        self.assertEqual(at_least([(a, 1)], 0, universe), universe)
+
+
+class TestBitsetCache(unittest.TestCase):
+    def test_lru_eviction_within_budget(self):
+        cache = BitsetCache(max_bytes=4)
+        for key in "abc":
+            cache.put(key, Bitset.zeros(16))
+        self.assertNotIn("a", cache)
+        self.assertIsNotNone(cache.get("b"))
+        cache.put("d", Bitset.zeros(16))
+        self.assertIn("b", cache)
+        self.assertNotIn("c", cache)
+        self.assertIsNone(cache.get("c"))
+        cache.put("huge", Bitset.zeros(1000))
+        self.assertNotIn("huge", cache)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 1, 2))
+        self.assertEqual(stats["bytes"], 4)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+
+class TestConditionStore(unittest.TestCase):
+    def test_shared_between_guidelines(self):
+        store = ConditionStore(max_bytes=1024)
+        dataset = ColumnarDataset([{"financials": {"revenue": revenue}} for revenue in (1, 5, 9)], version="store")
+        revenue = {"field": "financials.revenue", "operator": "<=", "value": 6}
+        first = as_compiled({"conditions": {"logic": "all", "conditions": [revenue]}})
+        second = as_compiled({"conditions": {"logic": "any", "conditions": [
+            {"field": "financials.revenue", "operator": ">", "value": 8}, dict(revenue)
+        ]}})
+
+        memo = {}
+        store.load(dataset.fingerprint, first.conditions, memo)
+        self.assertEqual(memo, {})
+        guideline_mask(dataset, first, memo)
+        store.save(dataset.fingerprint, first.conditions, memo)
+        self.assertEqual(len(store), 1)
+
+        memo = {}
+        store.load(dataset.fingerprint, second.conditions, memo)
+        self.assertEqual(memo[first.conditions[0].key].tolist(), [True, True, False])
+        self.assertEqual(store.stats()["hits"], 1)
+        self.assertEqual(guideline_mask(dataset, second, memo).tolist(), [True, True, True])
+        store.save(dataset.fingerprint, second.conditions, memo)
+        self.assertEqual(len(store), 2)
+
+        memo = {}
+        store.load("other-dataset", first.conditions, memo)
+        self.assertEqual(memo, {})
+
+
+class TestBaselineCache(unittest.TestCase):
+    def setUp(self):
+        BASELINE_CACHE.clear()
+        self.submissions = [{"financials": {"revenue": 1000000}}, {"financials": {"revenue": 2000000}}]
+
+    def baseline(self, threshold):
+        return {"id": "same-id", "conditions": {"logic": "all", "conditions": [
+            {"field": "financials.revenue", "operator": ">=", "value": threshold}
+        ]}}
+
+    def test_keyed_by_conditions_not_id(self):
+        self.assertEqual(get_baseline_results(self.baseline(1500000), self.submissions), [False, True])
+        self.assertEqual(get_baseline_results(self.baseline(500000), self.submissions), [True, True])
+        hits = BASELINE_CACHE.hits
+        self.assertEqual(get_baseline_results(self.baseline(1500000), self.submissions), [False, True])
+        self.assertEqual(BASELINE_CACHE.hits, hits + 1)
+
+    def test_keyed_by_dataset(self):
+        baseline = self.baseline(1500000)
+        self.assertEqual(get_baseline_results(baseline, ColumnarDataset(self.submissions, version="v1")), [False, True])
+        changed = [{"financials": {"revenue": 3000000}}, {"financials": {"revenue": 0}}]
+        self.assertEqual(get_baseline_results(baseline, ColumnarDataset(changed, version="v2")), [True, False])
+        self.assertEqual(get_baseline_results(baseline, changed), [True, False])
+        self.assertEqual(len(BASELINE_CACHE), 3)
+
+    def test_incremental_simulation_reuses_condition_results(self):
+        CONDITION_STORE.clear()
+        dataset = ColumnarDataset(self.submissions, version="incremental")
+        industry = {"field": "company_data.industry", "operator": "equals", "value": None}
+        baseline = self.baseline(1500000)
+        baseline["conditions"]["conditions"].append(industry)
+        modified = self.baseline(500000)
+        modified["conditions"]["conditions"].append(industry)
+        report = analyze_impact_advanced(dataset, baseline, modified)
+        self.assertEqual(report["outcome_changes"], 1)
+        # The edited condition was only evaluated for the rows it could flip, so it is not stored.
+        self.assertEqual(len(CONDITION_STORE), 2)
+        hits = CONDITION_STORE.hits
+        self.assertEqual(analyze_impact_advanced(dataset, baseline, modified), report)
+        self.assertEqual(CONDITION_STORE.hits, hits + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from simulation.charts import Chart, ChartRenderer, render_png
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+CHARTS = [
+    Chart("bar", {"retail": 25, "energy": 18, "technology": 27}, "Industry Breakdown"),
+    Chart("bar", {"small": 117, "medium": 43}, "Company Size Breakdown"),
+    Chart("pie", {"immediate": 12, "gradual": 30}, "Time Impact"),
+]
+
+
+class TestCharts(unittest.TestCase):
+    def test_render_png(self):
+        for chart in CHARTS + [Chart("bar", {}, "Empty")]:
+            self.assertTrue(render_png(chart).startswith(PNG_SIGNATURE))
+        with self.assertRaises(ValueError):
+            Chart("line", {}, "Trend")
+
+    def test_digest(self):
+        chart = Chart("bar", {"a": 1, "b": 2}, "Title")
+        self.assertEqual(chart.digest, Chart("bar", {"a": 1, "b": 2}, "Title").digest)
+        self.assertNotEqual(chart.digest, Chart("bar", {"b": 2, "a": 1}, "Title").digest)
+        self.assertNotEqual(chart.digest, Chart("bar", {"a": 1, "b": 2}, "Other").digest)
+        self.assertNotEqual(chart.digest, Chart("pie", {"a": 1, "b": 2}, "Title").digest)
+
+    def test_cache(self):
+        renderer = ChartRenderer(max_workers=1, cache_bytes=1024 * 1024)
+        pngs = renderer.render(CHARTS)
+        self.assertEqual(pngs, [render_png(chart) for chart in CHARTS])
+        self.assertEqual(renderer.stats()["misses"], 3)
+        self.assertEqual(renderer.render(CHARTS[::-1]), pngs[::-1])
+        self.assertEqual(renderer.stats()["hits"], 3)
+
+        small = ChartRenderer(max_workers=1, cache_bytes=max(map(len, pngs)))
+        small.render(CHARTS)
+        self.assertEqual(small.stats()["entries"], 1)
+        self.assertEqual(small.stats()["evictions"], 2)
+
+    def test_process_pool(self):
+        renderer = ChartRenderer(max_workers=2, cache_bytes=1024 * 1024)
+        self.addCleanup(renderer.shutdown)
+        self.assertEqual(renderer.render(CHARTS + CHARTS[:1]), [render_png(chart) for chart in CHARTS + CHARTS[:1]])
+        self.assertEqual(renderer.stats()["entries"], 3)
@@ -0,0 +1,320 @@
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+
+from simulation.engine import (
+    CategoryColumn,
+    ColumnarDataset,
+    ListColumn,
+    NumericColumn,
+    condition_mask,
+    delta_mask,
+    guideline_mask,
+    near_miss_distances,
+)
+from simulation.compiler import as_compiled
+from simulation.services import (
+    PROCESS_POOL,
+    analyze_impact_advanced,
+    analyze_impact_batch,
+    analyze_threshold_sweep,
+    evaluate_condition,
+    near_miss_score,
+)
+
+SUBMISSIONS = [
+    {
+        "submission_id": "a",
+        "company_data": {"industry": "retail", "employees": 10, "location": "NY"},
+        "risk_profile": {"risk_factors": ["cyber_threats", "pandemic"]},
+        "financials": {"revenue": 0},
+        "submission_date": "2023-01-01",
+    },
+    {
+        "submission_id": "b",
+        "company_data": {"industry": "energy", "employees": 120, "location": "TX"},
+        "risk_profile": {"risk_factors": ["pandemic"]},
+        "financials": {"revenue": 5000000.0},
+        "submission_date": "2024-06-01",
+    },
+    {
+        "submission_id": "c",
+        "company_data": {"industry": "retail", "employees": 900, "location": "CA"},
+        "risk_profile": {"risk_factors": []},
+        "financials": {"revenue": 50000000.0},
+        "submission_date": "not-a-date",
+    },
+    {
+        "submission_id": "d",
+        "company_data": {"industry": "technology"},
+        "risk_profile": {},
+        "financials": {"revenue": None},
+    },
+]
+
+CONDITIONS = [
+    {"field": "company_data.industry", "operator": "equals", "value": "retail"},
+    {"field": "company_data.industry", "operator": "equals", "value": ["retail", "energy"]},
+    {"field": "company_data.industry", "operator": "in", "value": ["retail", "energy"]},
+    {"field": "company_data.industry", "operator": "in", "value": "energy"},
+    {"field": "financials.revenue", "operator": "equals", "value": None},
+    {"field": "financials.revenue", "operator": ">=", "value": 5000000},
+    {"field": "financials.revenue", "operator": ">=", "value": [0, 5000000]},
+    {"field": "financials.revenue", "operator": "<=", "value": 5000000},
+    {"field": "financials.revenue", "operator": ">", "value": [0, 50000000]},
+    {"field": "financials.revenue", "operator": "<", "value": 5000000},
+    {"field": "financials.revenue", "operator": "between", "value": [1, 60000000]},
+    {"field": "financials.revenue", "operator": "between", "value": 0},
+    {"field": "financials.revenue", "operator": ">=", "value": "oops"},
+    {"field": "risk_profile.risk_factors", "operator": "contains_at_least",
+     "value": {"items": ["cyber_threats", "pandemic"], "threshold": 2}},
+    {"field": "risk_profile.risk_factors", "operator": "contains_at_least",
+     "value": {"items": ["pandemic"], "threshold": 1}},
+    {"field": "company_data.missing", "operator": "in", "value": ["x"]},
+    {"field": "company_data.industry", "operator": "unknown", "value": "retail"},
+]
+
+NEAR_MISS_SUBMISSIONS = [
+    {"submission_id": str(revenue), "financials": {"revenue": revenue}, "company_data": {"years_in_business": years}}
+    for revenue, years in [(94, 3), (100, 5), (91, 4), (97, 0), (0, -1), (-0.5, 2), (109, 5), (None, 5), ("x", 5)]
+]
+
+NEAR_MISS_CONDITIONS = [
+    {"field": "financials.revenue", "operator": ">=", "value": 100},
+    {"field": "financials.revenue", "operator": ">", "value": 100},
+    {"field": "financials.revenue", "operator": "<=", "value": 95},
+    {"field": "financials.revenue", "operator": "<", "value": 0},
+    {"field": "financials.revenue", "operator": "between", "value": [95, 99]},
+    {"field": "financials.revenue", "operator": ">", "value": [95, 100]},
+    {"field": "financials.revenue", "operator": "between", "value": 0},
+    {"field": "financials.revenue", "operator": ">=", "value": "oops"},
+    {"field": "company_data.years_in_business", "operator": ">=", "value": 0},
+    {"field": "company_data.years_in_business", "operator": "<", "value": 5},
+]
+
+
+class TestColumnarEngine(unittest.TestCase):
+    def test_column_kinds(self):
+        dataset = ColumnarDataset(SUBMISSIONS)
+        self.assertIsInstance(dataset.column("financials.revenue"), NumericColumn)
+        self.assertIsInstance(dataset.column("company_data.industry"), CategoryColumn)
+        self.assertIsInstance(dataset.column("risk_profile.risk_factors"), ListColumn)
+        self.assertEqual(dataset.column("financials.revenue").to_pylist(), [0, 5000000.0, 50000000.0, None])
+
+    def test_condition_masks_match_row_evaluation(self):
+        dataset = ColumnarDataset(SUBMISSIONS)
+        for condition in CONDITIONS:
+            expected = [evaluate_condition(submission, condition) for submission in SUBMISSIONS]
+            self.assertEqual(condition_mask(dataset, condition).tolist(), expected, condition)
+
+    def test_indexed_columns_match_scans(self):
+        indexed = ColumnarDataset(SUBMISSIONS)
+        indexed.build_indexes(["company_data.industry", "risk_profile.risk_factors"])
+        self.assertIsNotNone(indexed.column("company_data.industry").index)
+        self.assertIsNotNone(indexed.column("risk_profile.risk_factors").index)
+        scanned = ColumnarDataset(SUBMISSIONS)
+        extra = [
+            {"field": "risk_profile.risk_factors", "operator": "contains_at_least",
+             "value": {"items": ["pandemic", "cyber_threats", "pandemic"], "threshold": 3}},
+            {"field": "risk_profile.risk_factors", "operator": "contains_at_least",
+             "value": {"items": ["pandemic"], "threshold": 0}},
+            {"field": "risk_profile.risk_factors", "operator": "contains_at_least",
+             "value": {"items": ["cyber_threats", "pandemic"], "threshold": 1.5}},
+        ]
+        for condition in CONDITIONS + extra:
+            self.assertEqual(condition_mask(indexed, condition).tolist(),
+                             condition_mask(scanned, condition).tolist(), condition)
+
+    def test_guideline_mask_logic(self):
+        dataset = ColumnarDataset(SUBMISSIONS)
+        guideline = {"conditions": {"logic": "all", "conditions": CONDITIONS[:1] + CONDITIONS[7:8]}}
+        self.assertEqual(guideline_mask(dataset, guideline).tolist(), [True, False, False, False])
+        guideline["conditions"]["logic"] = "any"
+        self.assertEqual(guideline_mask(dataset, guideline).tolist(), [True, True, True, False])
+        self.assertEqual(guideline_mask(dataset, {"conditions": {"conditions": []}}).tolist(), [False] * 4)
+
+    def test_analyze_impact_engines_match(self):
+        baseline = {"id": "engine-test", "conditions": {"logic": "any", "conditions": CONDITIONS[:1]}}
+        modified = {"conditions": {"logic": "all", "conditions": [CONDITIONS[5], CONDITIONS[14]]}}
+        rows = analyze_impact_advanced(SUBMISSIONS, baseline, modified, engine="rows")
+        columnar = analyze_impact_advanced(SUBMISSIONS, baseline, modified)
+        self.assertEqual(rows, columnar)
+        self.assertEqual(columnar["outcome_changes"], 3)
+
+    def test_execution_backends_match(self):
+        baseline = {"id": "backend-test", "conditions": {"logic": "any", "conditions": CONDITIONS[:1]}}
+        modified = {"conditions": {"logic": "any", "conditions": [CONDITIONS[5], CONDITIONS[14]]}}
+        dataset = ColumnarDataset(SUBMISSIONS)
+        expected = analyze_impact_advanced(dataset, baseline, modified)
+        for engine in ("columnar", "rows"):
+            for backend in ("threads", "processes"):
+                report = analyze_impact_advanced(dataset, baseline, modified, engine=engine, backend=backend,
+                                                 chunk_size=3, max_workers=2)
+                self.assertEqual(report, expected, (engine, backend))
+
+    def test_process_pool_kept_per_dataset(self):
+        self.addCleanup(PROCESS_POOL.shutdown)
+        modified = {"conditions": {"logic": "any", "conditions": [CONDITIONS[5]]}}
+        dataset = ColumnarDataset(SUBMISSIONS)
+        analyze_impact_advanced(dataset, {}, modified, backend="processes", chunk_size=3, max_workers=2)
+        pool = PROCESS_POOL._pool
+        self.assertEqual(pool._mp_context.get_start_method(), "spawn")
+        analyze_impact_advanced(dataset, {}, modified, backend="processes", chunk_size=3, max_workers=2)
+        self.assertIs(PROCESS_POOL._pool, pool)
+        other = ColumnarDataset(SUBMISSIONS[:2])
+        self.assertEqual(analyze_impact_advanced(other, {}, modified, backend="processes", chunk_size=1, max_workers=2),
+                         analyze_impact_advanced(other, {}, modified))
+        self.assertIsNot(PROCESS_POOL._pool, pool)
+
+    def test_batch_matches_single_simulations(self):
+        baseline = {"id": "batch-test", "conditions": {"logic": "any", "conditions": CONDITIONS[:1]}}
+        candidates = [
+            {"conditions": {"logic": logic, "conditions": [CONDITIONS[5], condition]}}
+            for logic in ("all", "any") for condition in CONDITIONS[9:15]
+        ]
+        dataset = ColumnarDataset(SUBMISSIONS)
+        expected = [analyze_impact_advanced(dataset, baseline, candidate) for candidate in candidates]
+        self.assertEqual(analyze_impact_batch(dataset, baseline, candidates), expected)
+        for engine, backend in (("rows", "serial"), ("columnar", "threads"), ("columnar", "processes")):
+            reports = analyze_impact_batch(dataset, baseline, candidates, engine=engine, backend=backend,
+                                           chunk_size=3, max_workers=2)
+            self.assertEqual(reports, expected, (engine, backend))
+        self.assertEqual(analyze_impact_batch(dataset, baseline, []), [])
+
+    def test_threshold_sweep_matches_single_simulations(self):
+        baseline = {"id": "sweep-test", "conditions": {"logic": "any", "conditions": CONDITIONS[:1]}}
+        thresholds = [-1, 0, 1, 5000000, 5000000.5, 50000000, 10 ** 12, 0]
+        industry = {"field": "company_data.industry", "operator": "in", "value": ["retail", "technology"]}
+        for logic in ("all", "any"):
+            for operator in ("<=", "<", ">=", ">"):
+                revenue = {"field": "financials.revenue", "operator": operator, "value": 0}
+                for conditions, index in (([revenue], 0), ([industry, revenue], 1)):
+                    modified = {"conditions": {"logic": logic, "conditions": conditions}}
+                    points = analyze_threshold_sweep(SUBMISSIONS, baseline, modified, index, thresholds)
+                    self.assertEqual(len(points), len(thresholds))
+                    for threshold, point in zip(thresholds, points):
+                        conditions[index]["value"] = threshold
+                        expected = analyze_impact_advanced(SUBMISSIONS, baseline, modified)
+                        del expected["near_miss_submissions"]
+                        self.assertEqual(point, dict(expected, threshold=threshold), (logic, operator, index))
+
+    def test_threshold_sweep_rejects_other_operators(self):
+        modified = {"conditions": {"logic": "all", "conditions": CONDITIONS[:1]}}
+        with self.assertRaises(ValueError):
+            analyze_threshold_sweep(SUBMISSIONS, {}, modified, 0, [1])
+        with self.assertRaises(ValueError):
+            analyze_threshold_sweep(SUBMISSIONS, {}, modified, 1, [1])
+
+    def test_delta_mask_matches_full_evaluation(self):
+        dataset = ColumnarDataset(SUBMISSIONS)
+        for logic in ("all", "any"):
+            baseline = as_compiled({"conditions": {"logic": logic, "conditions": CONDITIONS[:3] + CONDITIONS[13:14]}})
+            baseline_results = guideline_mask(dataset, baseline)
+            edits = [
+                CONDITIONS[:3] + CONDITIONS[13:14],
+                CONDITIONS[:2] + CONDITIONS[5:6] + CONDITIONS[13:14],
+                CONDITIONS[:3] + CONDITIONS[13:15],
+                CONDITIONS[1:3],
+                CONDITIONS[2:3] + CONDITIONS[7:10],
+            ]
+            for conditions in edits:
+                modified = as_compiled({"conditions": {"logic": logic, "conditions": conditions}})
+                self.assertEqual(delta_mask(dataset, baseline, baseline_results, modified).tolist(),
+                                 guideline_mask(dataset, modified).tolist(), (logic, conditions))
+        baseline = as_compiled({"conditions": {"logic": "all", "conditions": CONDITIONS[:2]}})
+        for conditions in ({"logic": "any", "conditions": CONDITIONS[:2]}, {"logic": "all", "conditions": CONDITIONS[5:6]}):
+            modified = as_compiled({"conditions": conditions})
+            self.assertIsNone(delta_mask(dataset, baseline, guideline_mask(dataset, baseline), modified))
+
+    def test_list_column_gather(self):
+        column = ColumnarDataset(SUBMISSIONS).column("risk_profile.risk_factors")
+        self.assertEqual(column.gather(np.array([3, 0, 2, 0])).to_pylist(),
+                         [None, ["cyber_threats", "pandemic"], [], ["cyber_threats", "pandemic"]])
+
+    def test_vectorized_aggregation_matches_rows(self):
+        recent = (date.today() - timedelta(days=3)).isoformat()
+        submissions = SUBMISSIONS + [
+            {
+                "submission_id": "e",
+                "company_data": {"employees": 260, "location": None},
+                "risk_profile": {"risk_factors": ["pandemic", "pandemic", "supply_chain"]},
+                "financials": {"revenue": 250.5},
+                "submission_date": recent,
+            },
+        ]
+        baseline = {"id": "aggregation-test", "conditions": {"logic": "any", "conditions": CONDITIONS[:1]}}
+        modified = {"conditions": {"logic": "any", "conditions": [CONDITIONS[14]]}}
+        rows = analyze_impact_advanced(submissions, baseline, modified, engine="rows")
+        columnar = analyze_impact_advanced(ColumnarDataset(submissions), baseline, modified)
+        self.assertEqual(rows, columnar)
+        self.assertEqual(columnar["breakdown_by_risk_factor"], {"pandemic": 3, "supply_chain": 1})
+        self.assertEqual(columnar["breakdown_by_industry"], {"energy": 1, "retail": 1, "unknown": 1})
+        self.assertEqual(columnar["time_impact"], {"immediate": 1, "gradual": 1})
+        self.assertEqual(columnar["financial_impact"], 5000000.0 + 250.5 - 50000000.0)
+
+    def test_missing_employees_and_revenue(self):
+        submissions = SUBMISSIONS + [
+            {
+                "submission_id": "f",
+                "company_data": {"industry": "retail", "employees": None, "location": "OH"},
+                "risk_profile": {"risk_factors": []},
+                "financials": {"revenue": None},
+                "submission_date": "2023-02-01",
+            },
+        ]
+        modified = {"conditions": {"logic": "all", "conditions": [
+            {"field": "company_data.industry", "operator": "equals", "value": "retail"}]}}
+        rows = analyze_impact_advanced(submissions, {}, modified, engine="rows")
+        self.assertEqual(rows, analyze_impact_advanced(ColumnarDataset(submissions), {}, modified))
+        # The record counts as a change but adds no company size or revenue.
+        without = analyze_impact_advanced(SUBMISSIONS, {}, modified, engine="rows")
+        self.assertEqual(rows["outcome_changes"], without["outcome_changes"] + 1)
+        self.assertEqual(rows["breakdown_by_company_size"], without["breakdown_by_company_size"])
+        self.assertEqual(rows["financial_impact"], without["financial_impact"])
+
+    def test_near_miss_distances_match_rows(self):
+        scanned = ColumnarDataset(NEAR_MISS_SUBMISSIONS)
+        indexed = ColumnarDataset(NEAR_MISS_SUBMISSIONS)
+        indexed.build_indexes(["financials.revenue", "company_data.years_in_business"])
+        guidelines = [{"conditions": {"logic": "all", "conditions": [condition]}} for condition in NEAR_MISS_CONDITIONS]
+        guidelines += [
+            {"conditions": {"logic": logic, "conditions": [first, second]}}
+            for logic in ("all", "any")
+            for first, second in zip(NEAR_MISS_CONDITIONS, NEAR_MISS_CONDITIONS[3:] + CONDITIONS[:3])
+        ]
+        for guideline in guidelines:
+            for margin in (0.1, 0.05, 0):
+                expected = [near_miss_score(submission, guideline, margin) for submission in NEAR_MISS_SUBMISSIONS]
+                for dataset in (scanned, indexed):
+                    distances = near_miss_distances(dataset, guideline, margin).tolist()
+                    self.assertEqual([None if distance != distance else distance for distance in distances],
+                                     expected, (guideline, margin))
+
+    def test_near_misses_ranked_by_distance(self):
+        modified = {"conditions": {"logic": "any", "conditions": NEAR_MISS_CONDITIONS[:1]}}
+        expected = ["97", "94", "91"]
+        self.assertEqual(analyze_impact_advanced(NEAR_MISS_SUBMISSIONS, {}, modified, engine="rows")
+                         ["near_miss_submissions"], expected)
+        dataset = ColumnarDataset(NEAR_MISS_SUBMISSIONS)
+        for backend in ("serial", "threads"):
+            report = analyze_impact_advanced(dataset, {}, modified, backend=backend, chunk_size=2, max_workers=2)
+            self.assertEqual(report["near_miss_submissions"], expected, backend)
+
+    def test_dataset_slice_shares_columns(self):
+        dataset = ColumnarDataset(SUBMISSIONS)
+        dataset.column("risk_profile.risk_factors")
+        part = dataset.slice(1, 3)
+        self.assertEqual(len(part), 2)
+        self.assertEqual(part.column("risk_profile.risk_factors").to_pylist(), [["pandemic"], []])
+        self.assertEqual(part.column("financials.revenue").to_pylist(), [5000000.0, 50000000.0])
+
+    def test_unknown_engine_or_backend(self):
+        with self.assertRaises(ValueError):
+            analyze_impact_advanced(SUBMISSIONS, {}, {}, engine="gpu")
+        with self.assertRaises(ValueError):
+            analyze_impact_advanced(SUBMISSIONS, {}, {}, backend="cluster")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import pstats
+import tempfile
+import unittest
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from simulation.guidelines import GUIDELINES_DATA
+from simulation.instrumentation import METRICS, MetricsRegistry, cache_metrics, count, recording, stage
+
+
+class TestTimings(unittest.TestCase):
+    def test_recording(self):
+        with recording() as timings:
+            with stage("evaluate"):
+                pass
+            with stage("evaluate"):
+                pass
+            count("rows", 10)
+            count("rows", 5)
+        self.assertEqual(list(timings.durations), ["evaluate"])
+        self.assertEqual(timings.counts, {"rows": 15})
+        header = timings.server_timing()
+        self.assertTrue(header.startswith("evaluate;dur="))
+        self.assertTrue(header.endswith('rows;desc="15"'))
+
+    def test_nothing_recorded_outside_a_recording(self):
+        with stage("evaluate"):
+            count("rows")
+        with recording() as timings:
+            pass
+        self.assertEqual((timings.durations, timings.counts), ({}, {}))
+
+    def test_histograms(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        with recording() as timings:
+            count("rows", 3)
+        registry.observe_request("simulate", "POST", 200, 0.05, timings)
+        registry.observe_request("simulate", "POST", 200, 0.5, timings)
+        registry.observe_request("simulate", "POST", 200, 5.0, timings)
+        text = registry.render()
+        labels = 'endpoint="simulate",method="POST",status="200"'
+        self.assertIn(f'simulation_request_duration_seconds_bucket{{{labels},le="0.1"}} 1', text)
+        self.assertIn(f'simulation_request_duration_seconds_bucket{{{labels},le="1.0"}} 2', text)
+        self.assertIn(f'simulation_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3', text)
+        self.assertIn(f'simulation_request_duration_seconds_count{{{labels}}} 3', text)
+        self.assertIn('simulation_rows_total{endpoint="simulate"} 9', text)
+
+    def test_cache_metrics(self):
+        lines = cache_metrics({"baselines": {"entries": 2, "bytes": 64, "hits": 5, "misses": 1}})
+        self.assertIn('simulation_cache_entries{cache="baselines"} 2', lines)
+        self.assertIn('simulation_cache_hits_total{cache="baselines"} 5', lines)
+        self.assertIn("# TYPE simulation_cache_misses_total counter", lines)
+
+
+@override_settings(SIMULATION_METRICS_ALLOWED_IPS=["127.0.0.1", "::1"], SIMULATION_METRICS_TOKEN=None)
+class InstrumentationViewTests(APITestCase):
+    def payload(self):
+        guideline = dict(GUIDELINES_DATA[0])
+        guideline["conditions"] = {
+            "logic": "all",
+            "conditions": [{"field": "financials.revenue", "operator": "<=", "value": 2000000}]
+        }
+        return guideline
+
+    def test_server_timing(self):
+        response = self.client.post(reverse("simulate"), self.payload(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        stages = [metric.split(";")[0] for metric in response["Server-Timing"].split(", ")]
+        self.assertLessEqual({"validate", "dataset", "simulate", "render", "total"}, set(stages))
+        self.assertIn('rows;desc="1000"', response["Server-Timing"])
+
+    def test_metrics(self):
+        METRICS.clear()
+        self.client.post(reverse("simulate"), self.payload(), format="json")
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode("utf-8")
+        self.assertIn('simulation_request_duration_seconds_bucket{endpoint="simulate",method="POST",status="200"', text)
+        self.assertIn('simulation_stage_duration_seconds_count{endpoint="simulate",stage="simulate"} 1', text)
+        self.assertIn('simulation_cache_entries{cache="baselines"}', text)
+
+    def test_metrics_access(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.1").status_code, status.HTTP_404_NOT_FOUND)
+        with override_settings(SIMULATION_METRICS_ALLOWED_IPS=["10.0.0.0/8"]):
+            self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.1").status_code, status.HTTP_200_OK)
+        with override_settings(SIMULATION_METRICS_ALLOWED_IPS=[], SIMULATION_METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+            response = self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong")
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            response = self.client.get(url, REMOTE_ADDR="10.0.0.1", HTTP_AUTHORIZATION="Bearer secret")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_profile(self):
+        url = reverse("simulate") + "?profile=1"
+        response = self.client.post(url, self.payload(), format="json")
+        self.assertNotIn("X-Simulation-Profile", response)
+        with tempfile.TemporaryDirectory() as directory, override_settings(SIMULATION_PROFILE_DIR=directory):
+            response = self.client.post(url, self.payload(), format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            path = os.path.join(directory, response["X-Simulation-Profile"])
+            self.assertTrue(pstats.Stats(path).total_calls)
@@ -0,0 +1,128 @@
+import threading
+import time
+import unittest
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from simulation.jobs import JobManager
+from simulation.services import JOB_MANAGER, analyze_impact_advanced, iter_impact_aggregates
+from simulation.tests.test_store import SUBMISSIONS
+from simulation.views import GUIDELINES_DATA
+
+
+def wait(job, timeout=10):
+    deadline = time.monotonic() + timeout
+    while job.status in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(max_workers=1, max_jobs=3, max_results=1)
+
+    def test_progress_and_results(self):
+        release = threading.Event()
+
+        def task(job):
+            job.advance(5)
+            release.wait(5)
+            job.advance(10)
+            return {"rows": 10}
+
+        job = self.manager.submit(task, 10, key="a")
+        deadline = time.monotonic() + 5
+        while job.processed_rows < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(job.to_dict()["status"], "running")
+        self.assertEqual(job.to_dict()["progress"], 0.5)
+        self.assertIsNotNone(job.eta_seconds)
+        # An identical simulation that is still running is the same job.
+        self.assertIs(self.manager.submit(task, 10, key="a"), job)
+        release.set()
+        self.assertEqual(wait(job).to_dict()["result"], {"rows": 10})
+        self.assertEqual(job.eta_seconds, 0.0)
+
+        again = self.manager.submit(lambda job: self.fail("not run"), 10, key="a")
+        self.assertEqual((again.status, again.result), ("completed", {"rows": 10}))
+        self.assertEqual(self.manager.stats()["hits"], 1)
+        wait(self.manager.submit(lambda job: {"rows": 1}, 1, key="b"))
+        self.assertEqual(self.manager.stats()["results"], 1)
+        # "a" was evicted by "b", so it runs again.
+        self.assertEqual(wait(self.manager.submit(lambda job: {"rows": 2}, 1, key="a")).result, {"rows": 2})
+        self.assertIsNone(self.manager.get(job.id))
+
+    def test_cancel_and_failure(self):
+        started, release = threading.Event(), threading.Event()
+
+        def task(job):
+            started.set()
+            release.wait(5)
+            job.advance(1)
+            return "done"
+
+        running = self.manager.submit(task, 2)
+        started.wait(5)
+        queued = self.manager.submit(task, 2)
+        self.assertEqual(self.manager.cancel(queued.id).status, "cancelled")
+        self.manager.cancel(running.id)
+        release.set()
+        self.assertEqual(wait(running).status, "cancelled")
+        self.assertIsNone(running.result)
+        self.assertIsNone(self.manager.cancel("missing"))
+
+        failed = wait(self.manager.submit(lambda job: 1 / 0, 1))
+        self.assertEqual(failed.to_dict()["status"], "failed")
+        self.assertIn("division", failed.to_dict()["error"])
+
+
+class TestImpactAggregates(unittest.TestCase):
+    def test_chunks_converge_to_report(self):
+        submissions = SUBMISSIONS[:3]
+        baseline = GUIDELINES_DATA[0]
+        modified = {"conditions": {"logic": "any", "conditions": [
+            {"field": "risk_profile.credit_score", "operator": ">=", "value": 660},
+            {"field": "company_data.industry", "operator": "equals", "value": "energy"},
+        ]}}
+        steps = [(processed, aggregate.to_report())
+                 for processed, aggregate in iter_impact_aggregates(submissions, baseline, modified, chunk_size=1)]
+        self.assertEqual([processed for processed, _ in steps], [1, 2, 3])
+        self.assertEqual(steps[-1][1], analyze_impact_advanced(submissions, baseline, modified))
+
+
+class SimulationJobTests(APITestCase):
+    def payload(self, revenue):
+        guideline = dict(GUIDELINES_DATA[0])
+        guideline["conditions"] = {
+            "logic": "all",
+            "conditions": [{"field": "financials.revenue", "operator": "<=", "value": revenue}]
+        }
+        return guideline
+
+    def test_job_lifecycle(self):
+        payload = self.payload(1234567)
+        response = self.client.post(reverse("simulate-jobs"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response["Location"], reverse("simulate-job", args=[response.data["id"]]))
+        wait(JOB_MANAGER.get(response.data["id"]))
+
+        job = self.client.get(response["Location"]).data
+        self.assertEqual(job["status"], "completed")
+        self.assertEqual(job["processed_rows"], job["total_rows"])
+        self.assertEqual(job["result"], self.client.post(reverse("simulate"), payload, format="json").data)
+
+        repeated = self.client.post(reverse("simulate-jobs"), payload, format="json").data
+        self.assertEqual(repeated["status"], "completed")
+        self.assertEqual(repeated["result"], job["result"])
+        self.assertEqual(self.client.delete(response["Location"]).data["status"], "completed")
+
+    def test_unknown_job(self):
+        url = reverse("simulate-job", args=["missing"])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        payload = self.payload(1)
+        payload["id"] = "does-not-exist"
+        self.assertEqual(self.client.post(reverse("simulate-jobs"), payload, format="json").status_code,
+                         status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,84 @@
+import unittest
+from datetime import date
+
+from simulation.engine import ColumnarDataset
+from simulation.portfolio import NO_DECISION, Portfolio, active_guidelines, apply_change
+from simulation.services import analyze_portfolio_change
+
+SUBMISSIONS = [
+    {"submission_id": "small", "financials": {"revenue": 1000000}, "company_data": {"industry": "retail"}},
+    {"submission_id": "medium", "financials": {"revenue": 5000000}, "company_data": {"industry": "energy"}},
+    {"submission_id": "large", "financials": {"revenue": 50000000}, "company_data": {"industry": "retail"}},
+]
+
+
+def guideline(guideline_id, action, priority, revenue, effective_date="2023-01-01", version=1):
+    return {
+        "id": guideline_id,
+        "conditions": {"logic": "all", "conditions": [
+            {"field": "financials.revenue", "operator": ">=", "value": revenue}
+        ]},
+        "action": action,
+        "priority": priority,
+        "effective_date": effective_date,
+        "version": version,
+    }
+
+
+GUIDELINES = [
+    guideline("floor", "APPROVE", 1, 0),
+    guideline("large", "REVIEW", 5, 10000000),
+    guideline("large", "REJECT", 5, 10000000, effective_date="2024-01-01", version=2),
+    guideline("large", "APPROVE", 5, 10000000, effective_date="2030-01-01", version=3),
+    guideline("medium", "REVIEW", 3, 4000000, effective_date="2022-01-01"),
+]
+
+
+class TestPortfolio(unittest.TestCase):
+    def test_active_revisions(self):
+        self.assertEqual([g["action"] for g in active_guidelines(GUIDELINES, date(2023, 6, 1))],
+                         ["APPROVE", "REVIEW", "REVIEW"])
+        self.assertEqual([g["action"] for g in active_guidelines(GUIDELINES, date(2024, 6, 1))],
+                         ["APPROVE", "REJECT", "REVIEW"])
+        self.assertEqual(active_guidelines(GUIDELINES, date(2021, 1, 1)), [])
+
+    def test_precedence(self):
+        tie = guideline("tie", "REJECT", 3, 4000000, effective_date="2022-01-01")
+        later = guideline("later", "APPROVE", 3, 4000000, effective_date="2022-06-01")
+        portfolio = Portfolio(active_guidelines(GUIDELINES, date(2024, 6, 1)) + [tie, later])
+        self.assertEqual(portfolio.actions, ["REJECT", "APPROVE", "REVIEW", "REJECT", "APPROVE"])
+        dataset = ColumnarDataset(SUBMISSIONS)
+        winners = Portfolio.decide(portfolio.masks(dataset), len(dataset))
+        self.assertEqual(portfolio.action_labels(winners).tolist(), ["APPROVE", "APPROVE", "REJECT"])
+        self.assertEqual(Portfolio([]).action_labels(Portfolio.decide([], 2)).tolist(), [NO_DECISION] * 2)
+
+    def test_changes(self):
+        as_of = date(2024, 6, 1)
+        edited = guideline("medium", "REJECT", 3, 500000, version=2)
+        report = analyze_portfolio_change(SUBMISSIONS, GUIDELINES, "edit", guideline=edited, as_of=as_of)
+        self.assertEqual(report["changed_submissions"], ["small", "medium"])
+        self.assertEqual(report["transitions"], {"APPROVE": {"REJECT": 1}, "REVIEW": {"REJECT": 1}})
+        self.assertEqual(report["actions_after"], {"REJECT": 3})
+        self.assertEqual(report["reevaluated_submissions"], 3)
+
+        report = analyze_portfolio_change(SUBMISSIONS, GUIDELINES, "remove", guideline_id="floor", as_of=as_of)
+        self.assertEqual(report["changed_submissions"], ["small"])
+        self.assertEqual(report["actions_after"], {NO_DECISION: 1, "REVIEW": 1, "REJECT": 1})
+        self.assertEqual(report["reevaluated_submissions"], 3)
+
+        added = guideline(None, "REFER", 0, 2000000)
+        report = analyze_portfolio_change(SUBMISSIONS, GUIDELINES, "add", guideline=added, as_of=as_of)
+        self.assertEqual(report["decision_changes"], 0)
+        self.assertEqual(report["reevaluated_submissions"], 2)
+
+    def test_invalid_changes(self):
+        with self.assertRaises(ValueError):
+            apply_change(GUIDELINES, "remove", guideline_id="missing")
+        with self.assertRaises(ValueError):
+            apply_change(GUIDELINES, "add", guideline=guideline("floor", "APPROVE", 1, 0))
+        with self.assertRaises(ValueError):
+            apply_change(GUIDELINES, "rename")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import json
+import os
+import unittest
+
+from django.conf import settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from simulation.engine import ColumnarDataset
+from simulation.services import analyze_impact_advanced, estimate_impact
+from simulation.sampling import stratified_sample
+from simulation.views import GUIDELINES_DATA
+
+with open(os.path.join(settings.BASE_DIR, "simulation", "data", "submissions.json")) as file:
+    SUBMISSIONS = json.load(file)
+
+
+class TestEstimate(unittest.TestCase):
+    baseline = GUIDELINES_DATA[0]
+    modified = {"conditions": {"logic": "all", "conditions": [
+        {"field": "financials.revenue", "operator": ">=", "value": 2000000},
+    ]}}
+
+    def test_full_sample_is_exact(self):
+        estimate = estimate_impact(SUBMISSIONS, self.baseline, self.modified, sample_size=len(SUBMISSIONS))
+        exact = analyze_impact_advanced(SUBMISSIONS, self.baseline, self.modified)
+        self.assertEqual(estimate["sample_size"], len(SUBMISSIONS))
+        for key in ("outcome_changes", "breakdown_by_industry", "breakdown_by_risk_factor",
+                    "breakdown_by_company_size", "breakdown_by_location", "time_impact"):
+            self.assertEqual(estimate[key], exact[key], key)
+        self.assertAlmostEqual(estimate["financial_impact"], exact["financial_impact"], places=3)
+        low, high = estimate["confidence_intervals"]["outcome_changes"]
+        self.assertAlmostEqual(low, high)
+
+    def test_sample_estimate(self):
+        dataset = ColumnarDataset(SUBMISSIONS, version="sampling-test")
+        sample = stratified_sample(dataset, 300)
+        self.assertIs(stratified_sample(dataset, 300), sample)
+        redrawn = stratified_sample(ColumnarDataset(SUBMISSIONS), 300)
+        self.assertEqual(sample.positions.tolist(), redrawn.positions.tolist())
+        self.assertEqual(sample.population.sum(), len(SUBMISSIONS))
+        self.assertTrue(((sample.sampled >= 2) | (sample.sampled == sample.population)).all())
+
+        estimate = estimate_impact(dataset, self.baseline, self.modified, sample_size=300, confidence=0.99)
+        exact = analyze_impact_advanced(SUBMISSIONS, self.baseline, self.modified)
+        self.assertEqual((estimate["mode"], estimate["sample_size"], estimate["total_submissions"]),
+                         ("estimate", len(sample), len(SUBMISSIONS)))
+        intervals = estimate["confidence_intervals"]
+        for key in ("outcome_changes", "financial_impact"):
+            low, high = intervals[key]
+            self.assertLess(low, high)
+            self.assertTrue(low <= exact[key] <= high, key)
+        self.assertEqual(set(estimate["breakdown_by_industry"]), set(intervals["breakdown_by_industry"]))
+        self.assertNotIn("near_miss_submissions", estimate)
+        self.assertEqual(analyze_impact_advanced(dataset, self.baseline, self.modified, mode="estimate")["mode"],
+                         "estimate")
+        with self.assertRaises(ValueError):
+            analyze_impact_advanced(dataset, self.baseline, self.modified, mode="guess")
+
+
+class EstimateViewTests(APITestCase):
+    def test_estimate_mode(self):
+        payload = dict(GUIDELINES_DATA[1], id=GUIDELINES_DATA[0]["id"])
+        response = self.client.post(reverse("simulate") + "?mode=estimate", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["mode"], "estimate")
+        self.assertIn("confidence_intervals", response.data)
+        response = self.client.post(reverse("simulate") + "?mode=guess", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,9 +1,13 @@
 import unittest
+from rest_framework.exceptions import ValidationError
+from simulation.compiler import compile_conditions
 from simulation.services import (
+    compile_guideline,
     evaluate_condition,
     evaluate_guideline,
     evaluate_near_miss,
     get_baseline_results,
+    near_miss_score,
 )
 
 class TestServices(unittest.TestCase):
@@ -47,11 +51,76 @@ class TestServices(unittest.TestCase):
         self.assertTrue(evaluate_near_miss(submission, guideline, margin=0.1))
         self.assertFalse(evaluate_near_miss(submission, guideline, margin=0.01))
 
+    def test_near_miss_score(self):
+        revenue = {"field": "financials.revenue", "operator": "<=", "value": 1000000}
+        industry = {"field": "company_data.industry", "operator": "equals", "value": "retail"}
+        submission = {"financials": {"revenue": 1050000}, "company_data": {"industry": "retail"}}
+        guideline = {"conditions": {"logic": "all", "conditions": [revenue, industry]}}
+        self.assertAlmostEqual(near_miss_score(submission, guideline), 0.05)
+        submission["company_data"]["industry"] = "energy"
+        self.assertIsNone(near_miss_score(submission, guideline))
+        guideline["conditions"]["logic"] = "any"
+        self.assertAlmostEqual(near_miss_score(submission, guideline), 0.05)
+        submission["financials"]["revenue"] = 900000
+        self.assertIsNone(near_miss_score(submission, guideline))
+
+    def test_near_miss_score_zero_bound(self):
+        guideline = {"conditions": {"logic": "all", "conditions": [
+            {"field": "company_data.years_in_business", "operator": ">", "value": 0}
+        ]}}
+        self.assertEqual(near_miss_score({"company_data": {"years_in_business": 0}}, guideline), 0)
+        self.assertIsNone(near_miss_score({"company_data": {"years_in_business": -1}}, guideline))
+
     def test_get_baseline_results_empty(self):
         submissions = [{"financials": {"revenue": 1000000}}, {"financials": {"revenue": 2000000}}]
         baseline = {"id": "test", "conditions": {"logic": "all", "conditions": []}}
         results = get_baseline_results(baseline, submissions)
         self.assertEqual(results, [False, False])
 
+    def test_compile_guideline_validates_payload(self):
+        payload = {
+            "name": "Revenue floor",
+            "conditions": {
+                "logic": "ALL",
+                "conditions": [{"field": "financials.revenue", "operator": ">=", "value": 6000000}]
+            },
+            "action": "REJECT",
+            "priority": 1,
+            "effective_date": "2024-01-01",
+            "version": 1,
+            "coverage_types": ["cyber"]
+        }
+        compiled = compile_guideline(payload)
+        self.assertEqual(compiled.logic, "all")
+        self.assertEqual(compiled.conditions[0].path, ("financials", "revenue"))
+        self.assertTrue(compiled({"financials": {"revenue": 7000000}}))
+        self.assertFalse(compiled({"financials": {"revenue": None}}))
+
+        payload["conditions"]["conditions"][0]["operator"] = "~="
+        with self.assertRaises(ValidationError):
+            compile_guideline(payload)
+
+    def test_compiled_guidelines_are_cached_by_conditions(self):
+        conditions = {"logic": "any", "conditions": [
+            {"field": "company_data.industry", "operator": "in", "value": ["retail", "energy"]}
+        ]}
+        first = compile_conditions(conditions)
+        second = compile_conditions({"conditions": [dict(conditions["conditions"][0])], "logic": "ANY"})
+        self.assertIs(first, second)
+        self.assertEqual(len(first.digest), 64)
+        self.assertIsNot(first, compile_conditions({"logic": "all", "conditions": conditions["conditions"]}))
+
+    def test_evaluate_condition_contains_at_least(self):
+        submission = {"risk_profile": {"risk_factors": ["cyber_threats", "pandemic"]}}
+        condition = {
+            "field": "risk_profile.risk_factors",
+            "operator": "contains_at_least",
+            "value": {"items": ["cyber_threats", "pandemic", "supply_chain"], "threshold": 2}
+        }
+        self.assertTrue(evaluate_condition(submission, condition))
+        condition["value"]["threshold"] = 3
+        self.assertFalse(evaluate_condition(submission, condition))
+        self.assertFalse(evaluate_condition({"risk_profile": {}}, condition))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from django.core.management import call_command
+
+from simulation import views
+from simulation.engine import ColumnarDataset
+from simulation.snapshot import open_snapshot, snapshot_stamp, write_snapshot
+from simulation.store import SubmissionStore
+from simulation.tests.test_store import SUBMISSIONS
+from simulation.utils import file_version
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "submissions.snapshot")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        submissions = SUBMISSIONS[:3]
+        store = SubmissionStore.from_records(submissions)
+        dimensions = ColumnarDataset(store).dimensions
+        write_snapshot(self.path, store, version="v1", dimensions=dimensions)
+
+        snapshot = open_snapshot(self.path)
+        self.assertEqual(snapshot.version, "v1")
+        self.assertEqual(json.dumps(snapshot.store.to_dicts()), json.dumps(submissions))
+        self.assertFalse(snapshot.store.fields[("financials", "revenue")].values.flags.writeable)
+        for name in ("industry_codes", "industry_labels", "size_codes", "date_ordinals", "revenue",
+                     "risk_offsets", "risk_codes", "risk_labels"):
+            self.assertEqual(list(getattr(snapshot.dimensions, name)), list(getattr(dimensions, name)), name)
+
+        # Engine columns are views of the mapping, not per-process copies.
+        for path in (("financials", "revenue"), ("company_data", "employees"), ("company_data", "industry"),
+                     ("risk_profile", "risk_factors")):
+            column = snapshot.store.column(".".join(path))
+            for array in vars(column).values():
+                if isinstance(array, np.ndarray):
+                    self.assertFalse(array.flags.writeable, (path, array.dtype))
+
+        write_snapshot(self.path, SubmissionStore.from_records([]))
+        self.assertIsNone(open_snapshot(self.path).dimensions)
+        self.assertEqual(open_snapshot(self.path).store.to_dicts(), [])
+
+    def test_replace(self):
+        write_snapshot(self.path, SubmissionStore.from_records(SUBMISSIONS[:1]), version="v1")
+        stamp = snapshot_stamp(self.path)
+        mapped = open_snapshot(self.path)
+        write_snapshot(self.path, SubmissionStore.from_records(SUBMISSIONS[:2]), version="v2")
+
+        self.assertNotEqual(snapshot_stamp(self.path), stamp)
+        self.assertEqual(open_snapshot(self.path).store.to_dicts(), SUBMISSIONS[:2])
+        # A reader of the replaced file keeps its consistent view.
+        self.assertEqual(mapped.store.to_dicts(), SUBMISSIONS[:1])
+        self.assertEqual(os.listdir(self.directory.name), ["submissions.snapshot"])
+        self.assertIsNone(snapshot_stamp(os.path.join(self.directory.name, "missing")))
+
+    def test_rejects_invalid(self):
+        with self.assertRaises(ValueError):
+            write_snapshot(self.path, SubmissionStore.from_records([{"value": ("not", "json")}]))
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.path, "wb") as file:
+            file.write(b"[]")
+        with self.assertRaises(ValueError):
+            open_snapshot(self.path)
+
+    def test_build_command_and_reload(self):
+        source = os.path.join(self.directory.name, "submissions.json")
+        with open(source, "w") as file:
+            json.dump(SUBMISSIONS[:3], file)
+        call_command("build_snapshot", source=source, output=self.path, stdout=io.StringIO())
+        snapshot = open_snapshot(self.path)
+        self.assertEqual(snapshot.version, file_version(source))
+        self.assertEqual(snapshot.store.to_dicts(), SUBMISSIONS[:3])
+
+        original = views.SUBMISSIONS_PATH, views.SNAPSHOT_PATH, views.SUBMISSIONS_DATASET, views.SUBMISSIONS_SNAPSHOT
+        try:
+            views.SUBMISSIONS_PATH, views.SNAPSHOT_PATH = source, self.path
+            dataset = views.submissions_dataset()
+            self.assertEqual(len(dataset), 3)
+            self.assertIs(views.submissions_dataset(), dataset)
+
+            # A snapshot of other data than the submissions file is ignored.
+            write_snapshot(self.path, SubmissionStore.from_records(SUBMISSIONS), version="stale")
+            self.assertEqual(len(views.submissions_dataset()), 3)
+            write_snapshot(self.path, SubmissionStore.from_records(SUBMISSIONS[:2]), version=file_version(source))
+            self.assertEqual(views.submissions_dataset().submissions.to_dicts(), SUBMISSIONS[:2])
+        finally:
+            views.SUBMISSIONS_PATH, views.SNAPSHOT_PATH, views.SUBMISSIONS_DATASET, views.SUBMISSIONS_SNAPSHOT = original
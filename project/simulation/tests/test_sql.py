@@ -0,0 +1,99 @@
+import io
+import json
+import os
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from simulation.models import Guideline, Submission, SubmissionRiskFactor
+from simulation.services import analyze_impact_advanced, analyze_impact_database
+from simulation.sql import UntranslatableCondition, import_guidelines, import_submissions
+from simulation.tests.test_store import SUBMISSIONS
+from simulation.views import GUIDELINES_DATA
+
+DATA_DIR = os.path.join(settings.BASE_DIR, "simulation", "data")
+
+
+def guideline(logic, *conditions):
+    return {"conditions": {"logic": logic, "conditions": [
+        {"field": field, "operator": operator, "value": value} for field, operator, value in conditions
+    ]}}
+
+
+class TestDatabaseImpact(TestCase):
+    maxDiff = None
+
+    def assertSameReport(self, report, expected):
+        self.assertAlmostEqual(report.pop("financial_impact"), expected.pop("financial_impact"), places=3)
+        self.assertEqual(report, expected)
+
+    def test_bundled_data(self):
+        with open(os.path.join(DATA_DIR, "submissions.json")) as file:
+            submissions = json.load(file)
+        with open(os.path.join(DATA_DIR, "guidelines.json")) as file:
+            guidelines = json.load(file)
+        self.assertEqual(import_submissions(submissions, batch_size=300), len(submissions))
+        self.assertEqual(import_guidelines(guidelines), len(guidelines))
+        self.assertEqual(Guideline.objects.count(), len(guidelines))
+
+        for baseline, modified in zip([{}] + guidelines, guidelines):
+            self.assertSameReport(analyze_impact_database(baseline, modified),
+                                  analyze_impact_advanced(submissions, baseline, modified))
+
+    def test_edge_cases(self):
+        # Breakdowns expect ``company_data`` to be a dict.
+        submissions = SUBMISSIONS[:3] + [{"submission_id": 5, "company_data": {"employees": True, "industry": 7},
+                                          "risk_profile": {"risk_factors": ["pandemic", "pandemic"]}}]
+        import_submissions(submissions)
+        import_submissions(submissions)
+        self.assertEqual(Submission.objects.count(), 4)
+        self.assertEqual(SubmissionRiskFactor.objects.count(), 5)
+
+        candidates = [
+            guideline("all", ("company_data.prior_claims", "equals", None)),
+            guideline("any", ("company_data.industry", "in", ["energy", None]), ("financials.revenue", "<", 1)),
+            guideline("all", ("company_data.industry", ">=", "f"), ("company_data.employees", "between", [5, 1000])),
+            guideline("all", ("company_data.employees", "equals", 1), ("company_data.location", "<", "D")),
+            guideline("any", ("risk_profile.risk_factors", "contains_at_least",
+                              {"items": ["pandemic", "pandemic", "cyber_threats"], "threshold": 2})),
+            guideline("all", ("risk_profile.risk_factors", "contains_at_least", {"items": [], "threshold": 0})),
+            guideline("all", ("company_data.employees", ">", 110), ("risk_profile.credit_score", ">=", 660)),
+            guideline("any", ("company_data.employees", "<=", [11, 100]), ("financials.profit_margin", "<", -0.055)),
+            guideline("all"),
+        ]
+        for baseline in (candidates[0], {}):
+            for modified in candidates:
+                self.assertSameReport(analyze_impact_database(baseline, modified),
+                                      analyze_impact_advanced(submissions, baseline, modified, engine="rows"))
+
+    def test_untranslatable(self):
+        for modified in (
+            guideline("all", ("company_data.founded", "equals", 1990)),
+            guideline("all", ("financials.revenue", ">=", "high")),
+            guideline("all", ("company_data.industry", ">", 3)),
+            guideline("all", ("company_data.industry", "contains_at_least", {"items": ["a"]})),
+            guideline("all", ("risk_profile.risk_factors", "contains_at_least", {"items": [1]})),
+        ):
+            with self.assertRaises(UntranslatableCondition):
+                analyze_impact_database({}, modified)
+
+    def test_import_command_and_view(self):
+        call_command("import_simulation_data", stdout=io.StringIO())
+        self.assertEqual(Submission.objects.count(), 1000)
+        with open(os.path.join(DATA_DIR, "guidelines.json")) as file:
+            self.assertEqual(Guideline.objects.count(), len(json.load(file)))
+
+        client = APIClient()
+        payload = dict(GUIDELINES_DATA[1], id=GUIDELINES_DATA[0]["id"])
+        expected = client.post(reverse("simulate"), payload, format="json").data
+        with override_settings(SIMULATION_DATA_SOURCE="database"):
+            response = client.post(reverse("simulate"), payload, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.assertSameReport(dict(response.data), dict(expected))
+
+            payload["conditions"] = {"conditions": [{"field": "company_data.founded", "operator": ">", "value": 1}]}
+            response = client.post(reverse("simulate"), payload, format="json")
+            self.assertEqual(response.status_code, 400)
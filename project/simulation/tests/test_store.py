@@ -0,0 +1,142 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from simulation.engine import ColumnarDataset, build_column, extract_field, guideline_mask
+from simulation.loader import iter_json_records, load_submission_store
+from simulation.services import analyze_impact_advanced
+from simulation.store import SubmissionStore
+
+SUBMISSIONS = [
+    {
+        "submission_id": "a",
+        "company_data": {"industry": "retail", "employees": 10, "location": "NY", "prior_claims": None},
+        "risk_profile": {"risk_factors": ["cyber_threats", "pandemic"], "credit_score": 700},
+        "financials": {"revenue": 0, "profit_margin": 0.1, "assets": 2},
+        "submission_date": "2023-01-01",
+        "underwriting_result": "APPROVED",
+    },
+    {
+        "submission_id": "b",
+        "company_data": {"industry": "energy", "employees": 120, "location": "TX", "prior_claims": 2},
+        "risk_profile": {"risk_factors": ["pandemic"], "credit_score": 640},
+        "financials": {"revenue": 5000000.0, "profit_margin": -0.05, "assets": 2.5},
+        "submission_date": "2024-06-01",
+        "underwriting_result": "REJECTED",
+    },
+    {
+        "underwriting_result": "REVIEW",
+        "submission_id": "c",
+        "company_data": {"location": "CA", "industry": "retail", "employees": 900},
+        "risk_profile": {"risk_factors": [], "credit_score": None},
+        "financials": {},
+        "submission_date": "2024-06-01",
+        "notes": [{"author": "x"}],
+    },
+    {
+        "submission_id": "d",
+        "company_data": "unknown",
+        "risk_profile": {"risk_factors": None, "credit_score": 580},
+        "financials": {"revenue": 12.5, "profit_margin": 1, "assets": None},
+        "submission_date": None,
+    },
+]
+
+FIELDS = [
+    "submission_id",
+    "company_data.industry",
+    "company_data.employees",
+    "company_data.prior_claims",
+    "risk_profile.risk_factors",
+    "risk_profile.credit_score",
+    "financials.revenue",
+    "financials.assets",
+    "company_data",
+    "notes",
+    "missing.field",
+]
+
+
+class TestSubmissionStore(unittest.TestCase):
+    def setUp(self):
+        self.store = SubmissionStore.from_records(SUBMISSIONS)
+
+    def test_rebuilds_records(self):
+        self.assertEqual(len(self.store), len(SUBMISSIONS))
+        # Key order, number types and missing keys all survive, not just equality.
+        self.assertEqual(json.dumps(self.store.to_dicts()), json.dumps(SUBMISSIONS))
+        for position, submission in enumerate(SUBMISSIONS):
+            self.assertEqual(json.dumps(self.store[position]), json.dumps(submission))
+        self.assertEqual(self.store[-1], SUBMISSIONS[-1])
+        self.assertEqual(list(self.store[1:3]), SUBMISSIONS[1:3])
+        with self.assertRaises(IndexError):
+            self.store[len(SUBMISSIONS)]
+        self.assertEqual(SubmissionStore.from_records([]).to_dicts(), [])
+
+    def test_columns_match_extracted_fields(self):
+        for dataset in (ColumnarDataset(self.store), ColumnarDataset(self.store).slice(1, 4)):
+            submissions = SUBMISSIONS[1:4] if len(dataset) == 3 else SUBMISSIONS
+            for field_path in FIELDS:
+                column = dataset.column(field_path)
+                expected = build_column(extract_field(submissions, field_path))
+                self.assertIs(type(column), type(expected), field_path)
+                self.assertEqual(column.to_pylist(), expected.to_pylist(), field_path)
+
+    def test_store_backed_analysis(self):
+        baseline = {"conditions": {"logic": "all", "conditions": [
+            {"field": "company_data.industry", "operator": "equals", "value": "retail"},
+        ]}}
+        modified = {"conditions": {"logic": "any", "conditions": [
+            {"field": "risk_profile.credit_score", "operator": ">=", "value": 600},
+            {"field": "risk_profile.risk_factors", "operator": "contains_at_least",
+             "value": {"items": ["pandemic"], "threshold": 1}},
+        ]}}
+        self.assertEqual(guideline_mask(ColumnarDataset(self.store), modified).tolist(),
+                         guideline_mask(ColumnarDataset(SUBMISSIONS), modified).tolist())
+        # Breakdowns expect ``company_data`` to be a dict.
+        submissions = SUBMISSIONS[:3]
+        self.assertEqual(analyze_impact_advanced(SubmissionStore.from_records(submissions), baseline, modified),
+                         analyze_impact_advanced(submissions, baseline, modified, engine="rows"))
+
+
+class TestLoader(unittest.TestCase):
+    def records(self, data: bytes, read_size: int = 7):
+        return list(iter_json_records(io.BufferedReader(io.BytesIO(data)), read_size))
+
+    def test_formats(self):
+        array = json.dumps(SUBMISSIONS, indent=2).encode("utf-8")
+        lines = "\n".join(json.dumps(submission) for submission in SUBMISSIONS).encode("utf-8")
+        for data in (array, lines, gzip.compress(array), gzip.compress(lines)):
+            self.assertEqual(self.records(data), SUBMISSIONS)
+        # Numbers cut by a chunk boundary are read whole.
+        self.assertEqual(self.records(b" [1, 22,333 ] ", read_size=1), [1, 22, 333])
+        self.assertEqual(self.records(b"[]"), [])
+        self.assertEqual(self.records(b""), [])
+
+    def test_malformed(self):
+        for data in (b"[1, 2", b"[1 2]", b"[1,]", b'[{"a": }]'):
+            with self.assertRaises(ValueError):
+                self.records(data)
+
+    def test_malformed_record_stops_reading(self):
+        rest = ", ".join(json.dumps(submission) for submission in SUBMISSIONS * 400)
+        raw = io.BytesIO(f'[{{"a": 1}}, {{"b": tru}}, {rest}]'.encode("utf-8"))
+        file = io.BufferedReader(raw, 1024)
+        with self.assertRaisesRegex(json.JSONDecodeError, "Malformed record 2"):
+            list(iter_json_records(file, 1024))
+        self.assertLess(raw.tell(), 64 * 1024)
+        self.assertGreater(len(raw.getvalue()), 256 * 1024)
+
+    def test_load_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "submissions.jsonl.gz")
+            with gzip.open(path, "wt") as file:
+                file.writelines(json.dumps(submission) + "\n" for submission in SUBMISSIONS)
+            reports = []
+            store = load_submission_store(path, progress=reports.append, progress_interval=3)
+        self.assertEqual(store.to_dicts(), SUBMISSIONS)
+        self.assertEqual([report.records for report in reports], [3, 4])
+        self.assertEqual(reports[-1].bytes_read, reports[-1].total_bytes)
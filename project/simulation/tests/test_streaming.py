@@ -0,0 +1,77 @@
+import asyncio
+import json
+import unittest
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from simulation.services import analyze_impact_advanced
+from simulation.streaming import aiter_events, iter_impact_events
+from simulation.tests.test_store import SUBMISSIONS
+from simulation.views import GUIDELINES_DATA
+
+
+def parse_events(stream: bytes):
+    events = []
+    for block in stream.decode("utf-8").strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+class TestImpactEvents(unittest.TestCase):
+    baseline = {}
+    modified = {"conditions": {"logic": "any", "conditions": [
+        {"field": "company_data.employees", "operator": ">=", "value": 100},
+    ]}}
+
+    def test_partials_then_report(self):
+        submissions = SUBMISSIONS[:3]
+        events = parse_events(b"".join(iter_impact_events(submissions, self.baseline, self.modified, chunk_size=1)))
+        self.assertEqual([event for event, _ in events], ["start", "partial", "partial", "report"])
+        self.assertEqual(events[0][1], {"total_submissions": 3})
+        self.assertEqual([data["total_submissions"] for _, data in events[1:3]], [1, 2])
+        self.assertEqual([data["outcome_changes"] for _, data in events[1:3]], [0, 1])
+        self.assertNotIn("near_miss_submissions", events[1][1])
+        self.assertEqual(events[-1][1], analyze_impact_advanced(submissions, self.baseline, self.modified))
+
+    def test_errors_end_the_stream(self):
+        # Breakdowns fail on the last fixture, whose ``company_data`` is not a dict.
+        events = parse_events(b"".join(iter_impact_events(SUBMISSIONS, self.baseline, self.modified)))
+        self.assertEqual(events[-1][0], "error")
+
+    def test_async_events(self):
+        async def collect():
+            return [event async for event in aiter_events(
+                iter_impact_events(SUBMISSIONS[:3], self.baseline, self.modified, chunk_size=2))]
+
+        events = parse_events(b"".join(asyncio.run(collect())))
+        self.assertEqual([event for event, _ in events], ["start", "partial", "report"])
+
+
+class SimulationStreamTests(APITestCase):
+    def test_stream(self):
+        payload = dict(GUIDELINES_DATA[0], id=GUIDELINES_DATA[1]["id"])
+        response = self.client.post(reverse("simulate-stream"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = parse_events(b"".join(response.streaming_content))
+        self.assertEqual(events[0], ("start", {"total_submissions": 1000}))
+        self.assertEqual(events[-1][0], "report")
+        self.assertEqual(events[-1][1], json.loads(json.dumps(
+            self.client.post(reverse("simulate"), payload, format="json").data)))
+
+        payload["id"] = "does-not-exist"
+        response = self.client.post(reverse("simulate-stream"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_stream_under_asgi(self):
+        payload = dict(GUIDELINES_DATA[0], id=GUIDELINES_DATA[1]["id"])
+        response = await self.async_client.post(reverse("simulate-stream"), json.dumps(payload),
+                                                content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        events = parse_events(b"".join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual(events[0], ("start", {"total_submissions": 1000}))
+        self.assertEqual(events[-1][0], "report")
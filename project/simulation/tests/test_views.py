@@ -1,9 +1,69 @@
+import gzip
+import io
+import json
+import zipfile
+
 from rest_framework.test import APITestCase
+from django.conf import settings
 from django.urls import reverse
 from rest_framework import status
+from simulation import views
+from simulation.guidelines import replace_guidelines
 from simulation.views import GUIDELINES_DATA
 
 
+REPORT = {
+    "total_submissions": 1000,
+    "outcome_changes": 237,
+    "outcome_change_percentage": 23.7,
+    "breakdown_by_industry": {
+        "manufacturing": 26,
+        "construction": 33,
+        "retail": 25,
+        "transportation": 35,
+        "pharmaceuticals": 20,
+        "healthcare": 34,
+        "technology": 27,
+        "financial": 19,
+        "energy": 18
+    },
+    "breakdown_by_risk_factor": {
+        "workplace_safety": 237,
+        "reputation_risk": 73,
+        "cyber_threats": 84,
+        "economic_downturn": 88,
+        "pandemic": 76,
+        "natural_disasters": 73,
+        "regulatory_changes": 82,
+        "supply_chain": 76,
+        "environmental": 67
+    },
+    "breakdown_by_company_size": {
+        "small": 117,
+        "medium": 43,
+        "large": 77
+    },
+    "breakdown_by_location": {
+        "TX": 29,
+        "FL": 11,
+        "MI": 18,
+        "GA": 20,
+        "IL": 32,
+        "OH": 32,
+        "NY": 18,
+        "CA": 28,
+        "PA": 24,
+        "NC": 25
+    },
+    "time_impact": {
+        "immediate": 44,
+        "gradual": 193
+    },
+    "financial_impact": 5087600000.0,
+    "near_miss_submissions": []
+}
+
+
 class GraphReportTests(APITestCase):
     def test_graph_report(self):
         payload = {
@@ -66,3 +126,275 @@ class GraphReportTests(APITestCase):
             self.assertTrue(data["charts"].get(key, "").startswith("data:image/png;base64,"))
         for summary_key in ["industry_summary", "risk_factor_summary", "company_size_summary", "location_summary", "time_impact_summary", "financial_summary"]:
             self.assertIsInstance(data["summaries"].get(summary_key), str)
+
+    def test_chart_png(self):
+        url = reverse("graphs-chart", args=["industry"])
+        response = self.client.post(url, REPORT, format="json", HTTP_ACCEPT="image/png")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertTrue(response.content.startswith(b"\x89PNG\r\n\x1a\n"))
+        etag = response["ETag"]
+
+        response = self.client.post(url, REPORT, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        changed = dict(REPORT, breakdown_by_industry={"energy": 1})
+        response = self.client.post(url, changed, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        # Other charts of the report keep their ETag.
+        other = reverse("graphs-chart", args=["location"])
+        self.assertEqual(self.client.post(other, REPORT, format="json")["ETag"],
+                         self.client.post(other, changed, format="json")["ETag"])
+
+        response = self.client.post(reverse("graphs-chart", args=["unknown"]), REPORT, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_chart_bundle(self):
+        url = reverse("graphs-bundle")
+        response = self.client.post(url, REPORT, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            self.assertEqual(archive.namelist(), ["industry.png", "risk_factor.png", "company_size.png",
+                                                  "location.png", "time_impact.png"])
+            png = archive.read("industry.png")
+        chart = self.client.post(reverse("graphs-chart", args=["industry"]), REPORT, format="json")
+        self.assertEqual(png, chart.content)
+        self.assertEqual(self.client.post(url, REPORT, format="json").content, response.content)
+
+        response = self.client.post(url, REPORT, format="json", HTTP_IF_NONE_MATCH=f'"other", {response["ETag"]}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class SimulationTests(APITestCase):
+    def existing_payload(self):
+        guideline = dict(GUIDELINES_DATA[0])
+        guideline["conditions"] = {
+            "logic": "all",
+            "conditions": [{"field": "financials.revenue", "operator": "<=", "value": 1000000}]
+        }
+        return guideline
+
+    def test_simulate_existing_guideline(self):
+        response = self.client.post(reverse("simulate"), self.existing_payload(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_submissions"], 1000)
+        self.assertGreater(response.data["outcome_changes"], 0)
+
+    def test_simulate_unknown_guideline_id(self):
+        payload = self.existing_payload()
+        payload["id"] = "does-not-exist"
+        response = self.client.post(reverse("simulate"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_simulate_rejects_unknown_operator(self):
+        payload = self.existing_payload()
+        payload["conditions"]["conditions"][0]["operator"] = "~="
+        response = self.client.post(reverse("simulate"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BatchSimulationTests(APITestCase):
+    def candidate(self, revenue):
+        guideline = dict(GUIDELINES_DATA[0])
+        guideline.pop("id", None)
+        guideline["conditions"] = {
+            "logic": "all",
+            "conditions": [{"field": "financials.revenue", "operator": "<=", "value": revenue}]
+        }
+        return guideline
+
+    def test_batch_reports_match_single_simulations(self):
+        baseline_id = GUIDELINES_DATA[0]["id"]
+        candidates = [self.candidate(revenue) for revenue in (1000000, 5000000, 20000000)]
+        response = self.client.post(reverse("simulate-batch"),
+                                    {"baseline_id": baseline_id, "guidelines": candidates}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["baseline_id"], baseline_id)
+        self.assertEqual(len(response.data["reports"]), 3)
+        for candidate, report in zip(candidates, response.data["reports"]):
+            single = self.client.post(reverse("simulate"), dict(candidate, id=baseline_id), format="json")
+            self.assertEqual(report, single.data)
+
+    def test_batch_unknown_baseline_id(self):
+        response = self.client.post(reverse("simulate-batch"),
+                                    {"baseline_id": "does-not-exist", "guidelines": [self.candidate(1)]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_rejects_empty_or_invalid_candidates(self):
+        response = self.client.post(reverse("simulate-batch"), {"guidelines": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        invalid = self.candidate(1)
+        invalid["conditions"]["conditions"][0]["operator"] = "~="
+        response = self.client.post(reverse("simulate-batch"), {"guidelines": [invalid]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ThresholdSweepTests(APITestCase):
+    def payload(self, **extra):
+        guideline = dict(GUIDELINES_DATA[0])
+        guideline.pop("id", None)
+        guideline["conditions"] = {
+            "logic": "all",
+            "conditions": [{"field": "financials.revenue", "operator": ">=", "value": 0}]
+        }
+        return {"baseline_id": GUIDELINES_DATA[0]["id"], "guideline": guideline, **extra}
+
+    def test_sweep_range(self):
+        response = self.client.post(reverse("simulate-sweep"),
+                                    self.payload(range={"start": 0, "stop": 10000000, "step": 2500000}), format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["field"], "financials.revenue")
+        self.assertEqual([point["threshold"] for point in response.data["points"]],
+                         [0, 2500000, 5000000, 7500000, 10000000])
+        payload = self.payload()
+        payload["guideline"]["conditions"]["conditions"][0]["value"] = 5000000
+        single = self.client.post(reverse("simulate"), dict(payload["guideline"], id=payload["baseline_id"]),
+                                  format="json")
+        self.assertEqual(response.data["points"][2]["outcome_changes"], single.data["outcome_changes"])
+
+    def test_sweep_rejects_invalid_requests(self):
+        for extra in (
+            {},
+            {"thresholds": [1], "range": {"start": 0, "stop": 1, "step": 1}},
+            {"range": {"start": 0, "stop": 1, "step": 0}},
+            {"range": {"start": 0, "stop": 10 ** 9, "step": 1}},
+            {"thresholds": [1], "condition_index": 3},
+        ):
+            response = self.client.post(reverse("simulate-sweep"), self.payload(**extra), format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, extra)
+
+
+class CacheStatsTests(APITestCase):
+    def test_cache_stats(self):
+        guideline = dict(GUIDELINES_DATA[0])
+        guideline.pop("id", None)
+        self.client.post(reverse("simulate-batch"), {"guidelines": [guideline]}, format="json")
+        response = self.client.get(reverse("simulate-cache"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"baselines", "conditions", "compiled_guidelines", "job_results", "charts"})
+        self.assertGreater(response.data["conditions"]["entries"], 0)
+        self.assertIn("hit_rate", response.data["conditions"])
+
+
+class PortfolioSimulationTests(APITestCase):
+    def test_remove_guideline(self):
+        response = self.client.post(reverse("simulate-portfolio"),
+                                    {"change": "remove", "guideline_id": GUIDELINES_DATA[0]["id"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_submissions"], 1000)
+        self.assertEqual(sum(response.data["actions_before"].values()), 1000)
+        self.assertEqual(len(response.data["changed_submissions"]), response.data["decision_changes"])
+
+    def test_invalid_changes(self):
+        for payload in (
+            {"change": "remove"},
+            {"change": "remove", "guideline_id": "does-not-exist"},
+            {"change": "edit", "guideline": dict(GUIDELINES_DATA[0], id=None)},
+            {"change": "merge", "guideline_id": GUIDELINES_DATA[0]["id"]},
+        ):
+            response = self.client.post(reverse("simulate-portfolio"), payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, payload)
+
+
+class ListingTests(APITestCase):
+    def test_full_listing(self):
+        url = reverse("submissions")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        submissions = json.loads(response.content)
+        self.assertEqual(len(submissions), 1000)
+        etag = response["ETag"]
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.content)), submissions)
+        self.assertNotEqual(response["ETag"], etag)
+
+        for if_none_match, accept_encoding in ((etag, ""), (response["ETag"], "gzip")):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=if_none_match, HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b"")
+
+        for accept_encoding, gzipped in (("gzip;q=0", False), ("x-gzip", False), ("*", True), ("*, gzip;q=0", False),
+                                         ("deflate, GZIP; q=0.5", True), ("gzip;q=0.000", False)):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING=accept_encoding)
+            self.assertEqual(response.get("Content-Encoding") == "gzip", gzipped, accept_encoding)
+
+        response = self.client.get(reverse("guidelines"))
+        self.assertEqual(json.loads(response.content), GUIDELINES_DATA)
+
+    def test_guidelines_dataset_follows_changes(self):
+        self.addCleanup(replace_guidelines, list(GUIDELINES_DATA))
+        url = reverse("guidelines")
+        dataset = views.guidelines_dataset()
+        etag = self.client.get(url)["ETag"]
+        self.assertIs(views.guidelines_dataset(), dataset)
+        self.assertEqual(self.client.get(url)["ETag"], etag)
+
+        guideline = {key: value for key, value in GUIDELINES_DATA[0].items() if key != "id"}
+        self.client.post(reverse("simulate"), guideline, format="json")
+        self.assertIsNot(views.guidelines_dataset(), dataset)
+        response = self.client.get(url)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(json.loads(response.content)), len(GUIDELINES_DATA))
+
+    def test_pagination(self):
+        url = reverse("submissions")
+        everything = json.loads(self.client.get(url).content)
+        rows, next_url = [], f"{url}?limit=300"
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["count"], 1000)
+            self.assertLessEqual(len(response.data["results"]), 300)
+            rows.extend(response.data["results"])
+            next_url = response.data["next"]
+        self.assertEqual(rows, everything)
+
+        response = self.client.get(url, {"cursor": "not a cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {"limit": "0"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fields_without_limit_are_paged(self):
+        url = reverse("submissions")
+        everything = json.loads(self.client.get(url).content)
+        response = self.client.get(url, {"fields": "submission_id"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], len(everything))
+        self.assertEqual(response.data["results"], [{"submission_id": s["submission_id"]}
+                                                    for s in everything[:settings.SIMULATION_LIST_PAGE_SIZE]])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_fields_and_filter(self):
+        url = reverse("submissions")
+        everything = json.loads(self.client.get(url).content)
+        condition = {"field": "company_data.industry", "operator": "equals", "value": "energy"}
+        response = self.client.get(url, {"fields": "submission_id,financials.revenue,missing.field",
+                                         "filter": json.dumps(condition)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = [{"submission_id": s["submission_id"], "financials": {"revenue": s["financials"]["revenue"]}}
+                    for s in everything if s["company_data"]["industry"] == "energy"]
+        self.assertEqual(response.data["count"], len(expected))
+        self.assertEqual(response.data["results"], expected[:settings.SIMULATION_LIST_PAGE_SIZE])
+
+        block = {"logic": "any", "conditions": [condition, dict(condition, value="retail")]}
+        response = self.client.get(url, {"filter": json.dumps(block), "limit": 5, "fields": "submission_id"})
+        expected = [s["submission_id"] for s in everything if s["company_data"]["industry"] in ("energy", "retail")]
+        self.assertEqual(response.data["count"], len(expected))
+        self.assertEqual([row["submission_id"] for row in response.data["results"]], expected[:5])
+        following = self.client.get(response.data["next"])
+        self.assertEqual([row["submission_id"] for row in following.data["results"]], expected[5:10])
+
+        response = self.client.get(reverse("guidelines"), {"filter": json.dumps(
+            {"field": "id", "operator": "equals", "value": GUIDELINES_DATA[0]["id"]}), "fields": "id,name"})
+        self.assertEqual(response.data["results"], [{"id": g["id"], "name": g["name"]}
+                                                    for g in GUIDELINES_DATA if g.get("id") == GUIDELINES_DATA[0]["id"]])
+
+        for invalid in ("{", json.dumps({"field": "x", "operator": "resembles", "value": 1})):
+            response = self.client.get(url, {"filter": invalid})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
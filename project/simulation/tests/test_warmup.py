@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from simulation import views
+from simulation.guidelines import GUIDELINES_DATA, load_guidelines
+from simulation.warmup import WARM_UP, WarmUp, serving_process
+
+
+class TestWarmUp(unittest.TestCase):
+    def test_run(self):
+        warm_up = WarmUp()
+        warm_up.load_guidelines()
+        warm_up.run()
+        readiness = warm_up.readiness()
+        self.assertEqual(readiness["status"], "ready")
+        self.assertLessEqual({"guidelines", "total"}, set(readiness["timings"]))
+        self.assertIs(views.submissions_dataset(), views.submissions_dataset())
+        self.assertTrue(GUIDELINES_DATA)
+
+    def test_failures_are_reported(self):
+        warm_up = WarmUp()
+        with mock.patch("simulation.guidelines.GUIDELINES_PATH", "/nonexistent/guidelines.json"):
+            with self.assertLogs("simulation.warmup", "ERROR"):
+                warm_up.load_guidelines()
+        warm_up.run()
+        readiness = warm_up.readiness()
+        self.assertEqual(readiness["status"], "failed")
+        self.assertEqual(len(readiness["errors"]), 1)
+        self.assertTrue(readiness["errors"][0].startswith("guidelines:"))
+
+    def test_load_guidelines_keeps_the_list(self):
+        original = list(GUIDELINES_DATA)
+        self.addCleanup(GUIDELINES_DATA.__setitem__, slice(None), original)
+        self.assertIs(load_guidelines(), GUIDELINES_DATA)
+        self.assertIs(views.GUIDELINES_DATA, GUIDELINES_DATA)
+
+    def test_start_after_fork(self):
+        # A worker forked from a process that was warming up starts its own warm-up.
+        warm_up = WarmUp()
+        warm_up.start()
+        warm_up._thread.join()
+        warm_up.status, warm_up._pid = "warming", os.getpid() + 1
+        warm_up.start()
+        warm_up._thread.join()
+        self.assertEqual(warm_up.status, "ready")
+        self.assertEqual(warm_up._pid, os.getpid())
+
+    def test_serving_process(self):
+        for argv, environ, serving in (
+            (["manage.py", "migrate"], {}, False),
+            (["manage.py", "test"], {}, False),
+            (["manage.py", "runserver"], {}, False),
+            (["manage.py", "runserver"], {"RUN_MAIN": "true"}, True),
+            (["manage.py", "runserver", "--noreload"], {}, True),
+            (["/usr/bin/gunicorn", "project.wsgi"], {}, True),
+        ):
+            with mock.patch.object(sys, "argv", argv), mock.patch.dict(os.environ, environ):
+                self.assertEqual(serving_process(), serving, argv)
+        # Nor do processes started by multiprocessing, e.g. spawned simulation workers.
+        with mock.patch.object(sys, "argv", ["/usr/bin/gunicorn", "project.wsgi"]), \
+                mock.patch("multiprocessing.parent_process", return_value=object()):
+            self.assertFalse(serving_process())
+
+    def test_eager_warm_up_only_in_serving_processes(self):
+        config = apps.get_app_config("simulation")
+        for argv, status_after in ((["manage.py", "migrate"], "idle"), (["/usr/bin/gunicorn", "project.wsgi"], "ready")):
+            warm_up = WarmUp()
+            with mock.patch.object(sys, "argv", argv), mock.patch("simulation.warmup.WARM_UP", warm_up), \
+                    override_settings(SIMULATION_WARM_UP="eager"):
+                config.ready()
+            self.assertEqual(warm_up.status, status_after, argv)
+
+    def test_startup_imports(self):
+        # Importing the views neither loads the submissions nor imports matplotlib.
+        code = ("import sys, django; django.setup(); from simulation import views; "
+                "print(views.SUBMISSIONS_DATASET is None, 'matplotlib' in sys.modules)")
+        environ = dict(os.environ, DJANGO_SETTINGS_MODULE="project.settings")
+        output = subprocess.run([sys.executable, "-c", code], cwd=settings.BASE_DIR, env=environ,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ["True", "False"])
+
+
+class TestReadinessView(APITestCase):
+    def test_ready(self):
+        WARM_UP.run()
+        response = self.client.get(reverse("ready"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "ready")
+        self.assertIn("total", response.data["timings"])
+
+    def test_not_ready(self):
+        warm_up = WarmUp()
+        warm_up.errors.append("submissions: unreadable")
+        with mock.patch("simulation.views.WARM_UP", warm_up):
+            response = self.client.get(reverse("ready"))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn(response.data["status"], ("warming", "failed"))
@@ -1,9 +1,24 @@
 from django.urls import path
-from .views import GuidelinesListView, SubmissionsListView, SimulationView, GraphReportView
+from .views import (
+    GuidelinesListView, SubmissionsListView, SimulationView, SimulationStreamView, SimulationJobsView,
+    SimulationJobView, BatchSimulationView, ThresholdSweepView, PortfolioSimulationView, CacheStatsView, GraphReportView,
+    GraphChartView, GraphBundleView, ReadinessView, MetricsView
+)
 
 urlpatterns = [
     path('guidelines/', GuidelinesListView.as_view(), name='guidelines'),
     path('submissions/', SubmissionsListView.as_view(), name='submissions'),
     path('simulate/', SimulationView.as_view(), name='simulate'),
+    path('simulate/stream/', SimulationStreamView.as_view(), name='simulate-stream'),
+    path('simulate/jobs/', SimulationJobsView.as_view(), name='simulate-jobs'),
+    path('simulate/jobs/<str:job_id>/', SimulationJobView.as_view(), name='simulate-job'),
+    path('simulate/batch/', BatchSimulationView.as_view(), name='simulate-batch'),
+    path('simulate/sweep/', ThresholdSweepView.as_view(), name='simulate-sweep'),
+    path('simulate/portfolio/', PortfolioSimulationView.as_view(), name='simulate-portfolio'),
+    path('ready/', ReadinessView.as_view(), name='ready'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('simulate/cache/', CacheStatsView.as_view(), name='simulate-cache'),
     path('graphs/', GraphReportView.as_view(), name='graphs'),
+    path('graphs/charts.zip', GraphBundleView.as_view(), name='graphs-bundle'),
+    path('graphs/<str:chart>.png', GraphChartView.as_view(), name='graphs-chart'),
 ]
@@ -1,20 +1,29 @@
-import io
-import base64
-import matplotlib.pyplot as plt
+import os
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 def load_json_data(file_path: str):
     try:
         with open(file_path, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Error: The file {file_path} was not found.")
+        logger.error("The file %s was not found.", file_path)
     except json.JSONDecodeError:
-        print(f"Error: The file {file_path} contains invalid JSON.")
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.error("The file %s contains invalid JSON.", file_path)
+    except Exception:
+        logger.exception("Could not load %s", file_path)
     return None
 
+def file_version(file_path: str):
+    """Identifies a revision of a data file by path, size and modification time."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
 def get_nested_value(data: dict, field_path: str):
     fields = field_path.split('.')
     value = data
@@ -26,31 +35,9 @@ def get_nested_value(data: dict, field_path: str):
     return value
 
 def generate_bar_chart(data: dict, title: str) -> str:
-    keys = list(data.keys())
-    values = list(data.values())
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.bar(keys, values, color='skyblue')
-    ax.set_title(title)
-    ax.set_ylabel("Count")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-    return f"data:image/png;base64,{img_base64}"
+    from .charts import Chart, data_uri, render_png
+    return data_uri(render_png(Chart("bar", data, title)))
 
 def generate_pie_chart(data: dict, title: str) -> str:
-    labels = list(data.keys())
-    sizes = list(data.values())
-    fig, ax = plt.subplots(figsize=(6, 4))
-    ax.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140)
-    ax.set_title(title)
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-    return f"data:image/png;base64,{img_base64}"
\ No newline at end of file
+    from .charts import Chart, data_uri, render_png
+    return data_uri(render_png(Chart("pie", data, title)))
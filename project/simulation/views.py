@@ -1,78 +1,545 @@
-import os
+import hmac
+import ipaddress
+import logging
+import re
+import threading
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
 from rest_framework.views import APIView 
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework import status
-from .serializers import GuidelineSerializer
-from .services import analyze_impact_advanced
+from .serializers import (
+    BatchSimulationSerializer, GuidelineSerializer, PortfolioChangeSerializer, ThresholdSweepSerializer
+)
+from .charts import bundle_digest, data_uri, report_charts, zip_bundle
+from .compiler import referenced_fields
+from .engine import ColumnarDataset
+from .guidelines import GUIDELINES_DATA, add_guideline, guidelines_version
+from .instrumentation import METRICS, cache_metrics, stage
+from .models import Submission
+from .services import (
+    CHART_RENDERER, JOB_MANAGER, SIMULATION_MODES, analyze_impact_advanced, analyze_impact_batch, analyze_impact_database,
+    analyze_portfolio_change, analyze_threshold_sweep, cache_stats, estimate_impact, iter_impact_aggregates,
+    simulation_key
+)
+from .sql import ConditionTranslator, UntranslatableCondition
+from .streaming import aiter_events, iter_impact_events, iter_report_events
+from .listing import (
+    ListingError, decode_cursor, encode_cursor, list_rows, parse_fields, parse_filter, serialized_listing
+)
+from .loader import load_submission_store
+from .sampling import stratified_sample
+from .snapshot import open_snapshot, snapshot_stamp
+from .store import SubmissionStore
+
+from .utils import file_version
+from .warmup import WARM_UP, timed
+
+
+SUBMISSIONS_PATH = str(settings.SIMULATION_SUBMISSIONS_PATH)
+SNAPSHOT_PATH = str(settings.SIMULATION_SNAPSHOT_PATH)
+
+logger = logging.getLogger(__name__)
+
+
+def load_submissions_dataset(timings: Optional[Dict[str, float]] = None,
+                             errors: Optional[List[str]] = None) -> ColumnarDataset:
+    """
+    Maps the submissions snapshot when it was built from the current submissions file (or the
+    file is absent), otherwise streams the file itself, then builds the indexes of the fields
+    the guidelines use and the estimate sample. A source that cannot be read is logged (and
+    reported in ``errors``) and leaves the dataset empty.
+    """
+    errors = [] if errors is None else errors
+    version = file_version(SUBMISSIONS_PATH)
+    store, dimensions = None, None
+    with timed("submissions", timings):
+        try:
+            snapshot = open_snapshot(SNAPSHOT_PATH)
+            if version is None or snapshot.version == version:
+                store, dimensions, version = snapshot.store, snapshot.dimensions, snapshot.version
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.exception("Could not open the submissions snapshot %s", SNAPSHOT_PATH)
+            errors.append(f"snapshot: {e}")
+
+        if store is None:
+            store = SubmissionStore.from_records([])
+            try:
+                store = load_submission_store(SUBMISSIONS_PATH)
+            except Exception as e:
+                logger.exception("Could not load the submissions from %s", SUBMISSIONS_PATH)
+                errors.append(f"submissions: {e}")
+
+        dataset = ColumnarDataset(store, version=version)
+        if dimensions is not None:
+            dataset.dimensions = dimensions
+    with timed("indexes", timings):
+        dataset.dimensions
+        dataset.build_indexes(referenced_fields(GUIDELINES_DATA))
+    with timed("sample", timings):
+        stratified_sample(dataset, settings.SIMULATION_SAMPLE_SIZE)
+    return dataset
+
+
+# Loaded on first use, or by the warm-up at start-up (see ``warmup.WarmUp``).
+SUBMISSIONS_SNAPSHOT = None
+SUBMISSIONS_DATASET = None
+_RELOAD_LOCK = threading.Lock()
+_QUALITY_RE = re.compile(r"(?:^|;)\s*q\s*=\s*([0-9.]+)\s*(?:;|$)", re.IGNORECASE)
+
+
+def submissions_dataset(timings: Optional[Dict[str, float]] = None,
+                        errors: Optional[List[str]] = None) -> ColumnarDataset:
+    """The loaded submissions, loaded on first use and reloaded once a new snapshot has been swapped in."""
+    global SUBMISSIONS_DATASET, SUBMISSIONS_SNAPSHOT
+    stamp = snapshot_stamp(SNAPSHOT_PATH)
+    if SUBMISSIONS_DATASET is None or stamp != SUBMISSIONS_SNAPSHOT:
+        with _RELOAD_LOCK:
+            if SUBMISSIONS_DATASET is None or stamp != SUBMISSIONS_SNAPSHOT:
+                SUBMISSIONS_DATASET = load_submissions_dataset(timings, errors)
+                SUBMISSIONS_SNAPSHOT = stamp
+    return SUBMISSIONS_DATASET
+
 
-from .utils import load_json_data, generate_pie_chart, generate_bar_chart
+GUIDELINES_DATASET = None
 
 
-BASE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'simulation', 'data')
-GUIDELINES_PATH = os.path.join(BASE_DIR, 'guidelines.json')
-SUBMISSIONS_PATH = os.path.join(BASE_DIR, 'submissions.json')
+def guidelines_dataset() -> ColumnarDataset:
+    """The guidelines as a dataset, rebuilt only when they change (see ``guidelines_version``)."""
+    global GUIDELINES_DATASET
+    version = guidelines_version()
+    dataset = GUIDELINES_DATASET
+    if dataset is None or dataset.version != version:
+        dataset = GUIDELINES_DATASET = ColumnarDataset(list(GUIDELINES_DATA), version=version)
+    return dataset
 
-GUIDELINES_DATA = []
-SUBMISSIONS_DATA = []
 
-try:
-    GUIDELINES_DATA = load_json_data(GUIDELINES_PATH)
-except Exception as e:
-    print(f"An error occurred while loading the guidelines data: {e}")
+def execution_options() -> dict:
+    return {
+        "backend": settings.SIMULATION_BACKEND,
+        "chunk_size": settings.SIMULATION_CHUNK_SIZE,
+        "max_workers": settings.SIMULATION_MAX_WORKERS,
+    }
 
-try:
-    SUBMISSIONS_DATA = load_json_data(SUBMISSIONS_PATH)
-except Exception as e:
-    print(f"An error occurred while loading the submissions data: {e}")
 
+def simulate(baseline: dict, modified: dict, dataset: Optional[ColumnarDataset] = None) -> dict:
+    if settings.SIMULATION_DATA_SOURCE == "database":
+        return analyze_impact_database(baseline, modified)
+    return analyze_impact_advanced(dataset or submissions_dataset(), baseline, modified, **execution_options())
 
-class GuidelinesListView(APIView):
+
+def find_guideline(guideline_id):
+    return next((g for g in GUIDELINES_DATA if g.get("id") == guideline_id), None)
+
+
+def etag_matches(request, *etags: str) -> bool:
+    """Whether the request's ``If-None-Match`` names one of the (quoted) ``etags``."""
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or any(etag in parse_etags(if_none_match) for etag in etags)
+
+
+def accepts_gzip(request) -> bool:
     """
-    Returns a list of all guidelines.
+    Whether the request's ``Accept-Encoding`` allows gzip: ``gzip``, or failing that ``*``,
+    listed with a non-zero quality.
     """
+    qualities = {}
+    for coding in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        match = _QUALITY_RE.search(params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        qualities.setdefault(name.strip().lower(), quality)
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+def page_limit(value):
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ListingError("limit must be an integer.")
+    if limit < 1:
+        raise ListingError("limit must be positive.")
+    return min(limit, settings.SIMULATION_LIST_MAX_PAGE_SIZE)
+
+
+class _ListingView(APIView):
+    """
+    Lists the rows of ``dataset()``. Query parameters select what is listed:
+
+      - ``fields``: comma-separated dotted paths to include, e.g. ``submission_id,financials.revenue``.
+      - ``filter``: conditions in guideline syntax (JSON), e.g.
+        ``{"field": "company_data.industry", "operator": "equals", "value": "energy"}``.
+      - ``limit`` and ``cursor``: a page of at most ``limit`` rows (SIMULATION_LIST_PAGE_SIZE
+        by default), continued from the ``next`` link of the previous page.
+
+    With any of them the response is a page: ``{"count", "next", "results"}``. Without any
+    of them the whole listing is sent as JSON encoded once per dataset version (gzipped for
+    clients that accept it), with an ETag for conditional requests.
+    """
+    listing_name = None
+
+    def dataset(self) -> ColumnarDataset:
+        raise NotImplementedError
+
     def get(self, request):
-        return Response(GUIDELINES_DATA, status=status.HTTP_200_OK)
+        params = request.query_params
+        dataset = self.dataset()
+        if not any(name in params for name in ("fields", "filter", "limit", "cursor")):
+            return self.full_listing(request, dataset)
+        try:
+            fields = parse_fields(params.get("fields"))
+            conditions = parse_filter(params.get("filter"))
+            limit = page_limit(params.get("limit")) or settings.SIMULATION_LIST_PAGE_SIZE
+            start = 0
+            if "cursor" in params:
+                start = decode_cursor(params["cursor"], dataset.fingerprint)
+        except ListingError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows, count, following = list_rows(dataset, fields, conditions, limit, start)
+        next_url = None
+        if following is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor",
+                                           encode_cursor(dataset.fingerprint, following))
+        return Response({"count": count, "next": next_url, "results": rows}, status=status.HTTP_200_OK)
+
+    def full_listing(self, request, dataset: ColumnarDataset) -> HttpResponse:
+        listing = serialized_listing(self.listing_name, dataset)
+        etag, gzip_etag = quote_etag(listing.etag), quote_etag(f"{listing.etag}-gzip")
+        gzipped = accepts_gzip(request)
+        if etag_matches(request, etag, gzip_etag):
+            response = HttpResponseNotModified()
+        elif gzipped:
+            response = HttpResponse(listing.gzipped, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(listing.body, content_type="application/json")
+        response["ETag"] = gzip_etag if gzipped else etag
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+class GuidelinesListView(_ListingView):
+    """
+    Returns a list of all guidelines.
+    """
+    listing_name = "guidelines"
 
-class SubmissionsListView(APIView):
+    def dataset(self) -> ColumnarDataset:
+        return guidelines_dataset()
+
+class SubmissionsListView(_ListingView):
     """
     Returns a list of all submissions.
     """
-    def get(self, request):
-        return Response(SUBMISSIONS_DATA, status=status.HTTP_200_OK)
-    
-class SimulationView(APIView):
+    listing_name = "submissions"
+
+    def dataset(self) -> ColumnarDataset:
+        return submissions_dataset()
+
+def simulation_guidelines(request):
+    """
+    Validates a simulation request: a guideline payload, compared with the existing guideline
+    with its ID, or with no guideline (and then added to the list of guidelines) without one.
+    Returns ``(baseline, guideline, None)``, or ``(None, None, error response)``.
+    """
+    serializer = GuidelineSerializer(data=request.data)
+    if not serializer.is_valid():
+        return None, None, Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    guideline_payload = serializer.validated_data
+    guideline_id = guideline_payload.get("id")
+
+    simulation_guidelines = GUIDELINES_DATA.copy()
+
+    if not guideline_id: 
+        add_guideline(guideline_payload)
+        return {}, guideline_payload, None
+    existing_guideline = next((g for g in simulation_guidelines if g.get("id") == guideline_id), None)
+    if not existing_guideline:
+        return None, None, Response(
+            {"detail": f"Guideline with id {guideline_id} does not exist."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return existing_guideline, guideline_payload, None
+
+def untranslatable_response(baseline: dict, guideline: dict):
+    """The 400 response for guidelines the database cannot evaluate, checked before running them."""
+    try:
+        translator = ConditionTranslator()
+        translator.guideline(baseline)
+        translator.guideline(guideline)
+    except UntranslatableCondition as e:
+        return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+class _IgnoreAcceptNegotiation(DefaultContentNegotiation):
+    """Picks the first renderer whatever the client accepts, for views that do not return JSON."""
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+class _TimedRenderView(APIView):
+    """Renders responses inside the view, so their rendering is timed as the ``render`` stage."""
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, Response):
+            with stage("render"):
+                response.render()
+        return response
+
+class SimulationView(_TimedRenderView):
     """
     Accepts a guideline payload.
     If the guideline does not have an ID, it is added to the list of guidelines.
     If the guideline has an ID, it is compared to the existing guideline with the same ID.
-    Returns an impact report.
+    Returns an impact report; with ?mode=estimate, an estimate with confidence intervals
+    computed from a stratified sample of the submissions.
     """
     def post(self, request):
-        serializer = GuidelineSerializer(data=request.data)
+        mode = request.query_params.get("mode", "exact")
+        if mode not in SIMULATION_MODES:
+            return Response({"detail": f"Unknown simulation mode: {mode}"}, status=status.HTTP_400_BAD_REQUEST)
+        with stage("validate"):
+            baseline, guideline_payload, error = simulation_guidelines(request)
+        if error is not None:
+            return error
+        with stage("dataset"):
+            dataset = None if mode == "exact" and settings.SIMULATION_DATA_SOURCE == "database" else submissions_dataset()
+        with stage("simulate"):
+            if mode == "estimate":
+                impact = estimate_impact(dataset, baseline, guideline_payload)
+                return Response(impact, status=status.HTTP_200_OK)
+            try:
+                impact = simulate(baseline, guideline_payload, dataset)
+            except UntranslatableCondition as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(impact, status=status.HTTP_200_OK)
+
+class SimulationJobsView(APIView):
+    """
+    Accepts the same payload as SimulationView and runs the simulation in the background.
+    Returns the job (202), whose URL reports progress and, once completed, the impact report.
+    A simulation identical to a recent one completes at once with its report.
+    """
+    def post(self, request):
+        baseline, guideline_payload, error = simulation_guidelines(request)
+        if error is not None:
+            return error
+
+        if settings.SIMULATION_DATA_SOURCE == "database":
+            error = untranslatable_response(baseline, guideline_payload)
+            if error is not None:
+                return error
+
+            def run(job):
+                job.advance(0)
+                return analyze_impact_database(baseline, guideline_payload)
+
+            # The database can be reimported by another process at any time, so its reports are not kept.
+            job = JOB_MANAGER.submit(run, Submission.objects.count())
+        else:
+            dataset = submissions_dataset()
+
+            def run(job):
+                for processed, aggregate in iter_impact_aggregates(dataset, baseline, guideline_payload,
+                                                                   settings.SIMULATION_CHUNK_SIZE):
+                    job.advance(processed)
+                return aggregate.to_report()
+
+            job = JOB_MANAGER.submit(run, len(dataset), key=simulation_key(dataset, baseline, guideline_payload))
+        location = reverse("simulate-job", args=[job.id])
+        return Response(job.to_dict(), status=status.HTTP_202_ACCEPTED, headers={"Location": location})
+
+class SimulationStreamView(APIView):
+    """
+    Accepts the same payload as SimulationView and streams Server-Sent Events: "start", a
+    "partial" report over the submissions processed so far after each chunk, then the exact
+    "report" (or an "error").
+    """
+    def post(self, request):
+        baseline, guideline_payload, error = simulation_guidelines(request)
+        if error is not None:
+            return error
+
+        database = settings.SIMULATION_DATA_SOURCE == "database"
+        if database:
+            error = untranslatable_response(baseline, guideline_payload)
+            if error is not None:
+                return error
+            events = iter_report_events(lambda: analyze_impact_database(baseline, guideline_payload),
+                                        Submission.objects.count())
+        else:
+            events = iter_impact_events(submissions_dataset(), baseline, guideline_payload,
+                                        settings.SIMULATION_CHUNK_SIZE)
+        # Under ASGI (no WSGI environ) the events are produced off the event loop and sent as
+        # they come.
+        if "wsgi.input" not in request.META:
+            events = aiter_events(events, thread_sensitive=database)
+        response = StreamingHttpResponse(events, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+class SimulationJobView(APIView):
+    """
+    GET returns a simulation job's status, progress (rows processed, ETA) and, once
+    completed, its impact report. DELETE cancels it.
+    """
+    def get(self, request, job_id):
+        job = JOB_MANAGER.get(job_id)
+        if job is None:
+            return Response({"detail": f"Job {job_id} does not exist."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job.to_dict(), status=status.HTTP_200_OK)
+
+    def delete(self, request, job_id):
+        job = JOB_MANAGER.cancel(job_id)
+        if job is None:
+            return Response({"detail": f"Job {job_id} does not exist."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job.to_dict(), status=status.HTTP_202_ACCEPTED)
+
+class BatchSimulationView(_TimedRenderView):
+    """
+    Accepts a list of candidate guidelines and an optional baseline guideline ID.
+    Candidates are compared against the existing guideline with that ID, or against no
+    guideline when it is omitted, and are not added to the list of guidelines.
+    Returns one impact report per candidate, in order.
+    """
+    def post(self, request):
+        serializer = BatchSimulationSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        guideline_payload = serializer.validated_data
-        guideline_id = guideline_payload.get("id")
+        baseline_id = serializer.validated_data.get("baseline_id")
+        baseline = {}
+        if baseline_id:
+            baseline = find_guideline(baseline_id)
+            if not baseline:
+                return Response(
+                    {"detail": f"Guideline with id {baseline_id} does not exist."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        reports = analyze_impact_batch(submissions_dataset(), baseline, serializer.validated_data["guidelines"],
+                                       **execution_options())
+        return Response({"baseline_id": baseline_id, "reports": reports}, status=status.HTTP_200_OK)
 
-        simulation_guidelines = GUIDELINES_DATA.copy()
+class ThresholdSweepView(_TimedRenderView):
+    """
+    Accepts a guideline, the index of one of its >=, >, <= or < conditions, and either a list
+    of thresholds or a start/stop/step range, plus an optional baseline guideline ID.
+    Returns one impact report (without near misses) per threshold, in order.
+    """
+    def post(self, request):
+        serializer = ThresholdSweepSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        if not guideline_id: 
-            GUIDELINES_DATA.append(guideline_payload)
-            baseline = {}  
-            impact = analyze_impact_advanced(SUBMISSIONS_DATA, baseline, guideline_payload)
-            return Response(impact, status=status.HTTP_200_OK)
-        else:
-            existing_guideline = next((g for g in simulation_guidelines if g.get("id") == guideline_id), None)
-            if not existing_guideline:
+        data = serializer.validated_data
+        baseline_id = data.get("baseline_id")
+        baseline = {}
+        if baseline_id:
+            baseline = find_guideline(baseline_id)
+            if not baseline:
                 return Response(
-                    {"detail": f"Guideline with id {guideline_id} does not exist."},
+                    {"detail": f"Guideline with id {baseline_id} does not exist."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            impact = analyze_impact_advanced(SUBMISSIONS_DATA, existing_guideline, guideline_payload)
-            return Response(impact, status=status.HTTP_200_OK)
+        condition = data["guideline"]["conditions"]["conditions"][data["condition_index"]]
+        points = analyze_threshold_sweep(submissions_dataset(), baseline, data["guideline"], data["condition_index"],
+                                         data["thresholds"])
+        return Response({
+            "baseline_id": baseline_id,
+            "field": condition["field"],
+            "operator": condition["operator"],
+            "points": points,
+        }, status=status.HTTP_200_OK)
         
+class PortfolioSimulationView(_TimedRenderView):
+    """
+    Accepts a change to the guideline portfolio: "add" or "edit" with a guideline payload, or
+    "remove" with a guideline ID, and an optional as_of date (default: today).
+    Every guideline active on that date decides each submission; the highest priority match wins,
+    then the latest effective date, then the latest version.
+    Returns how the final action per submission changes.
+    """
+    def post(self, request):
+        serializer = PortfolioChangeSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            report = analyze_portfolio_change(submissions_dataset(), GUIDELINES_DATA, data["change"],
+                                              guideline=data.get("guideline"), guideline_id=data.get("guideline_id"),
+                                              as_of=data.get("as_of"))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_200_OK)
+
+class ReadinessView(APIView):
+    """
+    Reports whether this worker has finished its start-up work (see ``warmup.WarmUp``), with
+    the time each stage took: 200 once ready, 503 while warming up or after a failed stage.
+    A worker that does not warm up at start-up begins when this is first requested.
+    """
+    def get(self, request):
+        WARM_UP.start()
+        readiness = WARM_UP.readiness()
+        code = status.HTTP_200_OK if readiness["status"] == "ready" else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(readiness, status=code)
+
+def metrics_allowed(request) -> bool:
+    """
+    Whether the request may read the metrics: it carries SIMULATION_METRICS_TOKEN as a bearer
+    token, or comes from an address in SIMULATION_METRICS_ALLOWED_IPS (addresses or networks).
+    """
+    token = settings.SIMULATION_METRICS_TOKEN
+    if token:
+        scheme, _, credentials = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip().encode(), token.encode()):
+            return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(allowed, strict=False)
+               for allowed in settings.SIMULATION_METRICS_ALLOWED_IPS)
+
+class MetricsView(APIView):
+    """
+    Returns the request metrics of this worker process and the sizes of its caches in the
+    Prometheus text format, to the clients ``metrics_allowed`` lets in; others get a 404.
+    """
+    content_negotiation_class = _IgnoreAcceptNegotiation
+
+    def get(self, request):
+        if not metrics_allowed(request):
+            raise Http404()
+        return HttpResponse(METRICS.render(cache_metrics(cache_stats())), content_type="text/plain; version=0.0.4")
+
+class CacheStatsView(APIView):
+    """
+    Returns entry counts, sizes and hit rates of the simulation result caches.
+    """
+    def get(self, request):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
+
 class GraphReportView(APIView):
     """
     Accepts an impact report JSON payload and returns a JSON response containing:
@@ -82,13 +549,9 @@ class GraphReportView(APIView):
     def post(self, request):
         impact = request.data
 
-        charts = {
-            "industry_chart": generate_bar_chart(impact.get("breakdown_by_industry", {}), "Industry Breakdown"),
-            "risk_factor_chart": generate_bar_chart(impact.get("breakdown_by_risk_factor", {}), "Risk Factor Breakdown"),
-            "company_size_chart": generate_bar_chart(impact.get("breakdown_by_company_size", {}), "Company Size Breakdown"),
-            "location_chart": generate_bar_chart(impact.get("breakdown_by_location", {}), "Location Breakdown"),
-            "time_impact_chart": generate_pie_chart(impact.get("time_impact", {}), "Time Impact")
-        }
+        specs = {f"{name}_chart": chart for name, chart in report_charts(impact).items()}
+        pngs = CHART_RENDERER.render(list(specs.values()))
+        charts = {name: data_uri(png) for name, png in zip(specs, pngs)}
 
         summaries = self.generate_summaries(impact)
         return Response({"charts": charts, "summaries": summaries}, status=status.HTTP_200_OK)
@@ -139,4 +602,45 @@ class GraphReportView(APIView):
             "location_summary": location_summary,
             "time_impact_summary": time_impact_summary,
             "financial_summary": financial_summary,
-        }
\ No newline at end of file
+        }
+class _ChartResponseMixin:
+    """
+    Binary chart responses with a strong ETag derived from the chart data, so a client that
+    sends the ETag back in ``If-None-Match`` gets a 304 without anything being rendered.
+    """
+    content_negotiation_class = _IgnoreAcceptNegotiation
+
+    def chart_response(self, request, etag: str, content_type: str, render, filename: str = None):
+        etag = quote_etag(etag)
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(render(), content_type=content_type)
+            if filename:
+                response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["ETag"] = etag
+        return response
+
+class GraphChartView(_ChartResponseMixin, APIView):
+    """
+    Accepts an impact report JSON payload and returns one of its charts as ``image/png``.
+    """
+    def post(self, request, chart):
+        charts = report_charts(request.data)
+        if chart not in charts:
+            raise Http404(f"Unknown chart: {chart}")
+        return self.chart_response(request, charts[chart].digest, "image/png",
+                                   lambda: CHART_RENDERER.render([charts[chart]])[0])
+
+class GraphBundleView(_ChartResponseMixin, APIView):
+    """
+    Accepts an impact report JSON payload and returns a zip archive of all its charts, one
+    ``<chart>.png`` entry each.
+    """
+    def post(self, request):
+        charts = report_charts(request.data)
+        return self.chart_response(
+            request, bundle_digest(list(charts.values())), "application/zip",
+            lambda: zip_bundle(dict(zip(charts, CHART_RENDERER.render(list(charts.values()))))),
+            filename="charts.zip",
+        )
@@ -0,0 +1,112 @@
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_MODES = ("background", "eager", "lazy")
+
+
+@contextmanager
+def timed(stage: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+    """Logs how long the block took, and records it in ``timings`` under ``stage``."""
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    if timings is not None:
+        timings[stage] = elapsed
+    logger.info("Simulation warm-up: %s took %.3f s", stage, elapsed)
+
+
+def serving_process() -> bool:
+    """
+    Whether this process serves requests: false for management commands other than
+    ``runserver``, for the parent process of ``runserver``'s autoreloader and for worker
+    processes started by ``multiprocessing`` (e.g. the simulation process pool).
+    """
+    if multiprocessing.parent_process() is not None:
+        return False
+    argv = sys.argv
+    if not argv or os.path.basename(argv[0]) not in ("manage.py", "django-admin", "__main__.py"):
+        return True
+    if argv[1:2] != ["runserver"]:
+        return False
+    return "--noreload" in argv or os.environ.get("RUN_MAIN") == "true"
+
+
+class WarmUp:
+    """
+    The start-up work of a worker: loading the guidelines, then the submissions dataset with
+    its indexes and estimate sample. ``readiness`` reports how far it got.
+
+    The guidelines are small and load in ``SimulationConfig.ready()``. The dataset loads in
+    ``run``, either at start-up (on a background thread, so boot time does not depend on the
+    dataset size) or on first use; a failed stage is logged and reported, not raised.
+    """
+
+    def __init__(self):
+        self.status = "idle"
+        self.timings: Dict[str, float] = {}
+        self.errors: List[str] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def load_guidelines(self) -> None:
+        from .guidelines import GUIDELINES_PATH, load_guidelines
+
+        try:
+            with timed("guidelines", self.timings):
+                load_guidelines(GUIDELINES_PATH)
+        except Exception as e:
+            logger.exception("Could not load the guidelines from %s", GUIDELINES_PATH)
+            self.errors.append(f"guidelines: {e}")
+
+    def _stale(self) -> bool:
+        # A "warming" status left by a process this one was forked from (gunicorn --preload
+        # warms up in the master), or by a thread that is no longer running.
+        if self.status != "warming":
+            return False
+        return self._pid != os.getpid() or (self._thread is not None and not self._thread.is_alive())
+
+    def start(self) -> None:
+        """Runs ``run`` on a daemon thread, unless it has already started in this process."""
+        with self._lock:
+            if self.status != "idle" and not self._stale():
+                return
+            self.status, self._pid = "warming", os.getpid()
+            self._thread = threading.Thread(target=self.run, name="simulation-warm-up", daemon=True)
+        self._thread.start()
+
+    def run(self) -> None:
+        with self._lock:
+            if self.status in ("ready", "failed") or (self.status == "warming" and not self._stale() and
+                                                       self._thread is not threading.current_thread()):
+                return
+            self.status, self._pid, self._thread = "warming", os.getpid(), threading.current_thread()
+        # Imported here so that starting the app does not import the simulation engine.
+        from . import views
+
+        started = time.perf_counter()
+        try:
+            views.submissions_dataset(self.timings, self.errors)
+        except Exception as e:
+            logger.exception("Simulation warm-up failed")
+            self.errors.append(str(e))
+        self.timings["total"] = time.perf_counter() - started
+        self.status = "failed" if self.errors else "ready"
+        logger.info("Simulation warm-up %s in %.3f s", self.status, self.timings["total"])
+
+    def readiness(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"status": self.status, "timings": dict(self.timings)}
+        if self.errors:
+            payload["errors"] = list(self.errors)
+        return payload
+
+
+WARM_UP = WarmUp()